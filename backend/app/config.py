@@ -28,7 +28,92 @@ class Settings(BaseSettings):
     output_dir: str = "./output"
     templates_dir: str = "./templates"
     max_slides: int = 50
-    
+    artifact_cache_control: str = "private, max-age=31536000, immutable"  # 产物下载的缓存策略
+
+    # 上传配置
+    upload_chunk_size: int = 1024 * 1024  # 流式写盘分块大小（字节）
+    max_upload_size: int = 100 * 1024 * 1024  # 单个上传文件大小上限（字节）
+
+    # 生成配置
+    generation_workers: int = 4  # PPT 生成线程池大小
+    max_batch_decks: int = 200  # 单次批量生成的大纲数上限
+    stream_spool_size: int = 8 * 1024 * 1024  # 写入流时在内存中缓冲的上限（字节），超出后转存临时文件
+    direct_download_max_slides: int = 20  # 直接下载接口 (不建任务、不落盘) 允许的最大幻灯片数
+    pptx_xml_compress_level: int = 6  # PPTX 中 XML 部件的 deflate 级别 (0-9)
+    pptx_store_media: bool = True  # 图片等已压缩的媒体部件不再压缩 (ZIP_STORED)
+    table_rows_per_slide: int = 12  # 表格版式每页的数据行数 (不含表头)，超出时自动分页
+
+    # 调度与配额配置 (按登录用户计，未登录请求按客户端 IP 计)
+    user_max_concurrent_jobs: int = 2  # 单个用户在生成/转换线程池中各自同时运行的作业数上限，0 表示不限制
+    daily_generation_quota: int = 0  # 单个用户每日可生成的 PPT 份数，0 表示不限制
+    daily_conversion_quota: int = 0  # 单个用户每日可提交的文件转换数，0 表示不限制
+    interactive_reserved_slots: int = 1  # 生成/转换线程池中各自为交互作业 (预览、直接下载、单份生成) 预留的并发数
+    normal_reserved_slots: int = 0  # 为普通作业 (单个文件转换、附带导出) 预留的并发数，批量作业不可占用
+
+    # 预览配置
+    preview_format: str = "webp"  # 缩略图格式: png / webp
+    preview_dpi: int = 72  # 缩略图分辨率，13.33 英寸宽的幻灯片约 960px
+    preview_quality: int = 80  # WebP 压缩质量
+    font_dir: str = ""  # 额外的字体目录，预览渲染优先在此查找主题字体
+
+    # 转换配置
+    conversion_workers: int = 2  # 转换线程池大小（同时运行的 LibreOffice 进程数）
+    max_batch_files: int = 100  # 单次批量转换的文件数上限
+    libreoffice_profile_dir: str = ""  # LibreOffice 用户配置目录，默认位于系统临时目录
+
+    # 产物存储配置
+    artifact_backend: str = "local"  # 产物存储后端: local / s3
+    s3_endpoint_url: str = ""  # S3 兼容服务地址 (如 MinIO)，留空使用 AWS S3
+    s3_bucket: str = ""
+    s3_prefix: str = ""  # 对象 key 前缀
+    s3_region: str = ""
+    s3_access_key: str = ""
+    s3_secret_key: str = ""
+    s3_presigned_downloads: bool = True  # 下载时重定向到预签名 URL，由对象存储直接传输
+    s3_presign_expiry: int = 3600  # 预签名 URL 有效期（秒）
+
+    # 产物清理配置
+    artifact_ttl: int = 0  # 任务产物保留时间（秒），从任务创建或最近一次访问起算，0 表示与 redis_expiry 一致
+    temp_ttl: int = 3600  # output/temp 中临时输入文件的保留时间（秒）
+    output_quota: int = 0  # 本地工作区磁盘配额（字节），超出时按最近最少使用淘汰，0 表示不限制
+    janitor_interval: int = 300  # 清理周期（秒），0 表示不启动后台清理
+
+    # 用户数据配置
+    user_store_backend: str = "sqlite"  # 用户存储后端: sqlite / redis / memory (仅开发调试，重启后丢失)
+    history_store_backend: str = "sqlite"  # 历史记录存储后端: sqlite / redis / memory
+    sqlite_path: str = "./data/app.db"  # SQLite 数据库文件，多个 worker 进程共享
+    history_page_size: int = 20  # 历史记录默认每页条数
+    history_max_page_size: int = 100  # 历史记录每页条数上限
+
+    # 认证配置
+    bcrypt_rounds: int = 12  # bcrypt cost (4-31)，修改后已有用户在下次登录时按新 cost 重新哈希
+    password_hash_workers: int = 2  # 密码哈希线程池大小，限制同时进行的 bcrypt 运算数
+    token_cache_size: int = 1024  # 已校验令牌缓存的条目数，0 表示不缓存
+    token_cache_ttl: int = 60  # 已校验令牌的缓存时间（秒），不超过令牌自身的过期时间
+    download_token_ttl: int = 600  # 下载与预览链接中下载令牌的有效期（秒）
+
+    # 日志配置
+    log_level: str = "INFO"  # 日志级别
+    log_format: str = "json"  # 日志格式: json (每行一条 JSON) / text
+    log_file: str = ""  # 日志文件，按大小轮转；留空时输出到 stderr (多个 worker 进程部署时应留空，由外部收集)
+    log_max_bytes: int = 10 * 1024 * 1024  # 单个日志文件的大小上限（字节）
+    log_backup_count: int = 5  # 保留的轮转日志文件数
+    log_sample_rates: str = "ai-ppt.generator.slide=0.1"  # 高频日志器的采样比例 "日志器=比例,..."，WARNING 及以上不采样
+
+    # 监控配置
+    metrics_enabled: bool = True  # 导出 Prometheus 指标 (/metrics)，需要安装 prometheus-client
+    tracing_enabled: bool = True  # 创建 OpenTelemetry span，需要安装 opentelemetry-api；任务耗时分解不受影响
+    otel_service_name: str = "ai-ppt-backend"  # 上报的服务名
+    otel_exporter_otlp_endpoint: str = ""  # OTLP/HTTP 接收地址 (如 http://localhost:4318)，留空时不在应用内配置导出
+
+    # 性能剖析配置
+    profiling_sample_rate: float = 0.0  # 自动剖析的任务比例 (0-1)，0 表示只剖析请求中要求的任务
+    profiling_request_flag: bool = False  # 是否响应请求中的 profile 标志 (剖析会使任务明显变慢)
+    profiling_memory: bool = False  # 同时用 tracemalloc 记录内存分配 (开销较大)
+    profiling_traceback_depth: int = 1  # tracemalloc 记录的调用栈深度
+    profiling_top: int = 40  # 文本报告中列出的函数 / 分配位置数
+    admin_emails: str = ""  # 管理员邮箱，逗号分隔，可下载剖析结果
+
     # Redis 配置
     redis_url: str = "redis://localhost:6379/0"
     redis_expiry: int = 3600  # 任务状态过期时间（秒）
@@ -42,6 +127,11 @@ class Settings(BaseSettings):
         """将 CORS 来源字符串转换为列表"""
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
+    @property
+    def admin_emails_list(self) -> List[str]:
+        """管理员邮箱列表 (小写)"""
+        return [email.strip().lower() for email in self.admin_emails.split(",") if email.strip()]
+
 
 # 全局配置实例
 settings = Settings()
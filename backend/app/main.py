@@ -5,34 +5,35 @@ import os
 import uuid
 import asyncio
 import logging
-import subprocess  # 新增: 用于调用外部命令
-import sys        # 新增: 用于判断操作系统
-import shutil     # 新增: 用于移动文件
+import time
+import shutil
+import zipfile
+from dataclasses import asdict
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from typing import Dict
-
-from pdf2docx import Converter
-
-from pdf2image import convert_from_path
-from pptx import Presentation
-from pptx.util import Inches, Pt
-import io
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Awaitable, Dict, List, Optional, Tuple
+from urllib.parse import quote
 
 # 保持原有的 import，但注意 converter 可能不再被完全依赖，除非用来做其他格式转换
 from .config import settings
 from .models import (
     GenerateOutlineRequest,
     GeneratePPTRequest,
+    BatchGeneratePPTRequest,
     OutlineResponse,
     TaskResponse,
     TaskStatus,
+    BatchItemStatus,
+    BatchTaskResponse,
+    PreviewResponse,
     UserCreate,
     UserLogin,
     User,
     Token,
+    HistoryItem,
     HistoryResponse,
 )
 from .services.ai_factory import AIAdapterFactory
@@ -40,12 +41,41 @@ from .services.ppt_generator import PPTGenerator
 from .services.converter import FileConverter
 from .services.redis_client import redis_client
 from .services.auth import AuthService
-
-# 配置日志
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from .services.user_store import EmailAlreadyRegistered
+from .services.history_store import InvalidCursor
+from .services.security import (
+    download_user_id, optional_user_id, request_owner, require_admin, require_user, require_user_id, signed_url,
+)
+from .services.scheduler import (
+    Priority, QuotaExceeded, conversion_quota, conversion_scheduler, generation_quota, generation_scheduler,
 )
+from .services.upload import save_upload, UploadRejected
+from .services.conversion import convert_with_libreoffice, run_conversion, is_supported_conversion
+from .services.workers import generation_executor
+from .services.zip_stream import aiter_zip, iter_zip
+from .services.artifact_store import artifact_store
+from .services.janitor import janitor
+from .services.task_storage import TaskStorage
+from .services import metrics
+from .services.tracing import configure_tracing, span, trace_task
+from .services.logging_config import configure_logging, log_context
+from .services.profiling import profile_task, should_profile
+from .services.text_fit import preload_metrics
+from .services.pagination import paginate_outline
+from .services.file_response import artifact_response, guess_media_type
+from .services.preview import (
+    count_slides,
+    export_artifacts,
+    publish_preview,
+    ready_slides,
+    render_first_slide,
+    render_outline_slides,
+    render_pdf_pages,
+    slide_image_path,
+)
+
+# 配置日志 (级别、格式与输出见 settings.log_*)
+configure_logging()
 logger = logging.getLogger("ai-ppt")
 
 # 创建 FastAPI 应用
@@ -64,183 +94,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 任务存储
-tasks_storage: Dict[str, Dict] = {}
+# 链路追踪 (需在应用启动前完成，FastAPI 插桩以中间件方式注册)
+configure_tracing(app)
 
-# --- 新增函数: 使用 LibreOffice 进行无水印转换 ---
-# --- 替换 main.py 中的 convert_with_libreoffice 函数 ---
+# 任务存储
+tasks_storage = TaskStorage()
 
-def convert_with_libreoffice(input_path: str, output_path: str) -> bool:
-    """
-    使用 LibreOffice 将 PPT/Word 转换为 PDF (无水印)
-    兼容 Windows, macOS, Linux
-    """
-    try:
-        # 1. 获取绝对路径 (防止相对路径在子进程中出错)
-        input_abs_path = os.path.abspath(input_path)
-        output_dir_abs = os.path.abspath(os.path.dirname(output_path))
-
-        # 2. 确定 LibreOffice 的执行命令路径
-        soffice_cmd = "libreoffice" # Linux 默认
-
-        if sys.platform == "darwin": # macOS
-            # macOS 标准安装路径
-            mac_path = "/Applications/LibreOffice.app/Contents/MacOS/soffice"
-            if os.path.exists(mac_path):
-                soffice_cmd = mac_path
-            else:
-                # 尝试查找用户可能手动配置在 PATH 中的命令
-                if shutil.which("libreoffice"):
-                    soffice_cmd = "libreoffice"
-                elif shutil.which("soffice"):
-                    soffice_cmd = "soffice"
-                else:
-                    logger.error("未找到 LibreOffice。请确保已安装: brew install --cask libreoffice")
-                    return False
-
-        elif sys.platform == "win32": # Windows
-            possible_paths = [
-                r"C:\Program Files\LibreOffice\program\soffice.exe",
-                r"C:\Program Files (x86)\LibreOffice\program\soffice.exe"
-            ]
-            # 先检查默认路径
-            found = False
-            for p in possible_paths:
-                if os.path.exists(p):
-                    soffice_cmd = p
-                    found = True
-                    break
-            # 如果默认路径没有，尝试环境变量
-            if not found:
-                soffice_cmd = "soffice"
-
-        # 3. 构建命令
-        # 注意：使用绝对路径
-        cmd = [
-            soffice_cmd,
-            "--headless",
-            "--convert-to", "pdf",
-            "--outdir", output_dir_abs,
-            input_abs_path
-        ]
+# 模板内容哈希 -> 模板 ID，用于重复上传去重
+template_hashes: Dict[str, str] = {}
 
-        logger.info(f"执行转换命令: {cmd}")
+# 后台任务引用，防止被垃圾回收
+background_jobs: List[asyncio.Task] = []
 
-        # 4. 执行转换
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=300 # 增加超时时间，PPT转PDF可能较慢
-        )
 
-        if result.returncode != 0:
-            logger.error(f"LibreOffice 转换失败 (Code {result.returncode}): {result.stderr.decode()}")
-            return False
-
-        # 5. 处理文件名重命名
-        # LibreOffice 默认输出文件名是 [原文件名].pdf
-        input_filename_no_ext = os.path.splitext(os.path.basename(input_path))[0]
-        # 注意：LibreOffice 可能会根据原文件自动去除 .pptx 后缀生成 .pdf
-        expected_output_name = f"{input_filename_no_ext}.pdf"
-        generated_file_path = os.path.join(output_dir_abs, expected_output_name)
-
-        if os.path.exists(generated_file_path):
-            # 只有当生成的文件名和目标文件名不一样时才重命名
-            # 注意：os.path.samefile 在文件不存在时会报错，所以直接比较路径字符串
-            if os.path.abspath(output_path) != generated_file_path:
-                # 如果目标文件已存在，先删除，防止 windows 下报错
-                if os.path.exists(output_path):
-                    os.remove(output_path)
-                shutil.move(generated_file_path, output_path)
-
-            logger.info(f"转换成功: {output_path}")
-            return True
-        else:
-            logger.error(f"未找到生成的 PDF 文件，预期路径: {generated_file_path}")
-            # 调试：列出目录下文件
-            logger.error(f"目录下现有文件: {os.listdir(output_dir_abs)}")
-            return False
+@app.on_event("startup")
+async def start_janitor():
+    """启动产物清理后台任务"""
+    if settings.janitor_interval > 0:
+        background_jobs.append(asyncio.create_task(janitor.run(tasks_storage)))
 
-    except Exception as e:
-        logger.error(f"LibreOffice 转换异常: {str(e)}", exc_info=True)
-        return False
-# ----------------------------------------------------
 
+@app.on_event("startup")
+async def load_font_metrics():
+    """预加载主题字体的字宽表，供生成时的文本自适应排版使用"""
+    await run_in_threadpool(preload_metrics, [theme["font_name"] for theme in PPTGenerator.THEMES.values()])
 
-def convert_pdf_to_pptx_file(input_path: str, output_path: str) -> bool:
-    """
-    将 PDF 转换为 PPTX (通过将每一页转为图片的方式)
-    """
-    try:
-        logger.info(f"开始 PDF 转 PPT: {input_path}")
-
-        # 1. 将 PDF 转为图片列表
-        # thread_count 指定线程数，提高速度
-        images = convert_from_path(input_path, thread_count=2)
-
-        if not images:
-            logger.error("未从 PDF 解析出任何页面")
-            return False
-
-        # 2. 创建一个新的 PPT 对象
-        prs = Presentation()
-
-        # 删除默认的第一张空白幻灯片(如果有)
-        if len(prs.slides) > 0:
-            # python-pptx 不直接支持删除 slide，但新建的默认通常是空的或者带一个标题页
-            # 我们不需要管它，直接设置 slide layout 即可，或者用空白模版
-            pass
-
-        # 获取第一张图片的尺寸，用于设置 PPT 幻灯片大小
-        # 图片是 PIL Image 对象
-        width, height = images[0].size
-
-        # 设置 PPT 的页面大小与 PDF 页面比例一致
-        # python-pptx 默认单位是 EMU (English Metric Unit)，我们需要转换
-        # 这里为了简单，我们根据图片像素比例设置幻灯片尺寸
-        # 默认 PPT 宽 10 英寸，高 7.5 英寸
-
-        # 简单的做法：固定 PPT 宽度为 10 英寸，高度按比例缩放
-        aspect_ratio = height / width
-        prs.slide_width = Inches(10)
-        prs.slide_height = Inches(10 * aspect_ratio)
-
-        # 3. 遍历图片，添加到幻灯片
-        blank_slide_layout = prs.slide_layouts[6] # 6 是空白布局
-
-        for i, img in enumerate(images):
-            # 添加一张新幻灯片
-            slide = prs.slides.add_slide(blank_slide_layout)
-
-            # 将 PIL image 转为字节流
-            image_stream = io.BytesIO()
-            img.save(image_stream, format='PNG')
-            image_stream.seek(0)
-
-            # 将图片铺满整个幻灯片
-            slide.shapes.add_picture(
-                image_stream,
-                left=0,
-                top=0,
-                width=prs.slide_width,
-                height=prs.slide_height
-            )
-            logger.info(f"处理第 {i+1} 页...")
 
-        # 4. 保存 PPT
-        prs.save(output_path)
-        logger.info(f"PPT 生成成功: {output_path}")
-        return True
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    for job in background_jobs:
+        job.cancel()
 
-    except Exception as e:
-        logger.error(f"PDF 转 PPT 失败: {str(e)}", exc_info=True)
-        return False
 
 @app.get("/")
 async def root():
     return {"message": "AI-PPT Architect API", "status": "running", "version": "1.0.0"}
 
+@app.get("/api/storage/stats")
+async def get_storage_stats(admin: dict = Depends(require_admin)):
+    """产物清理统计 (管理员，仅本进程)：累计回收字节数、过期任务数、当前磁盘占用等；回收量另见 /metrics"""
+    return asdict(janitor.stats)
+
 @app.get("/api/models")
 async def get_available_models():
     try:
@@ -254,16 +148,29 @@ async def upload_template(file: UploadFile = File(...)):
     if not file.filename.endswith(".pptx"):
         raise HTTPException(status_code=400, detail="只支持 .pptx 格式的模板文件")
     try:
-        os.makedirs(settings.templates_dir, exist_ok=True)
         template_id = str(uuid.uuid4())
         file_ext = os.path.splitext(file.filename)[1]
         filename = f"{template_id}{file_ext}"
         save_path = os.path.join(settings.templates_dir, filename)
-        with open(save_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        saved = await save_upload(file, save_path)
+
+        # 相同内容的模板已上传过则直接复用
+        existing_id = template_hashes.get(saved.sha256)
+        if not existing_id:
+            cached = redis_client.get(f"template_hash:{saved.sha256}")
+            existing_id = cached.get("template_id") if cached else None
+        if existing_id and os.path.exists(os.path.join(settings.templates_dir, f"{existing_id}{file_ext}")):
+            os.remove(save_path)
+            template_hashes[saved.sha256] = existing_id
+            logger.info(f"模板内容重复，复用已有模板: {file.filename} -> {existing_id}")
+            return {"template_id": existing_id, "filename": file.filename, "message": "模板上传成功"}
+
+        template_hashes[saved.sha256] = template_id
+        redis_client.set(f"template_hash:{saved.sha256}", {"template_id": template_id})
         logger.info(f"模板上传成功: {file.filename} -> {template_id}")
         return {"template_id": template_id, "filename": file.filename, "message": "模板上传成功"}
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
         logger.error(f"模板上传失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"模板上传失败: {str(e)}")
@@ -271,32 +178,48 @@ async def upload_template(file: UploadFile = File(...)):
 @app.post("/api/generate-outline", response_model=OutlineResponse)
 async def generate_outline(request: GenerateOutlineRequest):
     logger.info(f"收到大纲生成请求: 模型={request.model.value}, 内容长度={len(request.content)}")
+    outcome = "error"
+    start = time.perf_counter()
     try:
         adapter = AIAdapterFactory.create_adapter(request.model)
-        outline_data = await adapter.generate_outline(request.content, slide_count=request.slide_count)
-        return OutlineResponse(**outline_data)
+        with span("outline.generate", {"gen_ai.request.model": request.model.value}):
+            outline_data = await adapter.generate_outline(request.content, slide_count=request.slide_count)
+        response = OutlineResponse(**outline_data)
+        outcome = "success"
+        return response
     except ValueError as e:
         logger.error(f"参数错误: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"大纲生成异常: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"大纲生成失败: {str(e)}")
+    finally:
+        metrics.observe(metrics.OUTLINE_SECONDS, time.perf_counter() - start,
+                        model=request.model.value, outcome=outcome)
 
 @app.post("/api/generate-ppt", response_model=TaskResponse)
-async def generate_ppt(request: GeneratePPTRequest):
+async def generate_ppt(request: GeneratePPTRequest, user_id: Optional[str] = Depends(optional_user_id),
+                       owner: str = Depends(request_owner)):
+    _consume_quota(generation_quota, owner)
     try:
         task_id = str(uuid.uuid4())
+        # 已登录用户的任务归属该用户，完成后记入其历史记录；未登录也可生成
         task_data = {
             "status": TaskStatus.PENDING,
             "progress": 0,
             "message": "任务已创建",
             "created_at": datetime.now().isoformat(),
+            "user_id": user_id,
+            "owner": owner,
+            "priority": Priority.INTERACTIVE.name.lower(),
         }
         # 存储到内存
         tasks_storage[task_id] = task_data
         # 存储到Redis
         redis_client.set(f"task:{task_id}", task_data)
-        asyncio.create_task(process_ppt_generation(task_id, request))
+        asyncio.create_task(_run_traced(
+            "ppt.task", task_id, process_ppt_generation(task_id, request, user_id), profile=request.profile
+        ))
         return TaskResponse(
             task_id=task_id,
             status=TaskStatus.PENDING,
@@ -306,13 +229,59 @@ async def generate_ppt(request: GeneratePPTRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"任务创建失败: {str(e)}")
 
-import concurrent.futures
+def _consume_quota(quota, owner: str, amount: int = 1) -> None:
+    """占用每日配额，超出时返回 429"""
+    try:
+        quota.consume(owner, amount)
+    except QuotaExceeded as e:
+        raise HTTPException(status_code=429, detail=f"已超出今日配额 (每日 {e.limit} 个)")
+
 
-async def process_ppt_generation(task_id: str, request: GeneratePPTRequest):
+async def _run_traced(name: str, task_id: str, job: Awaitable, profile: bool = False) -> None:
+    """
+    在任务级追踪与日志上下文中执行后台任务，结束后将 trace id 与耗时分解写入任务数据；
+    profile 为 True 或按采样命中时同时剖析，结果保存为任务的剖析产物
+    """
+    task_trace = None
+    session = None
+    try:
+        with log_context(task_id, tasks_storage[task_id].get("user_id")), \
+                trace_task(name, task_id) as task_trace, \
+                profile_task(task_id, should_profile(profile)) as session:
+            await job
+    finally:
+        task = tasks_storage.get(task_id)
+        if task is not None:
+            # 进入追踪前失败 (如任务已被清理) 时没有追踪数据
+            if task_trace is not None:
+                task["trace_id"] = task_trace.trace_id
+                task["timings"] = task_trace.breakdown()
+            if session is not None:
+                try:
+                    task["profile"] = await run_in_threadpool(session.save, artifact_store)
+                except Exception as e:
+                    logger.error(f"保存剖析结果失败: {task_id} - {e}")
+            redis_client.set(f"task:{task_id}", task)
+
+
+def _task_owner(task: Dict) -> str:
+    """任务的调度归属，早于调度器创建的任务归为匿名"""
+    return task.get("owner") or "anonymous"
+
+
+def _resolve_template_path(template_id: Optional[str]) -> Optional[str]:
+    """根据模板 ID 获取模板文件的绝对路径，不存在时返回 None"""
+    if not template_id:
+        return None
+    template_path = os.path.abspath(os.path.join(settings.templates_dir, f"{template_id}.pptx"))
+    return template_path if os.path.exists(template_path) else None
+
+
+async def process_ppt_generation(task_id: str, request: GeneratePPTRequest, user_id: Optional[str] = None):
     try:
         # 更新任务状态
         def update_task_status(status, progress, message, **kwargs):
-            tasks_storage[task_id]["status"] = status
+            tasks_storage.set_status(task_id, status)
             tasks_storage[task_id]["progress"] = progress
             tasks_storage[task_id]["message"] = message
             for key, value in kwargs.items():
@@ -323,159 +292,354 @@ async def process_ppt_generation(task_id: str, request: GeneratePPTRequest):
         update_task_status(TaskStatus.PROCESSING, 10, "正在初始化...")
         os.makedirs(settings.output_dir, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"ppt_{timestamp}_{task_id[:8]}.pptx"
-        output_path = os.path.join(settings.output_dir, filename)
+        file_key = f"ppt_{timestamp}_{task_id[:8]}.pptx"
+        output_path = artifact_store.local_path(file_key)
 
         update_task_status(TaskStatus.PROCESSING, 30, "正在生成 PPT...")
 
-        template_path = None
-        if request.template_id:
-            template_path = os.path.abspath(os.path.join(settings.templates_dir, f"{request.template_id}.pptx"))
-            if not os.path.exists(template_path):
-                template_path = None
+        template_path = _resolve_template_path(request.template_id)
+
+        # 先分页，调度成本按分页后的页数计算；在共享生成线程池中执行，避免阻塞事件循环，生成后立即发布到产物存储
+        paged = await run_in_threadpool(paginate_outline, request.outline, request.theme)
+        outline = paged.outline
+
+        def generate_ppt_sync():
+            generator = PPTGenerator(theme=request.theme, template_path=template_path)
+            if artifact_store.local_is_cache and not request.also_export:
+                # 对象存储后端且无需本地导出：直接从内存流上传，不写本地文件
+                with generator.generate_to_stream(outline.title, outline.slides) as stream:
+                    artifact_store.put_stream(file_key, stream)
+                return None
+            file_path = generator.generate(
+                title=outline.title,
+                slides=outline.slides,
+                output_path=output_path
+            )
+            artifact_store.publish(file_key)
+            return file_path
 
-        # 使用线程池执行器来避免阻塞事件循环
-        loop = asyncio.get_event_loop()
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            def generate_ppt_sync():
-                generator = PPTGenerator(theme=request.theme, template_path=template_path)
-                return generator.generate(
-                    title=request.outline.title,
-                    slides=request.outline.slides,
-                    output_path=output_path
-                )
-            
-            file_path = await loop.run_in_executor(executor, generate_ppt_sync)
+        owner = _task_owner(tasks_storage[task_id])
+        file_path = await generation_scheduler.run(
+            owner, generate_ppt_sync, priority=Priority.INTERACTIVE, cost=len(outline.slides)
+        )
+
+        # 非模板模式记录渲染所需的大纲 (分页后) 与主题，预览可直接由 SlideRenderer 绘制
+        render_source = None
+        if not template_path:
+            render_source = {
+                "title": paged.outline.title,
+                "slides": [slide.model_dump(mode="json") for slide in paged.outline.slides],
+                "theme": request.theme.value,
+            }
+
+        artifacts = {"pptx": file_key}
+        message = "PPT 生成完成"
+        if paged.truncated:
+            message = f"PPT 生成完成，内容超出 {settings.max_slides} 页上限，已截断"
+        if request.also_export:
+            formats = [fmt.value for fmt in request.also_export]
+            update_task_status(TaskStatus.PROCESSING, 80, f"正在导出 {', '.join(formats).upper()}...")
+            exported = await conversion_scheduler.run(
+                owner, export_artifacts, task_id, file_path, formats, render_source, priority=Priority.NORMAL
+            )
+            artifacts.update(exported)
+            missing = [fmt for fmt in formats if fmt not in exported]
+            if missing:
+                message = f"{message}，{', '.join(missing).upper()} 导出失败"
 
         update_task_status(TaskStatus.PROCESSING, 90, "正在完成...")
-        await asyncio.sleep(0.5)
         update_task_status(
             TaskStatus.COMPLETED, 
             100, 
-            "PPT 生成完成",
-            file_path=file_path,
-            download_url=f"/api/download/{task_id}"
+            message,
+            file_key=file_key,
+            download_url=f"/api/download/{task_id}",
+            render_source=render_source,
+            artifacts=artifacts
         )
-        
-        # 尝试从请求中获取用户信息并添加历史记录
-        # 注意：这里简化处理，实际应该从请求上下文中获取用户信息
-        # 由于当前实现中没有传递用户信息，这里暂时注释掉
-        # AuthService.add_history_record(user_id, request.outline.title, task_id, file_path)
-        
+
+        # 记入用户历史记录，写入失败不影响任务结果
+        if user_id:
+            try:
+                await run_in_threadpool(AuthService.add_history_record, user_id, paged.outline.title, task_id, file_key)
+            except Exception as e:
+                logger.warning(f"添加历史记录失败: {task_id} - {e}")
+
     except Exception as e:
         logger.error(f"PPT生成异常: {str(e)}", exc_info=True)
         error_data = {
-            "status": TaskStatus.FAILED,
             "message": f"生成失败: {str(e)}",
             "error": str(e)
         }
+        tasks_storage.set_status(task_id, TaskStatus.FAILED)
         tasks_storage[task_id].update(error_data)
         redis_client.set(f"task:{task_id}", tasks_storage[task_id])
 
+@app.post("/api/generate-ppt/stream")
+async def generate_ppt_stream(request: GeneratePPTRequest, owner: str = Depends(request_owner)):
+    """
+    直接生成并下载 PPT：不创建任务、不写产物文件，生成结果从内存流直接返回。
+    适用于小型文稿；需要导出其他格式、预览或大文稿时请使用 /api/generate-ppt
+    """
+    if len(request.outline.slides) > settings.direct_download_max_slides:
+        raise HTTPException(
+            status_code=400,
+            detail=f"直接下载最多支持 {settings.direct_download_max_slides} 页，请使用 /api/generate-ppt"
+        )
+    if request.also_export:
+        raise HTTPException(status_code=400, detail="直接下载不支持导出其他格式，请使用 /api/generate-ppt")
+    template_path = _resolve_template_path(request.template_id)
+    _consume_quota(generation_quota, owner)
+
+    def generate_ppt_sync(outline: OutlineResponse):
+        generator = PPTGenerator(theme=request.theme, template_path=template_path)
+        stream = generator.generate_to_stream(outline.title, outline.slides)
+        size = stream.seek(0, os.SEEK_END)
+        stream.seek(0)
+        return stream, size
+
+    try:
+        outline = (await run_in_threadpool(paginate_outline, request.outline, request.theme)).outline
+        stream, size = await generation_scheduler.run(
+            owner, generate_ppt_sync, outline, priority=Priority.INTERACTIVE, cost=len(outline.slides)
+        )
+    except Exception as e:
+        logger.error(f"PPT直接生成失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def iter_stream():
+        with stream:
+            while True:
+                chunk = stream.read(settings.upload_chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    filename = f"{request.outline.title[:50]}.pptx".replace("/", "_")
+    return StreamingResponse(
+        iter_stream(),
+        media_type=guess_media_type(filename),
+        headers={
+            "Content-Length": str(size),
+            "Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}",
+        },
+    )
+
+@app.post("/api/generate-ppt/batch", response_model=BatchTaskResponse)
+async def generate_ppt_batch(request: BatchGeneratePPTRequest, user_id: Optional[str] = Depends(optional_user_id),
+                             owner: str = Depends(request_owner)):
+    """
+    批量生成 PPT：一个批次 ID 下包含多个大纲，共用主题与模板，
+    子项调度到共享生成线程池，进度可通过 /api/batch/{task_id} 查询
+    """
+    if len(request.outlines) > settings.max_batch_decks:
+        raise HTTPException(status_code=400, detail=f"大纲数量超过上限 {settings.max_batch_decks}")
+    _consume_quota(generation_quota, owner, len(request.outlines))
+    task_id = str(uuid.uuid4())
+    os.makedirs(settings.output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    items = []
+    for i, outline in enumerate(request.outlines):
+        items.append({
+            "index": i,
+            "name": outline.title,
+            "arcname": f"{i + 1:03d}_{outline.title[:50]}.pptx".replace("/", "_"),
+            "status": TaskStatus.PENDING,
+            "progress": 0,
+            "message": "等待生成",
+            "file_key": f"ppt_{timestamp}_{task_id[:8]}_{i:03d}.pptx",
+        })
+
+    task_data = {
+        "kind": "batch_generate",
+        "status": TaskStatus.PENDING,
+        "progress": 0,
+        "message": f"批量生成任务已启动，共 {len(items)} 份",
+        "created_at": datetime.now().isoformat(),
+        "user_id": user_id,
+        "owner": owner,
+        "priority": Priority.BATCH.name.lower(),
+        "items": items,
+        "download_url": f"/api/batch/{task_id}/download",
+    }
+    tasks_storage[task_id] = task_data
+    redis_client.set(f"task:{task_id}", task_data)
+    asyncio.create_task(_run_traced("ppt.batch", task_id, process_batch_generation(task_id, request)))
+    return _batch_response(task_id, task_data)
+
+
+async def process_batch_generation(task_id: str, request: BatchGeneratePPTRequest):
+    """
+    批量生成后台任务：模板只读取一次，各子项以批量优先级提交到生成调度器，
+    不占用为交互作业预留的空位
+    """
+    task = tasks_storage[task_id]
+    items = task["items"]
+    owner = _task_owner(task)
+    loop = asyncio.get_event_loop()
+
+    def refresh_parent():
+        done = sum(1 for item in items if item["status"] in (TaskStatus.COMPLETED, TaskStatus.FAILED))
+        task["progress"] = int(done * 100 / len(items))
+        task["message"] = f"已生成 {done}/{len(items)} 份"
+        redis_client.set(f"task:{task_id}", task)
+
+    # python-pptx 的 Presentation 对象可变且非线程安全，不能在生成器之间共享；
+    # 这里共享的是读入内存的模板内容，各子项从内存解析，省去重复的磁盘读取
+    template_path = _resolve_template_path(request.template_id)
+    template_data = None
+    if template_path:
+        template_data = await loop.run_in_executor(generation_executor, _read_file_bytes, template_path)
+
+    async def generate_item(item: Dict, outline: OutlineResponse):
+        try:
+            item.update(status=TaskStatus.PROCESSING, progress=30, message="正在生成 PPT...")
+            redis_client.set(f"task:{task_id}", task)
+
+            # 调度成本按分页后的页数计算
+            paged = (await run_in_threadpool(paginate_outline, outline, request.theme)).outline
+
+            def generate_ppt_sync():
+                generator = PPTGenerator(theme=request.theme, template_data=template_data)
+                output_path = artifact_store.local_path(item["file_key"])
+                generator.generate(title=paged.title, slides=paged.slides, output_path=output_path)
+                artifact_store.publish(item["file_key"])
+
+            await generation_scheduler.run(
+                owner, generate_ppt_sync, priority=Priority.BATCH, cost=len(paged.slides)
+            )
+            item.update(status=TaskStatus.COMPLETED, progress=100, message="PPT 生成完成")
+        except Exception as e:
+            logger.error(f"批量生成 {task_id} 子项 {item['name']} 失败: {str(e)}")
+            item.update(status=TaskStatus.FAILED, progress=100, message=f"生成失败: {str(e)}")
+        finally:
+            refresh_parent()
+
+    tasks_storage.set_status(task_id, TaskStatus.PROCESSING)
+    refresh_parent()
+    await asyncio.gather(*(generate_item(item, outline) for item, outline in zip(items, request.outlines)))
+    succeeded = sum(1 for item in items if item["status"] == TaskStatus.COMPLETED)
+    tasks_storage.set_status(task_id, TaskStatus.COMPLETED if succeeded else TaskStatus.FAILED)
+    task["progress"] = 100
+    task["message"] = f"批量生成完成: 成功 {succeeded}/{len(items)}"
+    redis_client.set(f"task:{task_id}", task)
+
+
+def _read_file_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _artifact_urls(task_id: str, task: Dict) -> Dict[str, str]:
+    """任务产物的下载链接：PPTX 为默认下载，其余格式通过 format 参数区分；登录用户的任务附带下载令牌"""
+    return {
+        fmt: _signed(task_id, task, f"/api/download/{task_id}" if fmt == "pptx" else f"/api/download/{task_id}?format={fmt}")
+        for fmt in task.get("artifacts", {})
+    }
+
+
+def _signed(task_id: str, task: Dict, url: Optional[str]) -> Optional[str]:
+    """登录用户的任务链接附加短期下载令牌，供浏览器跳转等无法携带 Authorization 头的请求使用"""
+    return signed_url(url, task_id, task.get("user_id"))
+
+
 @app.get("/api/task/{task_id}", response_model=TaskResponse)
-async def get_task_status(task_id: str):
-    # 首先从内存中查找
-    if task_id in tasks_storage:
-        task = tasks_storage[task_id]
-    else:
-        # 如果内存中没有，从Redis中查找
-        task = redis_client.get(f"task:{task_id}")
-        if not task:
-            raise HTTPException(status_code=404, detail="任务不存在")
-        # 将Redis中的任务数据加载到内存中
-        tasks_storage[task_id] = task
+async def get_task_status(task_id: str, user_id: Optional[str] = Depends(optional_user_id)):
+    task = _get_task_for(task_id, user_id)
+    # 将Redis中的任务数据加载到内存中
+    tasks_storage.setdefault(task_id, task)
     return TaskResponse(
         task_id=task_id,
         status=task["status"],
         progress=task["progress"],
         message=task.get("message"),
-        download_url=task.get("download_url")
+        download_url=_signed(task_id, task, task.get("download_url")),
+        artifacts=_artifact_urls(task_id, task),
+        trace_id=task.get("trace_id"),
+        timings=task.get("timings") or {},
     )
 
-@app.get("/api/download/{task_id}")
-async def download_ppt(task_id: str):
-    # 首先从内存中查找
-    if task_id in tasks_storage:
-        task = tasks_storage[task_id]
-    else:
-        # 如果内存中没有，从Redis中查找
-        task = redis_client.get(f"task:{task_id}")
-        if not task:
-            raise HTTPException(status_code=404, detail="任务不存在")
+@app.api_route("/api/download/{task_id}", methods=["GET", "HEAD"])
+async def download_ppt(task_id: str, request: Request, format: Optional[str] = None,
+                       user_id: Optional[str] = Depends(download_user_id)):
+    task = _get_task_for(task_id, user_id)
     if task["status"] != TaskStatus.COMPLETED:
         raise HTTPException(status_code=400, detail="文件尚未生成完成")
-    file_path = task.get("file_path")
-    if not file_path or not os.path.exists(file_path):
+    janitor.touch(task_id)
+    file_key = task.get("file_key")
+    if format:
+        # 按格式下载同一任务的附加产物
+        artifact = task.get("artifacts", {}).get(format)
+        if not artifact:
+            raise HTTPException(status_code=404, detail=f"任务没有 {format} 格式的产物")
+        if isinstance(artifact, list):
+            # 逐页图片打包为 ZIP 流
+            pages = ((key.rsplit("/", 1)[-1], artifact_store.iter_chunks(key)) for key in artifact)
+            return StreamingResponse(
+                iter_zip(pages),
+                media_type="application/zip",
+                headers={"Content-Disposition": f'attachment; filename="{task_id[:8]}_{format}.zip"'},
+            )
+        file_key = artifact
+    if not file_key:
         raise HTTPException(status_code=404, detail="文件不存在")
-    filename = os.path.basename(file_path)
-    return FileResponse(
-        path=file_path,
-        filename=filename,
-        media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation"
-    )
+    return await _artifact_download(request, file_key)
+
+
+async def _artifact_download(request: Request, key: str, disposition: str = "attachment") -> Response:
+    """
+    产物下载：对象存储后端重定向到预签名 URL，由存储直接传输 (disposition 为 inline 时浏览器内显示)；
+    否则从本地工作区发送，带强 ETag 与长缓存，支持 304 与 Range 续传
+    """
+    url = artifact_store.presigned_url(key, disposition=disposition)
+    if url:
+        return RedirectResponse(url, status_code=307)
+    try:
+        path = await run_in_threadpool(artifact_store.fetch, key)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    return await artifact_response(request, path)
 
 @app.get("/api/convert/ppt-to-pdf/{task_id}")
-async def convert_ppt_to_pdf(task_id: str):
+async def convert_ppt_to_pdf(task_id: str, user_id: Optional[str] = Depends(optional_user_id)):
     """将生成的PPT转换为PDF用于在线预览"""
     try:
-        # 首先从内存中查找
-        if task_id in tasks_storage:
-            task = tasks_storage[task_id]
-        else:
-            # 如果内存中没有，从Redis中查找
-            task = redis_client.get(f"task:{task_id}")
-            if not task:
-                raise HTTPException(status_code=404, detail="任务不存在")
+        task = _get_task_for(task_id, user_id)
         
         if task["status"] != TaskStatus.COMPLETED:
             raise HTTPException(status_code=400, detail="PPT尚未生成完成")
         
-        ppt_path = task.get("file_path")
-        if not ppt_path or not os.path.exists(ppt_path):
+        ppt_key = task.get("file_key")
+        if not ppt_key:
             raise HTTPException(status_code=404, detail="PPT文件不存在")
         
-        # 生成PDF路径
-        pdf_path = os.path.splitext(ppt_path)[0] + ".pdf"
+        # 生成PDF key
+        pdf_key = os.path.splitext(ppt_key)[0] + ".pdf"
         
-        # 检查PDF是否已经存在
-        if os.path.exists(pdf_path):
-            # 如果存在，直接返回
-            task_id = str(uuid.uuid4())
-            tasks_storage[task_id] = {
-                "status": TaskStatus.COMPLETED,
-                "progress": 100,
-                "message": "PDF预览已生成",
-                "file_path": pdf_path,
-                "download_url": f"/api/download/{task_id}"
-            }
-            redis_client.set(f"task:{task_id}", tasks_storage[task_id])
-            return {
-                "task_id": task_id,
-                "status": TaskStatus.COMPLETED,
-                "progress": 100,
-                "message": "PDF预览已生成",
-                "download_url": f"/api/download/{task_id}"
-            }
-        
-        # 调用LibreOffice转换
-        success = convert_with_libreoffice(ppt_path, pdf_path)
+        # 检查PDF是否已经存在 (生成时 also_export 导出的或之前转换过的)，不存在则调用LibreOffice转换
+        success = "pdf" in task.get("artifacts", {}) or await run_in_threadpool(artifact_store.exists, pdf_key)
+        message = "PDF预览已生成"
+        if not success:
+            try:
+                success = await conversion_scheduler.run(
+                    _task_owner(task), _convert_artifact_to_pdf, ppt_key, pdf_key, priority=Priority.INTERACTIVE
+                )
+            except FileNotFoundError:
+                raise HTTPException(status_code=404, detail="PPT文件不存在")
+            message = "PDF预览生成完成"
         
         if success:
-            task_id = str(uuid.uuid4())
-            tasks_storage[task_id] = {
-                "status": TaskStatus.COMPLETED,
-                "progress": 100,
-                "message": "PDF预览生成完成",
-                "file_path": pdf_path,
-                "download_url": f"/api/download/{task_id}"
-            }
-            redis_client.set(f"task:{task_id}", tasks_storage[task_id])
+            # PDF 作为同一任务的产物登记，不再为每次预览请求创建新任务
+            task.setdefault("artifacts", {"pptx": ppt_key})["pdf"] = pdf_key
+            tasks_storage[task_id] = task
+            redis_client.set(f"task:{task_id}", task)
             return {
                 "task_id": task_id,
                 "status": TaskStatus.COMPLETED,
                 "progress": 100,
-                "message": "PDF预览生成完成",
-                "download_url": f"/api/download/{task_id}"
+                "message": message,
+                "download_url": _signed(task_id, task, f"/api/download/{task_id}?format=pdf")
             }
         else:
             raise HTTPException(status_code=500, detail="转换PDF失败")
@@ -485,42 +649,244 @@ async def convert_ppt_to_pdf(task_id: str):
         logger.error(f"PPT转PDF失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"转换PDF失败: {str(e)}")
 
+def _convert_artifact_to_pdf(ppt_key: str, pdf_key: str) -> bool:
+    """取得 PPTX 的本地副本，用 LibreOffice 转换为 PDF 并发布 (同步阻塞，应在转换线程池中调用)"""
+    ppt_path = artifact_store.fetch(ppt_key)
+    if not convert_with_libreoffice(ppt_path, artifact_store.local_path(pdf_key)):
+        return False
+    artifact_store.publish(pdf_key)
+    return True
+
+
+# 正在运行的预览流水线，防止同一任务重复启动
+preview_jobs: Dict[str, asyncio.Task] = {}
+
+
+async def _start_preview(task_id: str, task: Dict) -> Dict:
+    """按需启动预览流水线 (幂等)，返回任务上的预览状态"""
+    preview = task.get("preview")
+    # 状态为处理中但本进程没有对应流水线 (如服务重启或由其他节点发起)，需要重新启动
+    if preview and (preview["status"] == TaskStatus.COMPLETED or task_id in preview_jobs):
+        return preview
+
+    try:
+        ppt_path = await run_in_threadpool(artifact_store.fetch, task["file_key"])
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="PPT文件不存在")
+    # 再次检查：等待下载期间可能已有其他请求启动了流水线
+    if task_id in preview_jobs:
+        return task["preview"]
+    preview = {
+        "status": TaskStatus.PROCESSING,
+        "slide_count": count_slides(ppt_path),
+        "pdf_key": None,
+    }
+    task["preview"] = preview
+    tasks_storage[task_id] = task
+    redis_client.set(f"task:{task_id}", task)
+    preview_jobs[task_id] = asyncio.create_task(process_preview(task_id, ppt_path))
+    return preview
+
+
+async def process_preview(task_id: str, ppt_path: str):
+    """预览流水线：首页缩略图优先，随后生成完整 PDF 并栅格化剩余页面"""
+    task = tasks_storage[task_id]
+    preview = task["preview"]
+    owner = _task_owner(task)
+    try:
+        if task.get("render_source"):
+            # 非模板模式：按大纲直接绘制，无需 LibreOffice
+            pdf_path = await conversion_scheduler.run(
+                owner, render_outline_slides, task_id, task["render_source"], priority=Priority.INTERACTIVE
+            )
+            await conversion_scheduler.run(owner, publish_preview, task_id, priority=Priority.INTERACTIVE)
+            preview["pdf_key"] = artifact_store.key_for(pdf_path)
+            preview["status"] = TaskStatus.COMPLETED
+            return
+
+        first_ready = await conversion_scheduler.run(
+            owner, render_first_slide, task_id, ppt_path, priority=Priority.INTERACTIVE
+        )
+        if not first_ready:
+            logger.warning(f"首页缩略图生成失败，等待完整 PDF: task={task_id}")
+
+        pdf_key = os.path.splitext(task["file_key"])[0] + ".pdf"
+        if not await run_in_threadpool(artifact_store.exists, pdf_key):
+            success = await conversion_scheduler.run(
+                owner, _convert_artifact_to_pdf, task["file_key"], pdf_key, priority=Priority.INTERACTIVE
+            )
+            if not success:
+                raise Exception("转换PDF失败")
+        pdf_path = await run_in_threadpool(artifact_store.fetch, pdf_key)
+        preview["pdf_key"] = pdf_key
+        redis_client.set(f"task:{task_id}", task)
+
+        await conversion_scheduler.run(
+            owner, render_pdf_pages, task_id, pdf_path, first_ready, priority=Priority.INTERACTIVE
+        )
+        await conversion_scheduler.run(owner, publish_preview, task_id, priority=Priority.INTERACTIVE)
+        preview["status"] = TaskStatus.COMPLETED
+    except Exception as e:
+        logger.error(f"预览生成失败: task={task_id}, {str(e)}", exc_info=True)
+        preview["status"] = TaskStatus.FAILED
+    finally:
+        redis_client.set(f"task:{task_id}", task)
+        preview_jobs.pop(task_id, None)
+
+
+def _get_previewable_task(task_id: str, user_id: Optional[str]) -> Dict:
+    task = _get_task_for(task_id, user_id)
+    if task["status"] != TaskStatus.COMPLETED:
+        raise HTTPException(status_code=400, detail="PPT尚未生成完成")
+    ppt_key = task.get("file_key")
+    if not ppt_key or not ppt_key.endswith(".pptx"):
+        raise HTTPException(status_code=404, detail="PPT文件不存在")
+    janitor.touch(task_id)
+    return task
+
+
+@app.get("/api/preview/{task_id}", response_model=PreviewResponse)
+async def get_preview(task_id: str, user_id: Optional[str] = Depends(optional_user_id)):
+    """获取预览状态；首次调用时启动预览流水线"""
+    task = _get_previewable_task(task_id, user_id)
+    preview = await _start_preview(task_id, task)
+    if preview["status"] == TaskStatus.COMPLETED:
+        # 已完成的预览都已发布到产物存储，其他节点的本地工作区中不一定有缩略图
+        ready = list(range(1, preview["slide_count"] + 1))
+    else:
+        ready = ready_slides(task_id, preview["slide_count"])
+    return PreviewResponse(
+        task_id=task_id,
+        status=preview["status"],
+        slide_count=preview["slide_count"],
+        ready_slides=ready,
+        slide_url_template=_signed(task_id, task, f"/api/preview/{task_id}/slides/{{n}}"),
+        pdf_url=_signed(task_id, task, f"/api/preview/{task_id}/pdf") if preview.get("pdf_key") else None,
+    )
+
+
+@app.api_route("/api/preview/{task_id}/slides/{n}", methods=["GET", "HEAD"])
+async def get_preview_slide(task_id: str, n: int, request: Request,
+                            user_id: Optional[str] = Depends(download_user_id)):
+    """
+    获取第 n 页缩略图 (从 1 开始)
+
+    缩略图尚未生成时返回 202 与 Retry-After，前端可先展示首页再按需懒加载其余页面
+    """
+    task = _get_previewable_task(task_id, user_id)
+    preview = await _start_preview(task_id, task)
+    if n < 1 or n > preview["slide_count"]:
+        raise HTTPException(status_code=404, detail="页码超出范围")
+    path = slide_image_path(task_id, n)
+    if os.path.exists(path):
+        return await artifact_response(request, path)
+    if preview["status"] == TaskStatus.COMPLETED:
+        return await _artifact_download(request, artifact_store.key_for(path), disposition="inline")
+    if preview["status"] == TaskStatus.FAILED:
+        raise HTTPException(status_code=500, detail="预览生成失败")
+    return Response(status_code=202, headers={"Retry-After": "1"})
+
+
+@app.api_route("/api/preview/{task_id}/pdf", methods=["GET", "HEAD"])
+async def get_preview_pdf(task_id: str, request: Request, user_id: Optional[str] = Depends(download_user_id)):
+    """获取预览流水线生成的完整 PDF，支持 Range 以便 PDF.js 增量加载"""
+    task = _get_previewable_task(task_id, user_id)
+    preview = await _start_preview(task_id, task)
+    pdf_key = preview.get("pdf_key")
+    if pdf_key:
+        return await _artifact_download(request, pdf_key, disposition="inline")
+    if preview["status"] == TaskStatus.FAILED:
+        raise HTTPException(status_code=500, detail="转换PDF失败")
+    return Response(status_code=202, headers={"Retry-After": "1"})
+
+
 @app.post("/api/convert", response_model=TaskResponse)
-async def convert_file(file: UploadFile = File(...), target_format: str = "pdf"):
+async def convert_file(file: UploadFile = File(...), target_format: str = "pdf", profile: bool = False,
+                       user_id: Optional[str] = Depends(optional_user_id), owner: str = Depends(request_owner)):
     ext = os.path.splitext(file.filename)[1].lower()
     task_id = str(uuid.uuid4())
+    temp_dir = os.path.join(settings.output_dir, "temp")
+    input_filename = f"{task_id}_in{ext}"
+    input_path = os.path.join(temp_dir, input_filename)
+    # 先落盘再建任务，超限或类型不符的文件不会产生任务
+    try:
+        saved = await save_upload(file, input_path)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    output_ext = f".{target_format}" if not target_format.startswith(".") else target_format
+    output_key = f"{task_id}_out{output_ext}"
+
+    # 相同内容、相同目标格式的转换结果直接复用
+    cache_key = f"convert_cache:{saved.sha256}:{output_ext}"
+    cached = redis_client.get(cache_key)
+    if cached and cached.get("file_key") and await run_in_threadpool(artifact_store.exists, cached["file_key"]):
+        os.remove(input_path)
+        task_data = {
+            "status": TaskStatus.COMPLETED,
+            "progress": 100,
+            "message": "转换完成",
+            "created_at": datetime.now().isoformat(),
+            "input_sha256": saved.sha256,
+            "user_id": user_id,
+            "file_key": cached["file_key"],
+            "download_url": f"/api/download/{task_id}",
+        }
+        tasks_storage[task_id] = task_data
+        redis_client.set(f"task:{task_id}", task_data)
+        logger.info(f"命中转换缓存: {file.filename} -> {cached['file_key']}")
+        return TaskResponse(
+            task_id=task_id,
+            status=TaskStatus.COMPLETED,
+            progress=100,
+            message="转换完成",
+            download_url=_signed(task_id, task_data, task_data["download_url"])
+        )
+
+    # 命中缓存不占用配额
+    try:
+        _consume_quota(conversion_quota, owner)
+    except HTTPException:
+        os.remove(input_path)
+        raise
     task_data = {
         "status": TaskStatus.PENDING,
         "progress": 0,
         "message": "转换任务已启动",
         "created_at": datetime.now().isoformat(),
+        "input_sha256": saved.sha256,
+        "input_path": input_path,
+        "user_id": user_id,
+        "owner": owner,
+        "priority": Priority.NORMAL.name.lower(),
     }
     # 存储到内存
     tasks_storage[task_id] = task_data
     # 存储到Redis
     redis_client.set(f"task:{task_id}", task_data)
-    temp_dir = os.path.join(settings.output_dir, "temp")
-    os.makedirs(temp_dir, exist_ok=True)
-    input_filename = f"{task_id}_in{ext}"
-    input_path = os.path.join(temp_dir, input_filename)
-    with open(input_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
-    output_ext = f".{target_format}" if not target_format.startswith(".") else target_format
-    output_filename = f"{task_id}_out{output_ext}"
-    output_path = os.path.join(settings.output_dir, output_filename)
-    asyncio.create_task(process_conversion(task_id, input_path, output_path, ext, output_ext))
+    asyncio.create_task(_run_traced(
+        "convert.task", task_id, process_conversion(task_id, input_path, output_key, ext, output_ext),
+        profile=profile,
+    ))
     return TaskResponse(task_id=task_id, status=TaskStatus.PENDING, progress=0, message="文件转换中...")
 
-# --- 修改后的转换任务处理函数 ---
-# --- 修改后的 process_conversion 函数 ---
-# --- 更新后的 process_conversion ---
-async def process_conversion(task_id: str, input_path: str, output_path: str, in_ext: str, out_ext: str):
+# 目标格式 -> 进度提示中的名称
+_FORMAT_LABELS = {'.pdf': 'PDF', '.docx': 'Word', '.doc': 'Word', '.pptx': 'PPT', '.ppt': 'PPT'}
+
+
+def _convert_and_publish(input_path: str, output_key: str, in_ext: str, out_ext: str) -> bool:
+    """转换到本地工作区并发布到产物存储 (同步阻塞，应在转换线程池中调用)"""
+    if not run_conversion(input_path, artifact_store.local_path(output_key), in_ext, out_ext):
+        return False
+    artifact_store.publish(output_key)
+    return True
+
+
+async def process_conversion(task_id: str, input_path: str, output_key: str, in_ext: str, out_ext: str):
     """处理文件转换后台任务"""
     try:
         # 更新任务状态的函数
         def update_task_status(status, progress, message, **kwargs):
-            tasks_storage[task_id]["status"] = status
+            tasks_storage.set_status(task_id, status)
             tasks_storage[task_id]["progress"] = progress
             tasks_storage[task_id]["message"] = message
             for key, value in kwargs.items():
@@ -530,56 +896,35 @@ async def process_conversion(task_id: str, input_path: str, output_path: str, in
 
         update_task_status(TaskStatus.PROCESSING, 20, "正在处理文件...")
 
-        success = False
-
-        # 1. PPT/Word -> PDF (使用 LibreOffice)
-        if out_ext == '.pdf' and in_ext in ['.ppt', '.pptx', '.doc', '.docx']:
-            update_task_status(TaskStatus.PROCESSING, 40, "正在转换为PDF...")
-            success = convert_with_libreoffice(input_path, output_path)
-
-        # 2. PDF -> Word (使用 pdf2docx)
-        elif in_ext == '.pdf' and out_ext in ['.docx', '.doc']:
-            update_task_status(TaskStatus.PROCESSING, 40, "正在转换为Word...")
-            real_output = output_path
-            if output_path.endswith('.doc'):
-                real_output = output_path + 'x'
-            success = convert_pdf_to_docx_file(input_path, real_output)
-            if success and real_output != output_path:
-                shutil.move(real_output, output_path)
+        if not is_supported_conversion(in_ext, out_ext):
+            raise ValueError(f"不支持的转换类型: {in_ext} to {out_ext}")
 
-        # 3. PDF -> PPT (使用 pdf2image + python-pptx) <--- 只有这里变了
-        elif in_ext == '.pdf' and out_ext in ['.pptx', '.ppt']:
-            update_task_status(TaskStatus.PROCESSING, 40, "正在转换为PPT...")
-            # 处理 .ppt 后缀兼容
-            real_output = output_path
-            if output_path.endswith('.ppt'):
-                real_output = output_path + 'x'
-
-            success = convert_pdf_to_pptx_file(input_path, real_output)
-
-            if success and real_output != output_path:
-                shutil.move(real_output, output_path)
-
-        else:
-            logger.error(f"不支持的转换类型: {in_ext} -> {out_ext}")
-            raise HTTPException(status_code=400, detail=f"不支持的转换类型: {in_ext} to {out_ext}")
+        update_task_status(TaskStatus.PROCESSING, 40, f"正在转换为{_FORMAT_LABELS.get(out_ext, out_ext)}...")
+        # 经调度器在共享转换线程池中执行，避免阻塞事件循环
+        success = await conversion_scheduler.run(
+            _task_owner(tasks_storage[task_id]), _convert_and_publish, input_path, output_key, in_ext, out_ext,
+            priority=Priority.NORMAL
+        )
 
         if success:
             update_task_status(
                 TaskStatus.COMPLETED, 
                 100, 
                 "转换完成",
-                file_path=output_path,
+                file_key=output_key,
                 download_url=f"/api/download/{task_id}"
             )
+            input_sha256 = tasks_storage[task_id].get("input_sha256")
+            if input_sha256:
+                redis_client.set(f"convert_cache:{input_sha256}:{out_ext}", {"file_key": output_key})
         else:
             raise Exception("转换未能生成目标文件")
 
     except Exception as e:
         error_data = {
-            "status": TaskStatus.FAILED,
             "message": f"转换失败: {str(e)}"
         }
+        tasks_storage.set_status(task_id, TaskStatus.FAILED)
         tasks_storage[task_id].update(error_data)
         redis_client.set(f"task:{task_id}", tasks_storage[task_id])
         logger.error(f"转换任务 {task_id} 失败: {str(e)}", exc_info=True)
@@ -591,29 +936,244 @@ async def process_conversion(task_id: str, input_path: str, output_path: str, in
             except:
                 pass
 
-def convert_pdf_to_docx_file(input_path: str, output_path: str) -> bool:
+
+def _get_task(task_id: str) -> Optional[Dict]:
+    """先查内存再查 Redis 获取任务数据"""
+    if task_id in tasks_storage:
+        return tasks_storage[task_id]
+    return redis_client.get(f"task:{task_id}")
+
+
+def _get_task_for(task_id: str, user_id: Optional[str]) -> Dict:
+    """获取调用者可访问的任务：登录用户创建的任务只对本人可见，不存在或无权访问时均返回 404"""
+    task = _get_task(task_id)
+    if not task or (task.get("user_id") and task["user_id"] != user_id):
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return task
+
+
+def _extract_zip_upload(zip_path: str, dest_dir: str) -> List[Tuple[str, str]]:
     """
-    使用 pdf2docx 库将 PDF 转换为 Word
+    解压批量上传的 ZIP 包，返回 (原始文件名, 解压路径) 列表
+
+    只取文件名部分防止路径穿越，并按解压后总大小限制防止压缩炸弹
     """
+    extracted = []
+    with zipfile.ZipFile(zip_path) as zf:
+        members = [
+            m for m in zf.infolist()
+            if not m.is_dir() and not m.filename.startswith("__MACOSX/")
+            and not os.path.basename(m.filename).startswith(".")
+        ]
+        if len(members) > settings.max_batch_files:
+            raise UploadRejected(f"文件数量超过上限 {settings.max_batch_files}")
+        if sum(m.file_size for m in members) > settings.max_upload_size:
+            raise UploadRejected(f"解压后大小超过上限 {settings.max_upload_size // (1024 * 1024)}MB", status_code=413)
+        for i, member in enumerate(members):
+            name = os.path.basename(member.filename)
+            path = os.path.join(dest_dir, f"zip_{i:04d}_{name}")
+            with zf.open(member) as src, open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst, settings.upload_chunk_size)
+            extracted.append((name, path))
+    return extracted
+
+
+def _batch_response(task_id: str, task: Dict) -> BatchTaskResponse:
+    items = task.get("items", [])
+    return BatchTaskResponse(
+        task_id=task_id,
+        status=task["status"],
+        progress=task["progress"],
+        message=task.get("message"),
+        download_url=_signed(task_id, task, task.get("download_url")),
+        trace_id=task.get("trace_id"),
+        timings=task.get("timings") or {},
+        total=len(items),
+        completed=sum(1 for item in items if item["status"] == TaskStatus.COMPLETED),
+        failed=sum(1 for item in items if item["status"] == TaskStatus.FAILED),
+        items=[BatchItemStatus(**{k: item[k] for k in BatchItemStatus.model_fields if k in item}) for item in items],
+    )
+
+
+@app.post("/api/convert/batch", response_model=BatchTaskResponse)
+async def convert_batch(files: List[UploadFile] = File(...), target_format: str = "pdf",
+                        user_id: Optional[str] = Depends(optional_user_id), owner: str = Depends(request_owner)):
+    """
+    批量转换：接收多个文件或单个 ZIP 包，所有子项共用转换线程池，
+    由一个父任务汇总进度，结果可通过 /api/batch/{task_id}/download 边转换边打包下载
+    """
+    if len(files) > settings.max_batch_files:
+        raise HTTPException(status_code=400, detail=f"文件数量超过上限 {settings.max_batch_files}")
+    task_id = str(uuid.uuid4())
+    output_ext = f".{target_format}" if not target_format.startswith(".") else target_format
+    work_dir = os.path.join(settings.output_dir, "temp", task_id)
+    os.makedirs(work_dir, exist_ok=True)
+
+    inputs = []
+    try:
+        for i, file in enumerate(files):
+            name = os.path.basename(file.filename or f"file_{i}")
+            saved = await save_upload(file, os.path.join(work_dir, f"upload_{i:04d}_{name}"))
+            if name.lower().endswith(".zip"):
+                inputs.extend(await run_in_threadpool(_extract_zip_upload, saved.path, work_dir))
+                os.remove(saved.path)
+            else:
+                inputs.append((name, saved.path))
+    except (UploadRejected, zipfile.BadZipFile) as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if isinstance(e, UploadRejected):
+            raise HTTPException(status_code=e.status_code, detail=e.message)
+        raise HTTPException(status_code=400, detail="无效的 ZIP 文件")
+
+    if not inputs:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise HTTPException(status_code=400, detail="没有可转换的文件")
+    if len(inputs) > settings.max_batch_files:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise HTTPException(status_code=400, detail=f"文件数量超过上限 {settings.max_batch_files}")
     try:
-        logger.info(f"开始 PDF 转 Word: {input_path}")
+        _consume_quota(conversion_quota, owner, len(inputs))
+    except HTTPException:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
 
-        # 使用 pdf2docx 进行转换
-        cv = Converter(input_path)
-        # start=0, end=None 表示转换所有页面
-        cv.convert(output_path, start=0, end=None)
-        cv.close()
+    items = []
+    used_names = set()
+    for i, (original, input_path) in enumerate(inputs):
+        in_ext = os.path.splitext(original)[1].lower()
+        arcname = f"{os.path.splitext(original)[0]}{output_ext}"
+        if arcname in used_names:
+            arcname = f"{i:04d}_{arcname}"
+        used_names.add(arcname)
+        items.append({
+            "index": i,
+            "name": original,
+            "arcname": arcname,
+            "status": TaskStatus.PENDING,
+            "progress": 0,
+            "message": "等待转换",
+            "input_path": input_path,
+            "in_ext": in_ext,
+            "file_key": f"{task_id}_{i:04d}_out{output_ext}",
+        })
 
-        if os.path.exists(output_path):
-            logger.info(f"PDF 转 Word 成功: {output_path}")
-            return True
-        else:
-            logger.error("文件未生成")
-            return False
+    task_data = {
+        "kind": "batch_convert",
+        "status": TaskStatus.PENDING,
+        "progress": 0,
+        "message": f"批量转换任务已启动，共 {len(items)} 个文件",
+        "created_at": datetime.now().isoformat(),
+        "user_id": user_id,
+        "owner": owner,
+        "priority": Priority.BATCH.name.lower(),
+        "items": items,
+        "download_url": f"/api/batch/{task_id}/download",
+    }
+    tasks_storage[task_id] = task_data
+    redis_client.set(f"task:{task_id}", task_data)
+    asyncio.create_task(_run_traced("convert.batch", task_id, process_batch_conversion(task_id, output_ext, work_dir)))
+    return _batch_response(task_id, task_data)
+
+
+async def process_batch_conversion(task_id: str, out_ext: str, work_dir: str):
+    """批量转换后台任务：子项以批量优先级提交到转换调度器，父任务汇总进度"""
+    task = tasks_storage[task_id]
+    items = task["items"]
+    owner = _task_owner(task)
+
+    def refresh_parent():
+        done = sum(1 for item in items if item["status"] in (TaskStatus.COMPLETED, TaskStatus.FAILED))
+        task["progress"] = int(done * 100 / len(items))
+        task["message"] = f"已处理 {done}/{len(items)} 个文件"
+        redis_client.set(f"task:{task_id}", task)
+
+    async def convert_item(item: Dict):
+        try:
+            if not is_supported_conversion(item["in_ext"], out_ext):
+                raise ValueError(f"不支持的转换类型: {item['in_ext']} to {out_ext}")
+            item["status"] = TaskStatus.PROCESSING
+            item["progress"] = 40
+            item["message"] = "正在转换..."
+            redis_client.set(f"task:{task_id}", task)
+            success = await conversion_scheduler.run(
+                owner, _convert_and_publish, item["input_path"], item["file_key"], item["in_ext"], out_ext,
+                priority=Priority.BATCH
+            )
+            if not success:
+                raise Exception("转换未能生成目标文件")
+            item.update(status=TaskStatus.COMPLETED, progress=100, message="转换完成")
+        except Exception as e:
+            logger.error(f"批量转换 {task_id} 子项 {item['name']} 失败: {str(e)}")
+            item.update(status=TaskStatus.FAILED, progress=100, message=f"转换失败: {str(e)}")
+        finally:
+            refresh_parent()
 
-    except Exception as e:
-        logger.error(f"PDF 转 Word 失败: {str(e)}", exc_info=True)
-        return False
+    try:
+        tasks_storage.set_status(task_id, TaskStatus.PROCESSING)
+        refresh_parent()
+        await asyncio.gather(*(convert_item(item) for item in items))
+        succeeded = sum(1 for item in items if item["status"] == TaskStatus.COMPLETED)
+        tasks_storage.set_status(task_id, TaskStatus.COMPLETED if succeeded else TaskStatus.FAILED)
+        task["progress"] = 100
+        task["message"] = f"批量转换完成: 成功 {succeeded}/{len(items)}"
+        redis_client.set(f"task:{task_id}", task)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+@app.get("/api/batch/{task_id}", response_model=BatchTaskResponse)
+async def get_batch_status(task_id: str, user_id: Optional[str] = Depends(optional_user_id)):
+    """获取批量任务的汇总进度及各子项状态"""
+    task = _get_task_for(task_id, user_id)
+    if "items" not in task:
+        raise HTTPException(status_code=404, detail="批量任务不存在")
+    return _batch_response(task_id, task)
+
+
+@app.get("/api/batch/{task_id}/download")
+async def download_batch(task_id: str, user_id: Optional[str] = Depends(download_user_id)):
+    """
+    以 ZIP 流的形式下载批量任务结果
+
+    打包按子项顺序进行：若某子项仍在处理中则等待其结束，
+    因此任务未全部完成时也可以开始下载，已完成的文件会先传输。
+    失败或产物缺失的子项不会被静默略过，而是列在压缩包末尾的 errors.txt 中
+    """
+    task = _get_task_for(task_id, user_id)
+    if "items" not in task:
+        raise HTTPException(status_code=404, detail="批量任务不存在")
+    janitor.touch(task_id)
+
+    async def finished_entries():
+        errors = []
+        for index in range(len(task["items"])):
+            # 批量子项在 BATCH 优先级排队，可能长时间等待；调度器保证其最终执行，
+            # 因此只要任务仍然存在就继续等待，任务数据丢失 (过期或被清理) 时中止下载
+            while True:
+                current = tasks_storage.get(task_id) or await run_in_threadpool(redis_client.get, f"task:{task_id}")
+                if not current:
+                    logger.error(f"批量任务在下载过程中丢失: {task_id}，已打包 {index}/{len(task['items'])} 项")
+                    raise RuntimeError(f"批量任务 {task_id} 已不存在")
+                item = current["items"][index]
+                if item["status"] in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+                    break
+                # 在事件循环上等待，不占用线程池中的线程
+                await asyncio.sleep(0.5)
+            if item["status"] != TaskStatus.COMPLETED:
+                errors.append(f"{item['name']}: {item.get('message') or '失败'}")
+            elif not await run_in_threadpool(artifact_store.exists, item["file_key"]):
+                errors.append(f"{item['name']}: 结果文件不存在")
+            else:
+                yield item["arcname"], artifact_store.iter_chunks(item["file_key"], settings.upload_chunk_size)
+        if errors:
+            yield "errors.txt", [("\n".join(errors) + "\n").encode("utf-8")]
+
+    # 文件内容块由 aiter_zip 在线程池中读取
+    return StreamingResponse(
+        aiter_zip(finished_entries()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="batch_{task_id[:8]}.zip"'},
+    )
 
 # 认证相关的API端点
 @app.post("/api/auth/register")
@@ -621,12 +1181,15 @@ async def register(user_data: UserCreate):
     """用户注册"""
     try:
         # 检查用户是否已存在
-        existing_user = AuthService.get_user_by_email(user_data.email)
+        existing_user = await run_in_threadpool(AuthService.get_user_by_email, user_data.email)
         if existing_user:
             raise HTTPException(status_code=400, detail="该邮箱已被注册")
         
-        # 创建新用户
-        user = AuthService.create_user(user_data.name, user_data.email, user_data.password)
+        # 创建新用户 (并发注册同一邮箱时由存储层的唯一索引兜底)
+        try:
+            user = await AuthService.create_user(user_data.name, user_data.email, user_data.password)
+        except EmailAlreadyRegistered:
+            raise HTTPException(status_code=400, detail="该邮箱已被注册")
         
         # 生成访问令牌
         access_token = AuthService.create_access_token(data={"sub": user["id"]})
@@ -652,15 +1215,11 @@ async def register(user_data: UserCreate):
 async def login(login_data: UserLogin):
     """用户登录"""
     try:
-        # 查找用户
-        user = AuthService.get_user_by_email(login_data.email)
+        # 查找用户并验证密码 (bcrypt 在密码哈希线程池中执行)
+        user = await AuthService.authenticate(login_data.email, login_data.password)
         if not user:
             raise HTTPException(status_code=401, detail="邮箱或密码错误")
         
-        # 验证密码
-        if not AuthService.verify_password(login_data.password, user["password"]):
-            raise HTTPException(status_code=401, detail="邮箱或密码错误")
-        
         # 生成访问令牌
         access_token = AuthService.create_access_token(data={"sub": user["id"]})
         
@@ -682,88 +1241,72 @@ async def login(login_data: UserLogin):
         raise HTTPException(status_code=500, detail="登录失败")
 
 @app.get("/api/auth/me")
-async def get_current_user(request):
+async def get_current_user(user: dict = Depends(require_user)):
     """获取当前用户信息"""
-    try:
-        # 从请求头获取令牌
-        auth_header = request.headers.get("Authorization")
-        
-        if not auth_header:
-            raise HTTPException(status_code=401, detail="未提供认证令牌")
-        
-        token = auth_header.replace("Bearer ", "")
-        payload = AuthService.decode_token(token)
-        
-        if not payload:
-            raise HTTPException(status_code=401, detail="无效的认证令牌")
-        
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="无效的认证令牌")
-        
-        # 从auth模块导入users_db
-        from app.services.auth import users_db
-        
-        # 查找用户
-        user = users_db.get(user_id)
-        if not user:
-            raise HTTPException(status_code=401, detail="用户不存在")
-        
-        return User(
-            id=user["id"],
-            name=user["name"],
-            email=user["email"],
-            is_active=user["is_active"],
-            created_at=user["created_at"]
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"获取用户信息失败: {str(e)}")
-        raise HTTPException(status_code=500, detail="获取用户信息失败")
+    return User(
+        id=user["id"],
+        name=user["name"],
+        email=user["email"],
+        is_active=user["is_active"],
+        created_at=user["created_at"]
+    )
 
 @app.get("/api/history")
-async def get_history(request):
-    """获取用户历史记录"""
+async def get_history(
+    user_id: str = Depends(require_user_id),
+    limit: int = Query(settings.history_page_size, ge=1, le=settings.history_max_page_size),
+    cursor: Optional[str] = None,
+):
+    """获取用户历史记录，按创建时间倒序；翻页时传入上一页返回的 next_cursor"""
     try:
-        # 从请求头获取令牌
-        auth_header = request.headers.get("Authorization")
-        
-        if not auth_header:
-            raise HTTPException(status_code=401, detail="未提供认证令牌")
-        
-        token = auth_header.replace("Bearer ", "")
-        payload = AuthService.decode_token(token)
-        
-        if not payload:
-            raise HTTPException(status_code=401, detail="无效的认证令牌")
-        
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="无效的认证令牌")
-        
         # 获取用户历史记录
-        history = AuthService.get_user_history(user_id)
+        items, next_cursor, total = await run_in_threadpool(AuthService.get_user_history, user_id, limit, cursor)
         
         return HistoryResponse(
-            items=[
-                HistoryItem(
-                    id=item["id"],
-                    user_id=item["user_id"],
-                    title=item["title"],
-                    task_id=item["task_id"],
-                    file_path=item.get("file_path"),
-                    created_at=item["created_at"]
-                ) for item in history
-            ],
-            total=len(history)
+            items=[HistoryItem(**item) for item in items],
+            total=total,
+            next_cursor=next_cursor
         )
-    except HTTPException:
-        raise
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="无效的分页游标")
     except Exception as e:
         logger.error(f"获取历史记录失败: {str(e)}")
         raise HTTPException(status_code=500, detail="获取历史记录失败")
 
+@app.get("/api/admin/profiles")
+async def list_profiles(admin: dict = Depends(require_admin)):
+    """列出内存中带有剖析结果的任务 (管理员)"""
+    return {
+        "items": [
+            {"task_id": task_id, "created_at": task.get("created_at"), "status": task["status"],
+             "timings": task.get("timings") or {}}
+            for task_id, task in tasks_storage.items() if task.get("profile")
+        ]
+    }
+
+
+@app.get("/api/admin/profiles/{task_id}")
+async def download_profile(task_id: str, request: Request, format: str = "txt",
+                           admin: dict = Depends(require_admin)):
+    """下载任务的剖析结果 (管理员)：format=txt 为文本报告，format=prof 为 pstats 文件"""
+    task = _get_task(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    key = (task.get("profile") or {}).get(format)
+    if not key:
+        raise HTTPException(status_code=404, detail="任务没有剖析结果")
+    return await _artifact_download(request, key)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def export_metrics():
+    """Prometheus 指标"""
+    rendered = metrics.render()
+    if rendered is None:
+        raise HTTPException(status_code=503, detail="指标未启用")
+    body, content_type = rendered
+    return Response(content=body, headers={"Content-Type": content_type})
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
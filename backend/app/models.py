@@ -3,7 +3,7 @@
 定义请求和响应的 Pydantic 模型
 """
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from enum import Enum
 
 
@@ -48,6 +48,7 @@ class SlideLayout(str, Enum):
     DATA_STACKED = "stacked_chart" # 堆积图
     TIMELINE = "timeline"         # 时间轴/里程碑
     BIG_NUMBER = "big_number"     # 数字大屏
+    TABLE = "table"               # 数据表格
     THANK_YOU = "thanks"     # 致谢页
 
 
@@ -74,11 +75,26 @@ class GenerateOutlineRequest(BaseModel):
     slide_count: Optional[int] = Field(default=None, ge=5, le=30, description="期望的幻灯片数量")
 
 
+class ExportFormat(str, Enum):
+    """生成时可附带导出的格式"""
+    PDF = "pdf"
+    PNG = "png"
+
+
 class GeneratePPTRequest(BaseModel):
     """生成 PPT 请求模型"""
     outline: OutlineResponse = Field(..., description="确认后的大纲")
     theme: ThemeStyle = Field(default=ThemeStyle.BUSINESS, description="选择的主题风格")
     template_id: Optional[str] = Field(None, description="自定义模板 ID")
+    also_export: List[ExportFormat] = Field(default_factory=list, description="生成后在同一任务中导出的格式")
+    profile: bool = Field(default=False, description="剖析本次生成 (需服务端开启 profiling_request_flag)")
+
+
+class BatchGeneratePPTRequest(BaseModel):
+    """批量生成 PPT 请求模型 (所有大纲共用主题与模板)"""
+    outlines: List[OutlineResponse] = Field(..., min_length=1, description="大纲列表")
+    theme: ThemeStyle = Field(default=ThemeStyle.BUSINESS, description="选择的主题风格")
+    template_id: Optional[str] = Field(None, description="自定义模板 ID")
 
 
 class TaskStatus(str, Enum):
@@ -89,6 +105,12 @@ class TaskStatus(str, Enum):
     FAILED = "failed"
 
 
+class SpanTiming(BaseModel):
+    """任务内某一环节的耗时"""
+    count: int = Field(..., description="执行次数")
+    total_ms: float = Field(..., description="累计耗时 (毫秒)")
+
+
 class TaskResponse(BaseModel):
     """任务响应模型"""
     task_id: str = Field(..., description="任务 ID")
@@ -96,6 +118,38 @@ class TaskResponse(BaseModel):
     progress: int = Field(default=0, description="任务进度 0-100")
     message: Optional[str] = Field(None, description="状态消息")
     download_url: Optional[str] = Field(None, description="下载链接")
+    artifacts: Dict[str, str] = Field(default_factory=dict, description="任务产物: 格式 -> 下载链接")
+    trace_id: Optional[str] = Field(None, description="任务的 OpenTelemetry trace id")
+    timings: Dict[str, SpanTiming] = Field(
+        default_factory=dict, description="耗时分解: span 名称 -> 次数与累计耗时，嵌套的环节各自计时"
+    )
+
+
+class BatchItemStatus(BaseModel):
+    """批量任务子项状态"""
+    index: int = Field(..., description="子项序号")
+    name: str = Field(..., description="子项名称")
+    status: TaskStatus = Field(..., description="子项状态")
+    progress: int = Field(default=0, description="子项进度 0-100")
+    message: Optional[str] = Field(None, description="子项状态消息")
+
+
+class BatchTaskResponse(TaskResponse):
+    """批量任务响应模型"""
+    total: int = Field(..., description="子项总数")
+    completed: int = Field(default=0, description="已完成子项数")
+    failed: int = Field(default=0, description="失败子项数")
+    items: List[BatchItemStatus] = Field(default_factory=list, description="子项状态列表")
+
+
+class PreviewResponse(BaseModel):
+    """幻灯片预览状态响应模型"""
+    task_id: str = Field(..., description="任务 ID")
+    status: TaskStatus = Field(..., description="预览生成状态")
+    slide_count: int = Field(..., description="幻灯片总数")
+    ready_slides: List[int] = Field(default_factory=list, description="已生成缩略图的页码 (从 1 开始)")
+    slide_url_template: str = Field(..., description="缩略图地址模板，{n} 替换为页码")
+    pdf_url: Optional[str] = Field(None, description="完整 PDF 地址，生成完成后提供")
 
 
 class ErrorResponse(BaseModel):
@@ -146,7 +200,7 @@ class HistoryItem(BaseModel):
     title: str = Field(..., description="PPT标题")
     task_id: str = Field(..., description="任务ID")
     created_at: str = Field(..., description="创建时间")
-    file_path: Optional[str] = Field(None, description="文件路径")
+    file_key: Optional[str] = Field(None, description="产物存储键")
 
     class Config:
         from_attributes = True
@@ -156,3 +210,4 @@ class HistoryResponse(BaseModel):
     """历史记录响应模型"""
     items: List[HistoryItem] = Field(..., description="历史记录列表")
     total: int = Field(..., description="总记录数")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有更多记录")
@@ -5,6 +5,8 @@ AI 模型适配器基类
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 
+from .tracing import set_attributes
+
 
 class BaseAIAdapter(ABC):
     """AI 模型适配器抽象基类"""
@@ -34,6 +36,21 @@ class BaseAIAdapter(ABC):
             Exception: API 调用失败时抛出异常
         """
         pass
+
+    def _record_usage(self, model: str, input_tokens: Optional[int], output_tokens: Optional[int]) -> None:
+        """
+        将本次调用的模型与 token 用量记录到当前 span (大纲生成的 span)
+        
+        Args:
+            model: 实际调用的模型名
+            input_tokens: 输入 token 数，接口未返回时为 None
+            output_tokens: 输出 token 数，接口未返回时为 None
+        """
+        set_attributes({
+            "gen_ai.response.model": model,
+            "gen_ai.usage.input_tokens": input_tokens,
+            "gen_ai.usage.output_tokens": output_tokens,
+        })
     
     @abstractmethod
     def validate_api_key(self) -> bool:
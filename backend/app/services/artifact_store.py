@@ -0,0 +1,285 @@
+"""
+产物存储
+任务产物以相对 output_dir 的 key 标识 (如 ppt_xxx.pptx、previews/{task_id}/slide_001.webp)。
+本地后端直接读写 output_dir；S3 兼容后端 (AWS S3 / MinIO 等) 将产物上传到对象存储，
+output_dir 仅作为本地工作区与读取缓存，任意 API 节点都可以按 key 提供下载
+"""
+import os
+import uuid
+import shutil
+import logging
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator, Optional
+from urllib.parse import quote
+
+from ..config import settings
+from .file_response import guess_media_type
+
+logger = logging.getLogger("ai-ppt.artifact_store")
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+
+
+class ArtifactStore(ABC):
+    """
+    产物存储接口
+
+    产物先在本地工作区 local_path(key) 生成，再通过 publish 发布到存储；
+    读取时用 fetch 取得本地可读路径，或用 iter_chunks 流式读取
+    """
+
+    chunk_size = 1024 * 1024
+    # 本地工作区是否只是远端存储的缓存 (可随时删除而不丢失产物)
+    local_is_cache = False
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def local_path(self, key: str) -> str:
+        """key 对应的本地工作区路径"""
+        path = os.path.abspath(os.path.join(self.root, *key.split("/")))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise ValueError(f"非法的产物 key: {key}")
+        return path
+
+    def key_for(self, path: str) -> str:
+        """本地工作区路径 -> key"""
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        if rel == os.curdir or rel.startswith(os.pardir):
+            raise ValueError(f"路径不在产物目录中: {path}")
+        return rel.replace(os.sep, "/")
+
+    def publish(self, key: str) -> str:
+        """将工作区中已生成的文件发布到存储，返回 key"""
+        self.put_file(key, self.local_path(key))
+        return key
+
+    @abstractmethod
+    def put_file(self, key: str, path: str) -> None:
+        """上传本地文件"""
+
+    @abstractmethod
+    def put_stream(self, key: str, stream: BinaryIO) -> None:
+        """从可读流上传，不要求先落盘"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """产物是否存在"""
+
+    @abstractmethod
+    def iter_chunks(self, key: str, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        """流式读取产物内容，不存在时抛出 FileNotFoundError"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """删除产物 (不存在时忽略)"""
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> None:
+        """删除以 prefix/ 开头的全部产物，如某任务的预览目录"""
+
+    @abstractmethod
+    def fetch(self, key: str) -> str:
+        """确保产物在本地工作区可读并返回路径，不存在时抛出 FileNotFoundError"""
+
+    def presigned_url(self, key: str, filename: Optional[str] = None,
+                      disposition: str = "attachment") -> Optional[str]:
+        """
+        可直接下载的预签名 URL，后端不支持时返回 None
+
+        disposition 为响应的 Content-Disposition 类型：attachment 触发下载，inline 供浏览器内预览
+        """
+        return None
+
+
+def _write_atomic(path: str, stream: BinaryIO, chunk_size: int) -> None:
+    """先写入临时文件再替换，读取方不会看到写了一半的文件"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.part"
+    try:
+        with open(tmp_path, "wb") as dst:
+            shutil.copyfileobj(stream, dst, chunk_size)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _is_not_found(error: "ClientError") -> bool:
+    return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+
+class LocalArtifactStore(ArtifactStore):
+    """本地磁盘后端：工作区即存储，发布为空操作"""
+
+    def put_file(self, key: str, path: str) -> None:
+        dest = self.local_path(key)
+        if os.path.abspath(path) == dest:
+            return
+        with open(path, "rb") as src:
+            _write_atomic(dest, src, self.chunk_size)
+
+    def put_stream(self, key: str, stream: BinaryIO) -> None:
+        _write_atomic(self.local_path(key), stream, self.chunk_size)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.local_path(key))
+
+    def iter_chunks(self, key: str, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        with open(self.fetch(key), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size or self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def delete(self, key: str) -> None:
+        path = self.local_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def delete_prefix(self, prefix: str) -> None:
+        shutil.rmtree(self.local_path(prefix.rstrip("/")), ignore_errors=True)
+
+    def fetch(self, key: str) -> str:
+        path = self.local_path(key)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(key)
+        return path
+
+
+class S3ArtifactStore(ArtifactStore):
+    """
+    S3 兼容对象存储后端
+
+    上传使用 boto3 的分块上传，读取按块流式返回；本地工作区中的副本作为读取缓存，
+    同一节点上的预览、格式转换无需重复下载
+    """
+
+    local_is_cache = True
+
+    def __init__(self, root: str, bucket: str, prefix: str = "", client=None):
+        super().__init__(root)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.client = client or boto3.client(
+            "s3",
+            endpoint_url=settings.s3_endpoint_url or None,
+            region_name=settings.s3_region or None,
+            aws_access_key_id=settings.s3_access_key or None,
+            aws_secret_access_key=settings.s3_secret_key or None,
+            # 自建的 S3 兼容服务 (MinIO 等) 通常不支持虚拟主机风格的桶域名
+            config=BotoConfig(
+                signature_version="s3v4",
+                s3={"addressing_style": "path" if settings.s3_endpoint_url else "auto"},
+            ),
+        )
+
+    def _object_key(self, key: str) -> str:
+        return self.prefix + key
+
+    def put_file(self, key: str, path: str) -> None:
+        self.client.upload_file(
+            path, self.bucket, self._object_key(key), ExtraArgs={"ContentType": guess_media_type(key)}
+        )
+        logger.info(f"产物已上传: {key}")
+
+    def put_stream(self, key: str, stream: BinaryIO) -> None:
+        self.client.upload_fileobj(
+            stream, self.bucket, self._object_key(key), ExtraArgs={"ContentType": guess_media_type(key)}
+        )
+        logger.info(f"产物已上传: {key}")
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if _is_not_found(e):
+                return False
+            raise
+
+    def iter_chunks(self, key: str, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        except ClientError as e:
+            if _is_not_found(e):
+                raise FileNotFoundError(key)
+            raise
+        body = obj["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size or self.chunk_size)
+        finally:
+            body.close()
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        path = self.local_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def delete_prefix(self, prefix: str) -> None:
+        object_prefix = self._object_key(prefix.rstrip("/") + "/")
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=object_prefix):
+            objects = [{"Key": obj["Key"]} for obj in page.get("Contents", [])]
+            if objects:
+                self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": objects, "Quiet": True})
+        shutil.rmtree(self.local_path(prefix.rstrip("/")), ignore_errors=True)
+
+    def fetch(self, key: str) -> str:
+        path = self.local_path(key)
+        if os.path.isfile(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.part"
+        try:
+            self.client.download_file(self.bucket, self._object_key(key), tmp_path)
+            os.replace(tmp_path, path)
+        except ClientError as e:
+            if _is_not_found(e):
+                raise FileNotFoundError(key)
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def presigned_url(self, key: str, filename: Optional[str] = None,
+                      disposition: str = "attachment") -> Optional[str]:
+        if not settings.s3_presigned_downloads:
+            return None
+        filename = filename or key.rsplit("/", 1)[-1]
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._object_key(key),
+                "ResponseContentType": guess_media_type(key),
+                "ResponseContentDisposition": f"{disposition}; filename*=utf-8''{quote(filename)}",
+            },
+            ExpiresIn=settings.s3_presign_expiry,
+        )
+
+
+def create_artifact_store() -> ArtifactStore:
+    """按 settings.artifact_backend 创建产物存储"""
+    backend = settings.artifact_backend.lower()
+    if backend == "local":
+        return LocalArtifactStore(settings.output_dir)
+    if backend == "s3":
+        if boto3 is None:
+            raise RuntimeError("使用 S3 产物存储需要安装 boto3")
+        if not settings.s3_bucket:
+            raise ValueError("使用 S3 产物存储需要配置 S3_BUCKET")
+        return S3ArtifactStore(settings.output_dir, settings.s3_bucket, settings.s3_prefix)
+    raise ValueError(f"未知的产物存储后端: {settings.artifact_backend}")
+
+
+# 全局产物存储实例
+artifact_store = create_artifact_store()
@@ -1,38 +1,87 @@
 """
 认证服务
-处理用户认证和JWT令牌生成
+处理用户认证和JWT令牌生成。
+bcrypt 运算在专用线程池 password_executor 中执行，单次耗时数百毫秒，不能阻塞事件循环；
+异步方法中的用户存储读写 (SQLite / Redis) 同样放入线程池执行
 """
 import jwt
 import bcrypt
 import uuid
+import asyncio
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
+from app.services.user_store import user_repository
+from app.services.history_store import history_repository
+from app.services.workers import password_executor
 import logging
 
 logger = logging.getLogger(__name__)
 
-# 用于存储用户数据的内存存储（生产环境应使用数据库）
-users_db: Dict[str, Dict[str, Any]] = {}
-
-# 用于存储历史记录的内存存储
-history_db: Dict[str, Dict[str, Any]] = {}
-
 
 class AuthService:
     """认证服务类"""
     
     @staticmethod
     def hash_password(password: str) -> str:
-        """哈希密码"""
-        salt = bcrypt.gensalt()
+        """哈希密码 (同步阻塞，异步代码中使用 run_password_task)"""
+        salt = bcrypt.gensalt(rounds=settings.bcrypt_rounds)
         return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
     
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """验证密码"""
+        """验证密码 (同步阻塞，异步代码中使用 run_password_task)"""
         return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
     
+    @staticmethod
+    def password_cost(hashed_password: str) -> int:
+        """bcrypt 哈希中记录的 cost，如 $2b$12$... 为 12"""
+        try:
+            return int(hashed_password.split("$")[2])
+        except (IndexError, ValueError):
+            return 0
+    
+    @staticmethod
+    def verify_and_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        验证密码；验证通过且哈希的 cost 与 settings.bcrypt_rounds 不一致时一并计算新哈希
+        
+        Returns:
+            (是否通过, 新哈希或 None)
+        """
+        if not AuthService.verify_password(plain_password, hashed_password):
+            return False, None
+        if AuthService.password_cost(hashed_password) != settings.bcrypt_rounds:
+            return True, AuthService.hash_password(plain_password)
+        return True, None
+    
+    @staticmethod
+    async def run_password_task(func, *args):
+        """在密码哈希线程池中执行 bcrypt 相关函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+    
+    @staticmethod
+    async def authenticate(email: str, password: str) -> Optional[Dict[str, Any]]:
+        """
+        校验邮箱与密码，成功时返回用户；
+        调整 bcrypt_rounds 后，用户登录时透明地按新 cost 更新密码哈希
+        """
+        user = await run_in_threadpool(user_repository.get_by_email, email)
+        if not user:
+            return None
+        valid, new_hash = await AuthService.run_password_task(
+            AuthService.verify_and_rehash, password, user["password"]
+        )
+        if not valid:
+            return None
+        if new_hash:
+            await run_in_threadpool(user_repository.update, user["id"], password=new_hash)
+            user["password"] = new_hash
+            logger.info(f"密码哈希已按 cost {settings.bcrypt_rounds} 更新: {user['id']}")
+        return user
+    
     @staticmethod
     def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """创建访问令牌"""
@@ -56,17 +105,19 @@ class AuthService:
     
     @staticmethod
     def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
-        """根据邮箱获取用户"""
-        for user in users_db.values():
-            if user['email'] == email:
-                return user
-        return None
+        """根据邮箱获取用户 (邮箱索引查找)"""
+        return user_repository.get_by_email(email)
     
     @staticmethod
-    def create_user(name: str, email: str, password: str) -> Dict[str, Any]:
-        """创建用户"""
+    def get_user(user_id: str) -> Optional[Dict[str, Any]]:
+        """根据 ID 获取用户"""
+        return user_repository.get(user_id)
+    
+    @staticmethod
+    async def create_user(name: str, email: str, password: str) -> Dict[str, Any]:
+        """创建用户，邮箱已被注册时抛出 EmailAlreadyRegistered"""
         user_id = str(uuid.uuid4())
-        hashed_password = AuthService.hash_password(password)
+        hashed_password = await AuthService.run_password_task(AuthService.hash_password, password)
         user = {
             "id": user_id,
             "name": name,
@@ -75,33 +126,25 @@ class AuthService:
             "is_active": True,
             "created_at": datetime.utcnow().isoformat()
         }
-        users_db[user_id] = user
+        await run_in_threadpool(user_repository.create, user)
         logger.info(f"创建用户: {email}")
         return user
     
     @staticmethod
-    def add_history_record(user_id: str, title: str, task_id: str, file_path: Optional[str] = None) -> Dict[str, Any]:
+    def add_history_record(user_id: str, title: str, task_id: str, file_key: Optional[str] = None) -> Dict[str, Any]:
         """添加历史记录"""
-        history_id = str(uuid.uuid4())
-        history = {
-            "id": history_id,
-            "user_id": user_id,
-            "title": title,
-            "task_id": task_id,
-            "file_path": file_path,
-            "created_at": datetime.utcnow().isoformat()
-        }
-        history_db[history_id] = history
+        history = history_repository.add(user_id, title, task_id, file_key)
         logger.info(f"添加历史记录: {title} 对于用户: {user_id}")
         return history
     
     @staticmethod
-    def get_user_history(user_id: str) -> list[Dict[str, Any]]:
-        """获取用户历史记录"""
-        history = []
-        for record in history_db.values():
-            if record['user_id'] == user_id:
-                history.append(record)
-        # 按创建时间倒序排序
-        history.sort(key=lambda x: x['created_at'], reverse=True)
-        return history
+    def get_user_history(user_id: str, limit: int,
+                         cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str], int]:
+        """
+        获取用户历史记录 (按创建时间倒序分页)
+        
+        Returns:
+            (本页记录, 下一页游标, 记录总数)，游标无效时抛出 InvalidCursor
+        """
+        items, next_cursor = history_repository.list(user_id, limit, cursor)
+        return items, next_cursor, history_repository.count(user_id)
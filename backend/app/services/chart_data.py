@@ -0,0 +1,159 @@
+"""
+图表数据准备
+将大纲中的 data_points 一次性规整为按列存储的 NumPy 数组，统一数值校验与类型转换；
+python-pptx 生成的图表 XML 与内嵌工作簿按数据内容缓存，相同数据的图表只生成一次
+"""
+import re
+import math
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pptx.chart.data import ChartData
+
+logger = logging.getLogger("ai-ppt.chart_data")
+
+# 没有数据点时使用的示例数据
+SAMPLE_CATEGORIES = ("示例 A", "示例 B", "示例 C")
+SAMPLE_SERIES = ("系列 1", (30.0, 50.0, 20.0))
+
+# 单系列数据的系列名
+DEFAULT_SERIES_NAME = "数值"
+
+_NUMBER_RE = re.compile(r"^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$")
+# 数值字符串中可忽略的字符：千分位、货币符号、百分号与空白
+_IGNORED_CHARS = str.maketrans("", "", ",，_ ¥￥$€£% ")
+
+_CACHE_SIZE = 256
+_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def coerce_number(value: Any) -> float:
+    """
+    将单个值转为浮点数
+
+    支持数值与数字字符串 (可带千分位、货币符号、百分号，如 "1,200"、"¥35"、"38%")；
+    缺失或无法识别的值返回 NaN
+    """
+    if value is None:
+        return math.nan
+    if isinstance(value, (int, float, np.number)):
+        number = float(value)
+    elif isinstance(value, str):
+        text = value.strip().translate(_IGNORED_CHARS)
+        if not _NUMBER_RE.match(text):
+            return math.nan
+        number = float(text)
+    else:
+        return math.nan
+    return number if math.isfinite(number) else math.nan
+
+
+def _to_array(raw: List[Any]) -> Tuple[np.ndarray, int]:
+    """
+    整列转换为 float64 数组
+
+    Returns:
+        (数组, 无法识别的值数量)；全部为数值时走 NumPy 向量化路径，否则逐个规整
+    """
+    try:
+        values = np.asarray(raw, dtype=np.float64)
+    except (TypeError, ValueError):
+        values = np.fromiter((coerce_number(v) for v in raw), dtype=np.float64, count=len(raw))
+    values[~np.isfinite(values)] = np.nan
+    return values, int(np.isnan(values).sum()) - raw.count(None)
+
+
+@dataclass(frozen=True)
+class SeriesTable:
+    """按列存储的图表数据：values[i, j] 为第 i 个系列在第 j 个分类上的取值，缺失为 NaN"""
+    categories: Tuple[str, ...]
+    names: Tuple[str, ...]
+    values: np.ndarray
+    invalid: int = 0  # 无法识别而置为缺失的值数量
+
+    @property
+    def fingerprint(self) -> str:
+        """数据内容指纹，用作图表 XML 缓存键"""
+        hasher = hashlib.sha1()
+        hasher.update("\x1f".join(self.categories).encode("utf-8"))
+        hasher.update(b"\x1e")
+        hasher.update("\x1f".join(self.names).encode("utf-8"))
+        hasher.update(b"\x1e")
+        hasher.update(np.ascontiguousarray(self.values).tobytes())
+        return hasher.hexdigest()
+
+    def series(self, fill: Optional[float] = 0.0) -> List[Tuple[str, List[Optional[float]]]]:
+        """[(系列名, 各分类取值)]，缺失值以 fill 代替"""
+        return [
+            (name, [fill if v != v else v for v in row.tolist()])
+            for name, row in zip(self.names, self.values)
+        ]
+
+
+def normalize_data_points(points: Optional[Sequence[dict]]) -> SeriesTable:
+    """
+    规整 data_points
+
+    两种格式：
+        单系列 [{"label": "A", "value": 30}, ...]
+        多系列 [{"label": "2023", "series": {"营收": 40, "利润": 10}}, ...]，系列名按名称排序
+    """
+    if not points:
+        return SeriesTable(SAMPLE_CATEGORIES, (SAMPLE_SERIES[0],), np.array([SAMPLE_SERIES[1]], dtype=np.float64))
+
+    categories = tuple(str(d.get("label", f"项{i}")) for i, d in enumerate(points))
+    if any("series" in d for d in points):
+        rows = [d.get("series") if isinstance(d.get("series"), dict) else {} for d in points]
+        names = tuple(sorted(set().union(*rows)))
+        columns: List[List[Any]] = [[row.get(name) for row in rows] for name in names]
+    else:
+        names = (DEFAULT_SERIES_NAME,)
+        columns = [[d.get("value") for d in points]]
+
+    if not names:
+        return SeriesTable(categories, (), np.empty((0, len(points)), dtype=np.float64))
+    arrays, invalid = zip(*(_to_array(column) for column in columns))
+    return SeriesTable(categories, names, np.vstack(arrays), sum(invalid))
+
+
+def _cached(key: tuple, build: Callable[[], bytes]) -> bytes:
+    with _cache_lock:
+        blob = _cache.get(key)
+        if blob is not None:
+            _cache.move_to_end(key)
+            return blob
+    blob = build()
+    with _cache_lock:
+        _cache[key] = blob
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return blob
+
+
+class CachedChartData(ChartData):
+    """
+    由 SeriesTable 构建的 ChartData
+
+    图表 XML 与内嵌 xlsx 工作簿按 (数据指纹, 图表类型) 缓存在进程内，
+    同一文稿或不同任务中数据相同的图表不再重复序列化
+    """
+
+    def __init__(self, table: SeriesTable):
+        super().__init__()
+        self.categories = table.categories
+        for name, values in table.series(fill=None):
+            self.add_series(name, values)
+        self._fingerprint = table.fingerprint
+
+    def xml_bytes(self, chart_type) -> bytes:
+        return _cached(("xml", self._fingerprint, chart_type), lambda: ChartData.xml_bytes(self, chart_type))
+
+    @property
+    def xlsx_blob(self) -> bytes:
+        return _cached(("xlsx", self._fingerprint), lambda: ChartData.xlsx_blob.fget(self))
@@ -0,0 +1,294 @@
+"""
+文件格式转换
+LibreOffice / pdf2docx / pdf2image 的同步转换函数，供转换工作线程池调用
+"""
+import io
+import os
+import sys
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from pdf2docx import Converter
+from pdf2image import convert_from_path
+from pptx import Presentation
+from pptx.util import Inches
+from ..config import settings
+from .pptx_writer import save_presentation
+from .metrics import track_conversion
+from .tracing import traced
+from .profiling import profiled
+
+logger = logging.getLogger("ai-ppt.conversion")
+
+_thread_state = threading.local()
+
+# 支持的输入扩展名 -> 可转换的目标扩展名
+SUPPORTED_CONVERSIONS = {
+    '.ppt': ['.pdf'],
+    '.pptx': ['.pdf'],
+    '.doc': ['.pdf'],
+    '.docx': ['.pdf'],
+    '.pdf': ['.docx', '.doc', '.pptx', '.ppt'],
+}
+
+
+def is_supported_conversion(in_ext: str, out_ext: str) -> bool:
+    """判断是否支持 in_ext -> out_ext 的转换"""
+    return out_ext in SUPPORTED_CONVERSIONS.get(in_ext, [])
+
+
+def _libreoffice_profile_url() -> str:
+    """
+    当前工作线程专用的 LibreOffice 用户配置目录
+
+    首次启动时 soffice 需要初始化用户配置 (数秒)，复用同一目录可省去这部分冷启动；
+    每个线程独立一份，避免并发转换时多个进程争用同一配置而失败
+    """
+    if not hasattr(_thread_state, "profile_url"):
+        base_dir = settings.libreoffice_profile_dir or os.path.join(tempfile.gettempdir(), "ai-ppt-libreoffice")
+        profile_dir = os.path.abspath(os.path.join(base_dir, threading.current_thread().name))
+        os.makedirs(profile_dir, exist_ok=True)
+        _thread_state.profile_url = Path(profile_dir).as_uri()
+    return _thread_state.profile_url
+
+
+@traced("convert.libreoffice")
+@track_conversion("libreoffice")
+@profiled("convert_with_libreoffice")
+def convert_with_libreoffice(input_path: str, output_path: str, target_format: str = "pdf") -> bool:
+    """
+    使用 LibreOffice 将 PPT/Word 转换为 PDF (无水印)
+    兼容 Windows, macOS, Linux
+
+    target_format 为 "png" 等图片格式时，LibreOffice 只导出第一页，可用于快速生成首页缩略图
+    """
+    try:
+        # 1. 获取绝对路径 (防止相对路径在子进程中出错)
+        input_abs_path = os.path.abspath(input_path)
+        output_dir_abs = os.path.abspath(os.path.dirname(output_path))
+
+        # 2. 确定 LibreOffice 的执行命令路径
+        soffice_cmd = "libreoffice" # Linux 默认
+
+        if sys.platform == "darwin": # macOS
+            # macOS 标准安装路径
+            mac_path = "/Applications/LibreOffice.app/Contents/MacOS/soffice"
+            if os.path.exists(mac_path):
+                soffice_cmd = mac_path
+            else:
+                # 尝试查找用户可能手动配置在 PATH 中的命令
+                if shutil.which("libreoffice"):
+                    soffice_cmd = "libreoffice"
+                elif shutil.which("soffice"):
+                    soffice_cmd = "soffice"
+                else:
+                    logger.error("未找到 LibreOffice。请确保已安装: brew install --cask libreoffice")
+                    return False
+
+        elif sys.platform == "win32": # Windows
+            possible_paths = [
+                r"C:\Program Files\LibreOffice\program\soffice.exe",
+                r"C:\Program Files (x86)\LibreOffice\program\soffice.exe"
+            ]
+            # 先检查默认路径
+            found = False
+            for p in possible_paths:
+                if os.path.exists(p):
+                    soffice_cmd = p
+                    found = True
+                    break
+            # 如果默认路径没有，尝试环境变量
+            if not found:
+                soffice_cmd = "soffice"
+
+        # 3. 构建命令
+        # 注意：使用绝对路径
+        cmd = [
+            soffice_cmd,
+            f"-env:UserInstallation={_libreoffice_profile_url()}",
+            "--headless",
+            "--convert-to", target_format,
+            "--outdir", output_dir_abs,
+            input_abs_path
+        ]
+
+        logger.info(f"执行转换命令: {cmd}")
+
+        # 4. 执行转换
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=300 # 增加超时时间，PPT转PDF可能较慢
+        )
+
+        if result.returncode != 0:
+            logger.error(f"LibreOffice 转换失败 (Code {result.returncode}): {result.stderr.decode()}")
+            return False
+
+        # 5. 处理文件名重命名
+        # LibreOffice 默认输出文件名是 [原文件名].[目标格式]
+        input_filename_no_ext = os.path.splitext(os.path.basename(input_path))[0]
+        # 注意：LibreOffice 可能会根据原文件自动去除 .pptx 后缀生成 .pdf
+        expected_output_name = f"{input_filename_no_ext}.{target_format}"
+        generated_file_path = os.path.join(output_dir_abs, expected_output_name)
+
+        if os.path.exists(generated_file_path):
+            # 只有当生成的文件名和目标文件名不一样时才重命名
+            # 注意：os.path.samefile 在文件不存在时会报错，所以直接比较路径字符串
+            if os.path.abspath(output_path) != generated_file_path:
+                # 如果目标文件已存在，先删除，防止 windows 下报错
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                shutil.move(generated_file_path, output_path)
+
+            logger.info(f"转换成功: {output_path}")
+            return True
+        else:
+            logger.error(f"未找到生成的 {target_format.upper()} 文件，预期路径: {generated_file_path}")
+            # 调试：列出目录下文件
+            logger.error(f"目录下现有文件: {os.listdir(output_dir_abs)}")
+            return False
+
+    except Exception as e:
+        logger.error(f"LibreOffice 转换异常: {str(e)}", exc_info=True)
+        return False
+
+
+@traced("convert.pdf2image")
+@track_conversion("pdf2image")
+@profiled("convert_pdf_to_pptx_file")
+def convert_pdf_to_pptx_file(input_path: str, output_path: str) -> bool:
+    """
+    将 PDF 转换为 PPTX (通过将每一页转为图片的方式)
+    """
+    try:
+        logger.info(f"开始 PDF 转 PPT: {input_path}")
+
+        # 1. 将 PDF 转为图片列表
+        # thread_count 指定线程数，提高速度
+        images = convert_from_path(input_path, thread_count=2)
+
+        if not images:
+            logger.error("未从 PDF 解析出任何页面")
+            return False
+
+        # 2. 创建一个新的 PPT 对象
+        prs = Presentation()
+
+        # 删除默认的第一张空白幻灯片(如果有)
+        if len(prs.slides) > 0:
+            # python-pptx 不直接支持删除 slide，但新建的默认通常是空的或者带一个标题页
+            # 我们不需要管它，直接设置 slide layout 即可，或者用空白模版
+            pass
+
+        # 获取第一张图片的尺寸，用于设置 PPT 幻灯片大小
+        # 图片是 PIL Image 对象
+        width, height = images[0].size
+
+        # 设置 PPT 的页面大小与 PDF 页面比例一致
+        # python-pptx 默认单位是 EMU (English Metric Unit)，我们需要转换
+        # 这里为了简单，我们根据图片像素比例设置幻灯片尺寸
+        # 默认 PPT 宽 10 英寸，高 7.5 英寸
+
+        # 简单的做法：固定 PPT 宽度为 10 英寸，高度按比例缩放
+        aspect_ratio = height / width
+        prs.slide_width = Inches(10)
+        prs.slide_height = Inches(10 * aspect_ratio)
+
+        # 3. 遍历图片，添加到幻灯片
+        blank_slide_layout = prs.slide_layouts[6] # 6 是空白布局
+
+        for i, img in enumerate(images):
+            # 添加一张新幻灯片
+            slide = prs.slides.add_slide(blank_slide_layout)
+
+            # 将 PIL image 转为字节流
+            image_stream = io.BytesIO()
+            img.save(image_stream, format='PNG')
+            image_stream.seek(0)
+
+            # 将图片铺满整个幻灯片
+            slide.shapes.add_picture(
+                image_stream,
+                left=0,
+                top=0,
+                width=prs.slide_width,
+                height=prs.slide_height
+            )
+            logger.info(f"处理第 {i+1} 页...")
+
+        # 4. 保存 PPT：页面位图已是 PNG，直接存储不再压缩
+        save_presentation(prs, output_path)
+        logger.info(f"PPT 生成成功: {output_path}")
+        return True
+
+    except Exception as e:
+        logger.error(f"PDF 转 PPT 失败: {str(e)}", exc_info=True)
+        return False
+
+
+@traced("convert.pdf2docx")
+@track_conversion("pdf2docx")
+@profiled("convert_pdf_to_docx_file")
+def convert_pdf_to_docx_file(input_path: str, output_path: str) -> bool:
+    """
+    使用 pdf2docx 库将 PDF 转换为 Word
+    """
+    try:
+        logger.info(f"开始 PDF 转 Word: {input_path}")
+
+        # 使用 pdf2docx 进行转换
+        cv = Converter(input_path)
+        # start=0, end=None 表示转换所有页面
+        cv.convert(output_path, start=0, end=None)
+        cv.close()
+
+        if os.path.exists(output_path):
+            logger.info(f"PDF 转 Word 成功: {output_path}")
+            return True
+        else:
+            logger.error("文件未生成")
+            return False
+
+    except Exception as e:
+        logger.error(f"PDF 转 Word 失败: {str(e)}", exc_info=True)
+        return False
+
+
+def run_conversion(input_path: str, output_path: str, in_ext: str, out_ext: str) -> bool:
+    """
+    按输入/输出扩展名分派到具体转换函数 (同步阻塞，应在工作线程中调用)
+
+    Raises:
+        ValueError: 不支持的转换类型
+    """
+    # 1. PPT/Word -> PDF (使用 LibreOffice)
+    if out_ext == '.pdf' and in_ext in ['.ppt', '.pptx', '.doc', '.docx']:
+        return convert_with_libreoffice(input_path, output_path)
+
+    # 2. PDF -> Word (使用 pdf2docx)
+    if in_ext == '.pdf' and out_ext in ['.docx', '.doc']:
+        real_output = output_path
+        if output_path.endswith('.doc'):
+            real_output = output_path + 'x'
+        success = convert_pdf_to_docx_file(input_path, real_output)
+        if success and real_output != output_path:
+            shutil.move(real_output, output_path)
+        return success
+
+    # 3. PDF -> PPT (使用 pdf2image + python-pptx)
+    if in_ext == '.pdf' and out_ext in ['.pptx', '.ppt']:
+        # 处理 .ppt 后缀兼容
+        real_output = output_path
+        if output_path.endswith('.ppt'):
+            real_output = output_path + 'x'
+        success = convert_pdf_to_pptx_file(input_path, real_output)
+        if success and real_output != output_path:
+            shutil.move(real_output, output_path)
+        return success
+
+    raise ValueError(f"不支持的转换类型: {in_ext} to {out_ext}")
@@ -0,0 +1,192 @@
+"""
+产物文件下载响应
+支持强 ETag / If-None-Match (304)、Range / If-Range (206) 以及 zero-copy 发送
+"""
+import os
+import hashlib
+import mimetypes
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from ..config import settings
+
+# 系统 mimetypes 表未必包含 Office 格式，这里显式登记
+MEDIA_TYPES = {
+    ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    ".ppt": "application/vnd.ms-powerpoint",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".doc": "application/msword",
+    ".pdf": "application/pdf",
+    ".zip": "application/zip",
+    ".png": "image/png",
+    ".webp": "image/webp",
+}
+
+# 可在浏览器内直接展示的类型，使用 inline 以便预览 iframe / PDF.js 加载
+_INLINE_TYPES = {"application/pdf", "image/png", "image/webp"}
+
+_ETAG_CACHE_SIZE = 1024
+_etag_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_etag_lock = threading.Lock()
+
+
+def guess_media_type(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    return MEDIA_TYPES.get(ext) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def content_etag(path: str, stat_result: os.stat_result) -> str:
+    """
+    基于文件内容 SHA-256 的强 ETag
+
+    结果按 (路径, mtime, size) 缓存，文件内容不变时只计算一次
+    """
+    key = (os.path.abspath(path), stat_result.st_mtime_ns, stat_result.st_size)
+    with _etag_lock:
+        etag = _etag_cache.get(key)
+        if etag:
+            _etag_cache.move_to_end(key)
+            return etag
+
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    etag = f'"{hasher.hexdigest()}"'
+
+    with _etag_lock:
+        _etag_cache[key] = etag
+        while len(_etag_cache) > _ETAG_CACHE_SIZE:
+            _etag_cache.popitem(last=False)
+    return etag
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 使用弱比较：忽略 W/ 前缀"""
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析单个字节区间，返回闭区间 (start, end)
+
+    多区间请求与语法无效的区间 (如 bytes=abc-、bytes=5-3) 按 RFC 9110 忽略（返回 None，响应完整内容）；
+    格式合法但不可满足时抛出 ValueError (响应 416)
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_s, sep, end_s = (part.strip() for part in spec.strip().partition("-"))
+    if not sep or not (start_s or end_s) or not all(part.isdigit() for part in (start_s, end_s) if part):
+        return None
+    if not start_s:
+        # 后缀区间: bytes=-500 表示最后 500 字节
+        length = int(end_s)
+        if length == 0 or size == 0:
+            raise ValueError("unsatisfiable suffix range")
+        return max(size - length, 0), size - 1
+    start = int(start_s)
+    end = int(end_s) if end_s else None
+    if end is not None and start > end:
+        return None
+    if start >= size:
+        raise ValueError("unsatisfiable range")
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+class ArtifactFileResponse(Response):
+    """
+    发送文件的 [start, end] 区间
+
+    ASGI 服务器支持 http.response.zerocopysend 扩展时直接交给内核 sendfile，
+    否则在线程中分块读取，不占用事件循环
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, path: str, start: int, end: int, status_code: int, headers: dict, media_type: str):
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.end = end
+        self.headers["content-length"] = str(max(end - start + 1, 0))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        remaining = self.end - self.start + 1
+        if scope.get("method") == "HEAD" or remaining <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.wrapped.fileno(),
+                    "offset": self.start,
+                    "count": remaining,
+                    "more_body": False,
+                })
+                return
+            await f.seek(self.start)
+            while remaining > 0:
+                chunk = await f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def artifact_response(request: Request, path: str, filename: Optional[str] = None) -> Response:
+    """
+    构建产物下载响应：处理条件请求与区间请求
+
+    Args:
+        request: 当前请求，用于读取 If-None-Match / Range / If-Range
+        path: 本地文件路径
+        filename: 下载文件名，默认取路径中的文件名
+    """
+    stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    etag = await anyio.to_thread.run_sync(content_etag, path, stat_result)
+    size = stat_result.st_size
+    media_type = guess_media_type(path)
+    filename = filename or os.path.basename(path)
+    disposition = "inline" if media_type in _INLINE_TYPES else "attachment"
+
+    headers = {
+        "etag": etag,
+        "cache-control": settings.artifact_cache_control,
+        "accept-ranges": "bytes",
+        "content-disposition": f"{disposition}; filename*=utf-8''{quote(filename)}",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={k: v for k, v in headers.items() if k != "content-disposition"})
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range 与当前 ETag 不一致说明客户端缓存的是旧内容，应返回完整文件
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        if byte_range:
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            return ArtifactFileResponse(path, start, end, 206, headers, media_type)
+
+    return ArtifactFileResponse(path, 0, size - 1, 200, headers, media_type)
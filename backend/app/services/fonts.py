@@ -0,0 +1,80 @@
+"""
+字体查找与加载
+按主题字体名在系统字体目录中查找字体文件，找不到时回退到常见中文字体
+"""
+import os
+import sys
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional
+from PIL import ImageFont
+from ..config import settings
+
+logger = logging.getLogger("ai-ppt.fonts")
+
+# 主题字体名 -> 候选字体文件名 (常规, 粗体)
+FONT_FILES: Dict[str, Dict[str, List[str]]] = {
+    "微软雅黑": {
+        "regular": ["msyh.ttc", "msyh.ttf", "Microsoft YaHei.ttf"],
+        "bold": ["msyhbd.ttc", "msyhbd.ttf", "Microsoft YaHei Bold.ttf"],
+    },
+}
+
+# 主题字体缺失时的回退顺序：优先覆盖中文的字体
+FALLBACK_FILES: Dict[str, List[str]] = {
+    "regular": [
+        "PingFang.ttc", "NotoSansCJK-Regular.ttc", "NotoSansCJKsc-Regular.otf", "NotoSansSC-Regular.otf",
+        "SourceHanSansSC-Regular.otf", "wqy-microhei.ttc", "wqy-zenhei.ttc", "DejaVuSans.ttf",
+    ],
+    "bold": [
+        "PingFang.ttc", "NotoSansCJK-Bold.ttc", "NotoSansCJKsc-Bold.otf", "NotoSansSC-Bold.otf",
+        "SourceHanSansSC-Bold.otf", "wqy-microhei.ttc", "wqy-zenhei.ttc", "DejaVuSans-Bold.ttf",
+    ],
+}
+
+
+def _font_dirs() -> List[str]:
+    if sys.platform == "win32":
+        windir = os.environ.get("WINDIR", r"C:\Windows")
+        return [os.path.join(windir, "Fonts"), os.path.expandvars(r"%LOCALAPPDATA%\Microsoft\Windows\Fonts")]
+    if sys.platform == "darwin":
+        return ["/System/Library/Fonts", "/Library/Fonts", os.path.expanduser("~/Library/Fonts")]
+    return ["/usr/share/fonts", "/usr/local/share/fonts", os.path.expanduser("~/.fonts"),
+            os.path.expanduser("~/.local/share/fonts")]
+
+
+@lru_cache(maxsize=1)
+def _font_index() -> Dict[str, str]:
+    """扫描一次字体目录，建立 小写文件名 -> 路径 索引"""
+    index: Dict[str, str] = {}
+    dirs = ([settings.font_dir] if settings.font_dir else []) + _font_dirs()
+    for font_dir in dirs:
+        if not os.path.isdir(font_dir):
+            continue
+        for root, _, files in os.walk(font_dir):
+            for name in files:
+                index.setdefault(name.lower(), os.path.join(root, name))
+    return index
+
+
+@lru_cache(maxsize=32)
+def find_font_file(font_name: str, bold: bool = False) -> Optional[str]:
+    """查找主题字体文件，找不到时按回退列表查找，均不存在返回 None"""
+    weight = "bold" if bold else "regular"
+    index = _font_index()
+    candidates = FONT_FILES.get(font_name, {}).get(weight, []) + FALLBACK_FILES[weight]
+    for filename in candidates:
+        path = index.get(filename.lower())
+        if path:
+            return path
+    logger.warning(f"未找到字体文件: {font_name} ({weight})，将使用 Pillow 内置字体")
+    return None
+
+
+@lru_cache(maxsize=256)
+def load_font(font_name: str, size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
+    """按像素字号加载字体，结果缓存"""
+    path = find_font_file(font_name, bold)
+    if path:
+        return ImageFont.truetype(path, size=max(size, 1))
+    return ImageFont.load_default(size=max(size, 1))
@@ -38,7 +38,7 @@ class GeminiAdapter(BaseAIAdapter):
   "slides": [
     {{
       "title": "幻灯片标题",
-      "layout": "title | bullets | column | process | column_chart | bar_chart | line_chart | pie_chart | area_chart | stacked_chart | timeline | big_number | thanks",
+      "layout": "title | bullets | column | process | column_chart | bar_chart | line_chart | pie_chart | area_chart | stacked_chart | timeline | big_number | table | thanks",
       "icon": "一个精准的 Emoji",
       "bullet_points": ["包含深刻洞察的详细描述要点1...", "包含具体数据支撑的详细描述要点2..."],
       "data_points": [
@@ -58,6 +58,7 @@ class GeminiAdapter(BaseAIAdapter):
 5. 【复杂对比】-> 使用 "stacked_chart"，并在 bullet_points 中解读多维数据的关联。
 6. 【战略路线】-> 使用 "timeline"，在 bullet_points 中详细描述每个阶段的任务和里程碑。
 7. 【流程逻辑】-> 使用 "process"，在 bullet_points 中解释步骤间的衔接逻辑。
+8. 【明细数据】-> 使用 "table"，data_points 每项为表格的一行，键为列名（如 {{"地区": "华东", "营收": 1200}}），行数较多时会自动分页。
 
 只返回合法 JSON，严禁任何注释或多余逗号。内容越丰富、专业度越高，评分越高。"""
             
@@ -72,6 +73,10 @@ class GeminiAdapter(BaseAIAdapter):
                 }
             )
             
+            # usage_metadata 在较新版本的 SDK 中才提供
+            usage = getattr(response, "usage_metadata", None)
+            self._record_usage(self.model.model_name, getattr(usage, "prompt_token_count", None),
+                               getattr(usage, "candidates_token_count", None))
             content = response.text
             
             # 尝试提取 JSON
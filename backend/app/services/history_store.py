@@ -0,0 +1,263 @@
+"""
+历史记录存储
+按用户建立时间有序索引，分页查询只读取当前页的记录，不再扫描全部用户的历史再排序。
+分页使用游标 (上一页最后一条的 时间戳 + ID)，新记录写入不会导致翻页时重复或遗漏
+"""
+import os
+import json
+import time
+import uuid
+import base64
+import bisect
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import settings
+from .redis_client import redis_client
+
+logger = logging.getLogger("ai-ppt.history_store")
+
+# 历史记录字段
+HISTORY_FIELDS = ("id", "user_id", "title", "task_id", "file_key", "created_at")
+
+# 排序键：(创建时间戳毫秒, 记录 ID)，ID 用于区分同一毫秒内的记录
+SortKey = Tuple[int, str]
+
+_id_lock = threading.Lock()
+_last_id: Tuple[int, int] = (0, 0)  # 最近生成的 (时间戳毫秒, 序号)
+
+
+class InvalidCursor(ValueError):
+    """分页游标无法解析"""
+
+
+def encode_cursor(key: SortKey) -> str:
+    """排序键 -> 不透明的分页游标"""
+    return base64.urlsafe_b64encode(f"{key[0]}:{key[1]}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """分页游标 -> 排序键，格式错误或被改动 (重新编码后与原游标不一致) 时抛出 InvalidCursor"""
+    try:
+        raw = base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode()
+        ts, record_id = raw.split(":", 1)
+        key = int(ts), record_id
+    except Exception:
+        raise InvalidCursor(cursor)
+    # b64decode 会忽略多余的填充，int 接受正负号与空白：只接受 encode_cursor 生成的规范形式
+    if not record_id or encode_cursor(key) != cursor:
+        raise InvalidCursor(cursor)
+    return key
+
+
+def _next_sort_key() -> SortKey:
+    """
+    生成新记录的排序键，记录 ID 以 时间戳 + 序号 开头 (类似单调 ULID)：
+    同一毫秒内或时钟回拨时序号递增，本进程写入的记录按 ID 排序即为写入顺序；
+    末尾的随机部分保证多个进程同时写入时 ID 不冲突
+    """
+    global _last_id
+    now_ms = int(time.time() * 1000)
+    with _id_lock:
+        last_ms, seq = _last_id
+        _last_id = (now_ms, 0) if now_ms > last_ms else (last_ms, seq + 1)
+        ts, seq = _last_id
+    return ts, f"{ts:012x}{seq:06x}{uuid.uuid4().hex[:14]}"
+
+
+def _sort_key(record: Dict[str, Any]) -> SortKey:
+    return record["created_ts"], record["id"]
+
+
+def _public(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: record.get(field) for field in HISTORY_FIELDS}
+
+
+class HistoryRepository(ABC):
+    """历史记录存储接口，记录以字典表示，字段见 HISTORY_FIELDS"""
+
+    def add(self, user_id: str, title: str, task_id: str, file_key: Optional[str] = None) -> Dict[str, Any]:
+        """添加一条记录并返回"""
+        ts, record_id = _next_sort_key()
+        record = {
+            "id": record_id,
+            "user_id": user_id,
+            "title": title,
+            "task_id": task_id,
+            "file_key": file_key,
+            "created_at": datetime.utcfromtimestamp(ts / 1000).isoformat(),
+            "created_ts": ts,
+        }
+        self._insert(record)
+        return _public(record)
+
+    def list(self, user_id: str, limit: int,
+             cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        按创建时间倒序分页查询
+
+        Args:
+            user_id: 用户 ID
+            limit: 每页条数
+            cursor: 上一页返回的游标，为空时从最新的记录开始
+
+        Returns:
+            (本页记录, 下一页游标)，没有更多记录时游标为 None
+        """
+        before = decode_cursor(cursor) if cursor else None
+        records = self._page(user_id, limit + 1, before)
+        next_cursor = encode_cursor(_sort_key(records[limit - 1])) if len(records) > limit else None
+        return [_public(r) for r in records[:limit]], next_cursor
+
+    @abstractmethod
+    def count(self, user_id: str) -> int:
+        """用户的记录总数"""
+
+    @abstractmethod
+    def _insert(self, record: Dict[str, Any]) -> None:
+        """写入记录 (含 created_ts)"""
+
+    @abstractmethod
+    def _page(self, user_id: str, limit: int, before: Optional[SortKey]) -> List[Dict[str, Any]]:
+        """排序键小于 before 的最多 limit 条记录，按排序键倒序"""
+
+
+class MemoryHistoryRepository(HistoryRepository):
+    """进程内存后端：每个用户一个按排序键升序的列表"""
+
+    def __init__(self):
+        self._keys: Dict[str, List[SortKey]] = {}
+        self._records: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def count(self, user_id: str) -> int:
+        return len(self._keys.get(user_id, ()))
+
+    def _insert(self, record: Dict[str, Any]) -> None:
+        key = _sort_key(record)
+        with self._lock:
+            keys = self._keys.setdefault(record["user_id"], [])
+            index = bisect.bisect(keys, key)
+            keys.insert(index, key)
+            self._records.setdefault(record["user_id"], []).insert(index, dict(record))
+
+    def _page(self, user_id: str, limit: int, before: Optional[SortKey]) -> List[Dict[str, Any]]:
+        with self._lock:
+            keys = self._keys.get(user_id, [])
+            records = self._records.get(user_id, [])
+            end = bisect.bisect_left(keys, before) if before else len(keys)
+            return [dict(r) for r in reversed(records[max(end - limit, 0):end])]
+
+
+class RedisHistoryRepository(HistoryRepository):
+    """
+    Redis 后端
+
+    history:user:{用户 ID} 为有序集合 (成员为记录 ID，分值为创建时间戳毫秒)，
+    记录 JSON 存于哈希 history:records:{用户 ID}。分页按分值倒序读取一段成员后批量 HMGET
+    """
+
+    def _client(self):
+        client = redis_client.client
+        if client is None:
+            raise RuntimeError("Redis 不可用，无法访问历史记录")
+        return client
+
+    def count(self, user_id: str) -> int:
+        return self._client().zcard(f"history:user:{user_id}")
+
+    def _insert(self, record: Dict[str, Any]) -> None:
+        user_id = record["user_id"]
+        pipe = self._client().pipeline(transaction=True)
+        pipe.hset(f"history:records:{user_id}", record["id"], json.dumps(record, ensure_ascii=False))
+        pipe.zadd(f"history:user:{user_id}", {record["id"]: record["created_ts"]})
+        pipe.execute()
+
+    def _page(self, user_id: str, limit: int, before: Optional[SortKey]) -> List[Dict[str, Any]]:
+        client = self._client()
+        index_key = f"history:user:{user_id}"
+        if before is None:
+            members = client.zrevrange(index_key, 0, limit - 1, withscores=True)
+        else:
+            # 同分值成员按 ID 倒序排列；多取与游标同分值的成员数，过滤掉不小于游标的部分
+            ties = client.zcount(index_key, before[0], before[0])
+            members = client.zrevrangebyscore(index_key, before[0], "-inf", start=0, num=limit + ties,
+                                              withscores=True)
+            members = [(m, s) for m, s in members if (int(s), m) < before][:limit]
+        if not members:
+            return []
+        data = client.hmget(f"history:records:{user_id}", [m for m, _ in members])
+        return [json.loads(item) for item in data if item]
+
+
+class SqliteHistoryRepository(HistoryRepository):
+    """
+    SQLite 后端
+
+    (user_id, created_ts, id) 上建联合索引，分页条件与排序都由索引满足，按游标翻页不需要 OFFSET
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                " id TEXT PRIMARY KEY,"
+                " user_id TEXT NOT NULL,"
+                " title TEXT NOT NULL,"
+                " task_id TEXT NOT NULL,"
+                " file_key TEXT,"
+                " created_at TEXT NOT NULL,"
+                " created_ts INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_history_user_time ON history (user_id, created_ts, id)"
+            )
+
+    def count(self, user_id: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    def _insert(self, record: Dict[str, Any]) -> None:
+        columns = HISTORY_FIELDS + ("created_ts",)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO history ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                tuple(record[column] for column in columns),
+            )
+
+    def _page(self, user_id: str, limit: int, before: Optional[SortKey]) -> List[Dict[str, Any]]:
+        sql = "SELECT * FROM history WHERE user_id = ?"
+        params: tuple = (user_id,)
+        if before is not None:
+            sql += " AND (created_ts, id) < (?, ?)"
+            params += before
+        sql += " ORDER BY created_ts DESC, id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, params + (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+
+def create_history_repository() -> HistoryRepository:
+    """按 settings.history_store_backend 创建历史记录存储"""
+    backend = settings.history_store_backend.lower()
+    if backend == "memory":
+        return MemoryHistoryRepository()
+    if backend == "redis":
+        return RedisHistoryRepository()
+    if backend == "sqlite":
+        return SqliteHistoryRepository(settings.sqlite_path)
+    raise ValueError(f"未知的历史记录存储后端: {settings.history_store_backend}")
+
+
+# 全局历史记录存储实例
+history_repository = create_history_repository()
@@ -0,0 +1,329 @@
+"""
+产物生命周期管理
+后台定期清理：任务过期后删除其产物，回收 output/temp 中遗留的临时文件，
+本地工作区超出磁盘配额时按最近最少使用淘汰，回收量作为监控指标对外暴露
+"""
+import os
+import copy
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..config import settings
+from ..models import TaskStatus
+from .artifact_store import ArtifactStore, artifact_store
+from .metrics import RECLAIMED_BYTES, inc
+from .redis_client import redis_client
+
+logger = logging.getLogger("ai-ppt.janitor")
+
+# 超出配额时清理到配额的该比例，留出余量避免每轮都触发淘汰
+QUOTA_LOW_WATERMARK = 0.9
+
+# 未登记到任务上的文件至少存在这么久 (秒) 才参与配额淘汰
+MIN_EVICT_AGE = 600
+
+_ACTIVE_STATUSES = (TaskStatus.PENDING, TaskStatus.PROCESSING)
+
+
+@dataclass
+class JanitorStats:
+    """清理统计"""
+    reclaimed_bytes_total: int = 0  # 累计回收的本地磁盘字节数
+    reclaimed_files_total: int = 0
+    evicted_bytes_total: int = 0  # 其中因超出配额被淘汰的字节数
+    expired_tasks_total: int = 0
+    disk_usage_bytes: int = 0  # 最近一轮清理后的本地工作区占用
+    sweeps_total: int = 0
+    last_sweep_at: Optional[str] = None
+    last_sweep_seconds: float = 0.0
+
+
+def task_artifact_keys(task: Dict) -> Set[str]:
+    """任务引用的产物 key (预览目录 previews/{task_id}/ 按前缀单独处理)"""
+    keys = set()
+    if task.get("file_key"):
+        keys.add(task["file_key"])
+    for value in task.get("artifacts", {}).values():
+        keys.update(value if isinstance(value, list) else [value])
+    for item in task.get("items", []):
+        if item.get("file_key"):
+            keys.add(item["file_key"])
+    keys.update((task.get("profile") or {}).values())
+    preview = task.get("preview") or {}
+    if preview.get("pdf_key"):
+        keys.add(preview["pdf_key"])
+    return keys
+
+
+# 清理用到的任务字段
+_SNAPSHOT_FIELDS = ("status", "created_at", "file_key", "artifacts", "items", "profile", "preview", "input_path")
+
+
+def task_snapshot(task: Dict) -> Dict:
+    """
+    复制清理用到的任务字段 (深拷贝)
+
+    应在事件循环线程中调用：清理在线程池中遍历快照时，事件循环可能正在修改任务的 items / artifacts
+    """
+    return {field: copy.deepcopy(task[field]) for field in _SNAPSHOT_FIELDS if field in task}
+
+
+def pending_input_paths(task: Dict) -> Set[str]:
+    """尚未处理完的临时输入文件：处理中任务的输入与批量任务中未完成子项的输入 (绝对路径)"""
+    paths = set()
+    if task.get("input_path") and task.get("status") in _ACTIVE_STATUSES:
+        paths.add(os.path.abspath(task["input_path"]))
+    for item in task.get("items", []):
+        if item.get("input_path") and item.get("status") in _ACTIVE_STATUSES:
+            paths.add(os.path.abspath(item["input_path"]))
+    return paths
+
+
+@dataclass
+class _RemoteTasks:
+    """其他 worker 的存活任务 (Redis 中存在而本进程内没有)"""
+    task_ids: Set[str]
+    owners: Dict[str, str]  # 产物 key -> 任务 ID
+    input_paths: Set[str]
+
+    def owns(self, key: str) -> bool:
+        if key in self.owners:
+            return True
+        return key.startswith("previews/") and key.split("/")[1] in self.task_ids
+
+
+def _created_timestamp(task: Dict) -> float:
+    try:
+        return datetime.fromisoformat(task["created_at"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+class Janitor:
+    """
+    产物清理器
+
+    过期判定：任务不在处理中，距创建或最近一次访问超过 TTL，且 Redis 中的任务状态也已过期。
+    本地工作区中不属于任何存活任务的文件按修改时间过期 (覆盖服务重启前遗留的文件)。
+    多个 worker 共用工作区时，其他 worker 的任务只存在于 Redis 中：这些任务引用的文件由其所属 worker 清理，
+    本进程既不按修改时间回收也不参与配额淘汰；无法读取 Redis 时本轮不回收任何未登记的非临时文件
+    """
+
+    def __init__(self, store: ArtifactStore):
+        self.store = store
+        self.stats = JanitorStats()
+        self._last_access: Dict[str, float] = {}
+
+    @property
+    def ttl(self) -> int:
+        return settings.artifact_ttl or settings.redis_expiry
+
+    def touch(self, task_id: str) -> None:
+        """记录任务产物被访问，用于 TTL 续期与 LRU 淘汰"""
+        self._last_access[task_id] = time.time()
+
+    def _last_used(self, task_id: str, task: Dict) -> float:
+        return max(_created_timestamp(task), self._last_access.get(task_id, 0.0))
+
+    def _reclaim(self, path: str, evicted: bool = False) -> int:
+        """删除本地文件并计入回收统计"""
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return 0
+        self.stats.reclaimed_bytes_total += size
+        self.stats.reclaimed_files_total += 1
+        if evicted:
+            self.stats.evicted_bytes_total += size
+        inc(RECLAIMED_BYTES, size, reason="evicted" if evicted else "expired")
+        return size
+
+    def _delete_task(self, task_id: str, keys: Set[str]) -> None:
+        """删除任务的全部产物 (含远端存储中的对象)"""
+        for key in keys:
+            self._reclaim(self.store.local_path(key))
+            self.store.delete(key)
+        preview_prefix = f"previews/{task_id}"
+        preview_dir = self.store.local_path(preview_prefix)
+        if os.path.isdir(preview_dir):
+            for name in os.listdir(preview_dir):
+                self._reclaim(os.path.join(preview_dir, name))
+        self.store.delete_prefix(preview_prefix)
+        self._last_access.pop(task_id, None)
+
+    def _remote_tasks(self, local_ids: Set[str]) -> Optional[_RemoteTasks]:
+        """读取其他 worker 的存活任务引用的产物与输入文件，读取 Redis 失败时返回 None"""
+        remote = _RemoteTasks(set(), {}, set())
+        try:
+            for redis_key, task in redis_client.scan_json("task:*"):
+                task_id = redis_key.split(":", 1)[1]
+                if task_id in local_ids:
+                    continue
+                remote.task_ids.add(task_id)
+                for key in task_artifact_keys(task):
+                    remote.owners[key] = task_id
+                remote.input_paths |= pending_input_paths(task)
+        except Exception as e:
+            logger.error(f"读取其他 worker 的任务失败，本轮不回收未登记的文件: {e}")
+            return None
+        return remote
+
+    def _scan(self) -> List[Tuple[str, str, int, float]]:
+        """列出本地工作区中的文件: (key, 路径, 大小, 修改时间)"""
+        files = []
+        for root, _, names in os.walk(self.store.root):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat_result = os.stat(path)
+                except OSError:
+                    continue
+                files.append((self.store.key_for(path), path, stat_result.st_size, stat_result.st_mtime))
+        return files
+
+    def _prune_empty_dirs(self, now: float) -> None:
+        """删除空的子目录 (批量任务工作目录、预览目录)，刚创建的目录可能即将写入，暂不删除"""
+        for root, dirs, files in os.walk(self.store.root, topdown=False):
+            if root == self.store.root or dirs or files:
+                continue
+            try:
+                if now - os.stat(root).st_mtime > 60:
+                    os.rmdir(root)
+            except OSError:
+                pass
+
+    def sweep(self, tasks: List[Tuple[str, Dict]]) -> List[str]:
+        """
+        执行一轮清理 (同步阻塞，应在线程池中调用)
+
+        Args:
+            tasks: 当前进程内的任务快照 [(task_id, task_snapshot(任务数据))]
+
+        Returns:
+            产物已被删除、应从任务存储中移除的任务 ID
+        """
+        started = time.monotonic()
+        now = time.time()
+        removed: List[str] = []
+
+        live: Dict[str, Dict] = {}
+        expired: List[Tuple[str, Dict]] = []
+        for task_id, task in tasks:
+            if (task.get("status") not in _ACTIVE_STATUSES
+                    and now - self._last_used(task_id, task) > self.ttl
+                    and not redis_client.exists(f"task:{task_id}")):
+                expired.append((task_id, task))
+            else:
+                live[task_id] = task
+
+        # 命中转换缓存的任务会引用其他任务的产物，仍被存活任务引用的 key 不删除
+        owners: Dict[str, str] = {}
+        for task_id, task in live.items():
+            for key in task_artifact_keys(task):
+                owners[key] = task_id
+        for task_id, task in expired:
+            self._delete_task(task_id, task_artifact_keys(task) - owners.keys())
+            self.stats.expired_tasks_total += 1
+            removed.append(task_id)
+
+        remote = self._remote_tasks({task_id for task_id, _ in tasks})
+        # 批量子项在 BATCH 优先级可能排队超过 temp_ttl，尚未转换的输入文件不清理
+        pending_inputs: Set[str] = set()
+        for _, task in tasks:
+            pending_inputs |= pending_input_paths(task)
+        if remote is not None:
+            pending_inputs |= remote.input_paths
+
+        # 本地工作区：存活任务的文件按任务分组参与配额淘汰，其余文件按修改时间过期
+        usage = 0
+        task_files: Dict[str, List[str]] = {}
+        loose_files: List[Tuple[float, str, int]] = []
+        for key, path, size, mtime in self._scan():
+            owner = owners.get(key)
+            if not owner and key.startswith("previews/"):
+                preview_task = key.split("/")[1]
+                owner = preview_task if preview_task in live else None
+            if owner:
+                task_files.setdefault(owner, []).append(path)
+                usage += size
+                continue
+            is_temp = key.startswith("temp/")
+            if (path in pending_inputs
+                    or not is_temp and (remote is None or remote.owns(key))):
+                usage += size  # 等待处理的输入、属于其他 worker 的存活任务，或无法确认归属
+                continue
+            if now - mtime > (settings.temp_ttl if is_temp else self.ttl):
+                self._reclaim(path)
+                continue
+            usage += size
+            # 临时输入文件属于正在处理的转换任务，只按 TTL 清理；
+            # 刚写入的文件可能是尚未登记到任务上的生成结果，同样不参与淘汰
+            if not is_temp and now - mtime > MIN_EVICT_AGE:
+                loose_files.append((mtime, path, size))
+
+        if settings.output_quota and usage > settings.output_quota:
+            usage, evicted = self._enforce_quota(usage, live, task_files, loose_files)
+            removed.extend(evicted)
+
+        self._prune_empty_dirs(now)
+        self.stats.disk_usage_bytes = usage
+        self.stats.sweeps_total += 1
+        self.stats.last_sweep_at = datetime.now().isoformat()
+        self.stats.last_sweep_seconds = round(time.monotonic() - started, 3)
+        logger.info(
+            f"产物清理完成: 过期任务 {len(expired)} 个, 累计回收 {self.stats.reclaimed_bytes_total} 字节, "
+            f"当前占用 {usage} 字节, 耗时 {self.stats.last_sweep_seconds}s"
+        )
+        return removed
+
+    def _enforce_quota(self, usage: int, live: Dict[str, Dict], task_files: Dict[str, List[str]],
+                       loose_files: List[Tuple[float, str, int]]) -> Tuple[int, List[str]]:
+        """
+        按最近最少使用淘汰，直到占用降到配额的 QUOTA_LOW_WATERMARK 以下
+
+        对象存储后端的本地文件只是缓存，淘汰时只删除本地副本；
+        本地后端淘汰即删除产物，对应任务随之移除
+        """
+        target = int(settings.output_quota * QUOTA_LOW_WATERMARK)
+        candidates: List[Tuple[float, Optional[str], List[str]]] = [
+            (self._last_used(task_id, live[task_id]), task_id, paths)
+            for task_id, paths in task_files.items()
+            if live[task_id].get("status") not in _ACTIVE_STATUSES
+        ]
+        candidates.extend((mtime, None, [path]) for mtime, path, _ in loose_files)
+        candidates.sort(key=lambda candidate: candidate[0])
+
+        evicted_tasks = []
+        for _, task_id, paths in candidates:
+            if usage <= target:
+                break
+            for path in paths:
+                usage -= self._reclaim(path, evicted=True)
+            if task_id and not self.store.local_is_cache:
+                self._delete_task(task_id, task_artifact_keys(live[task_id]))
+                redis_client.delete(f"task:{task_id}")
+                evicted_tasks.append(task_id)
+        logger.warning(f"本地工作区超出配额，已按 LRU 淘汰 {len(evicted_tasks)} 个任务的产物")
+        return usage, evicted_tasks
+
+    async def run(self, tasks: Dict[str, Dict]) -> None:
+        """后台清理循环：启动时先清理一次上次运行遗留的文件，之后按 janitor_interval 周期执行"""
+        loop = asyncio.get_event_loop()
+        while True:
+            try:
+                snapshot = [(task_id, task_snapshot(task)) for task_id, task in list(tasks.items())]
+                removed = await loop.run_in_executor(None, self.sweep, snapshot)
+                for task_id in removed:
+                    tasks.pop(task_id, None)
+            except Exception as e:
+                logger.error(f"产物清理失败: {str(e)}", exc_info=True)
+            await asyncio.sleep(settings.janitor_interval)
+
+
+# 全局清理器实例
+janitor = Janitor(artifact_store)
@@ -0,0 +1,171 @@
+"""
+日志配置
+根日志器只挂一个 QueueHandler：业务代码 (事件循环或工作线程) 记录日志时只做消息插值并入队，
+格式化与写入由后台的 QueueListener 线程完成，磁盘或终端变慢时不会阻塞事件循环。
+输出 JSON (每行一条，带 task_id / user_id / trace_id) 或文本格式；配置 log_file 时写入按大小轮转的文件，
+日志总量有上限。log_sample_rates 可为逐页构建等高频日志器设置采样比例，WARNING 及以上不采样
+"""
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+from ..config import settings
+from .tracing import current_trace_id
+
+task_id_var: ContextVar[Optional[str]] = ContextVar("log_task_id", default=None)
+user_id_var: ContextVar[Optional[str]] = ContextVar("log_user_id", default=None)
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(task_id)s] %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+@contextmanager
+def log_context(task_id: Optional[str] = None, user_id: Optional[str] = None) -> Iterator[None]:
+    """在当前上下文 (含经调度器进入的工作线程) 的日志中附带任务与用户 ID"""
+    task_token = task_id_var.set(task_id)
+    user_token = user_id_var.set(user_id)
+    try:
+        yield
+    finally:
+        task_id_var.reset(task_token)
+        user_id_var.reset(user_token)
+
+
+class ContextFilter(logging.Filter):
+    """在记录日志的线程中读取 contextvars，附加到日志记录上 (入队后在监听线程中已读不到)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.task_id = task_id_var.get()
+        record.user_id = user_id_var.get()
+        record.trace_id = current_trace_id()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """按比例保留 INFO 及以下的日志，WARNING 及以上全部保留"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行 JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("task_id", "user_id", "trace_id"):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "task_id", None) is None:
+            record.task_id = "-"
+        return super().format(record)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    入队前只插值消息 (固定参数的值)，异常堆栈与 JSON 序列化留给监听线程；
+    标准 QueueHandler 会在调用线程中完成整条格式化
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = message
+        record.args = None
+        return record
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """解析 "日志器=比例,日志器=比例" 格式的采样配置"""
+    rates = {}
+    for item in value.split(","):
+        name, sep, rate = item.partition("=")
+        if sep and name.strip():
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def _output_handler() -> logging.Handler:
+    if settings.log_file:
+        handler: logging.Handler = logging.handlers.RotatingFileHandler(
+            settings.log_file, maxBytes=settings.log_max_bytes, backupCount=settings.log_backup_count,
+            encoding="utf-8",
+        )
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+    if settings.log_format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(_TextFormatter(TEXT_FORMAT))
+    return handler
+
+
+def configure_logging() -> None:
+    """启动时调用一次：替换根日志器的处理器并启动后台写日志线程，重复调用时先停止之前的线程"""
+    global _listener
+    stop_logging()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    queue_handler = _QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(ContextFilter())
+    root.addHandler(queue_handler)
+    root.setLevel(settings.log_level.upper())
+
+    # uvicorn 的日志 (含访问日志) 同样经队列写出，使用同一格式与轮转文件
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    for name, rate in parse_sample_rates(settings.log_sample_rates).items():
+        sampled = logging.getLogger(name)
+        for existing in [f for f in sampled.filters if isinstance(f, SamplingFilter)]:
+            sampled.removeFilter(existing)
+        if rate < 1.0:
+            sampled.addFilter(SamplingFilter(rate))
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, _output_handler(), respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """停止后台写日志线程，写出队列中剩余的日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
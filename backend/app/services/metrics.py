@@ -0,0 +1,135 @@
+"""
+Prometheus 指标
+覆盖大纲生成、PPT 构建 (按版式)、保存、文件转换、调度排队、Redis 往返等环节的耗时直方图，
+以及按状态统计的任务数、各线程池运行/排队中的作业数与产物清理回收的字节数，由 /metrics 导出。
+任务数与作业数在状态变化时增减 (TaskStorage、FairScheduler)，不在抓取时统计。
+未安装 prometheus_client 或 settings.metrics_enabled 为 False 时，各记录函数均为空操作。
+多个 worker 进程部署时设置环境变量 PROMETHEUS_MULTIPROC_DIR，/metrics 汇总所有进程的数据
+"""
+import os
+import time
+import logging
+import functools
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Tuple
+
+from ..config import settings
+
+logger = logging.getLogger("ai-ppt.metrics")
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+    )
+    from prometheus_client import multiprocess
+except ImportError:
+    Histogram = None
+
+# 秒级操作 (单页构建、保存、Redis)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# 分钟级操作 (大模型调用、LibreOffice 转换、排队)
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+ENABLED = Histogram is not None and settings.metrics_enabled
+if Histogram is None and settings.metrics_enabled:
+    logger.warning("未安装 prometheus_client，/metrics 不可用")
+
+if ENABLED:
+    OUTLINE_SECONDS = Histogram(
+        "ai_ppt_outline_seconds", "大纲生成耗时 (调用大模型)", ["model", "outcome"], buckets=SLOW_BUCKETS
+    )
+    GENERATE_SECONDS = Histogram(
+        "ai_ppt_generate_seconds", "PPTGenerator 生成整份文稿的耗时 (含保存)", ["output"], buckets=SLOW_BUCKETS
+    )
+    SLIDE_SECONDS = Histogram(
+        "ai_ppt_slide_build_seconds", "单张幻灯片的构建耗时", ["layout"], buckets=FAST_BUCKETS
+    )
+    SAVE_SECONDS = Histogram("ai_ppt_save_seconds", "PPTX 保存耗时", buckets=FAST_BUCKETS)
+    CONVERSION_SECONDS = Histogram(
+        "ai_ppt_conversion_seconds", "文件转换耗时", ["converter", "outcome"], buckets=SLOW_BUCKETS
+    )
+    QUEUE_WAIT_SECONDS = Histogram(
+        "ai_ppt_queue_wait_seconds", "作业在调度器中排队等待的时间", ["pool", "priority"], buckets=SLOW_BUCKETS
+    )
+    REDIS_SECONDS = Histogram("ai_ppt_redis_seconds", "Redis 命令往返耗时", ["op"], buckets=FAST_BUCKETS)
+    TASKS = Gauge("ai_ppt_tasks", "内存中按状态统计的任务数", ["status"], multiprocess_mode="livesum")
+    JOBS_RUNNING = Gauge(
+        "ai_ppt_jobs_running", "线程池中正在执行的作业数", ["pool", "priority"], multiprocess_mode="livesum"
+    )
+    JOBS_QUEUED = Gauge(
+        "ai_ppt_jobs_queued", "调度器中排队等待的作业数", ["pool", "priority"], multiprocess_mode="livesum"
+    )
+    RECLAIMED_BYTES = Counter(
+        "ai_ppt_reclaimed_bytes", "产物清理回收的本地磁盘字节数 (expired: 过期, evicted: 超出配额淘汰)", ["reason"]
+    )
+else:
+    OUTLINE_SECONDS = GENERATE_SECONDS = SLIDE_SECONDS = SAVE_SECONDS = CONVERSION_SECONDS = None
+    QUEUE_WAIT_SECONDS = REDIS_SECONDS = TASKS = JOBS_RUNNING = JOBS_QUEUED = RECLAIMED_BYTES = None
+
+
+def observe(histogram, seconds: float, **labels: str) -> None:
+    """记录一次耗时"""
+    if histogram is None:
+        return
+    (histogram.labels(**labels) if labels else histogram).observe(seconds)
+
+
+def inc(counter, amount: float = 1, **labels: str) -> None:
+    """计数器或 Gauge 累加 (Gauge 可为负数)"""
+    if counter is None:
+        return
+    (counter.labels(**labels) if labels else counter).inc(amount)
+
+
+@contextmanager
+def timed(histogram, **labels: str) -> Iterator[None]:
+    """记录代码块耗时 (异常退出也会记录)"""
+    if histogram is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(histogram, time.perf_counter() - start, **labels)
+
+
+def track_conversion(converter: str) -> Callable:
+    """装饰返回 bool 的转换函数：按转换器与结果 (success / failure) 记录耗时"""
+    def decorator(func: Callable) -> Callable:
+        if CONVERSION_SECONDS is None:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            succeeded = False
+            try:
+                succeeded = bool(func(*args, **kwargs))
+                return succeeded
+            finally:
+                observe(CONVERSION_SECONDS, time.perf_counter() - start,
+                        converter=converter, outcome="success" if succeeded else "failure")
+        return wrapper
+    return decorator
+
+
+def task_status_changed(old: Optional[str], new: Optional[str]) -> None:
+    """任务从状态 old 变为 new (新增任务时 old 为 None，移除时 new 为 None)"""
+    if TASKS is None or old == new:
+        return
+    if old is not None:
+        TASKS.labels(status=old).dec()
+    if new is not None:
+        TASKS.labels(status=new).inc()
+
+
+def render() -> Optional[Tuple[bytes, str]]:
+    """导出文本格式的指标，未启用时返回 None"""
+    if not ENABLED:
+        return None
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,108 @@
+"""
+大纲分页
+在 OutlineResponse 与 PPTGenerator.generate 之间执行：估算每页文字排版后的高度，
+放不下的文字页拆分为续页，并将总页数 (含封面与表格分页) 限制在 settings.max_slides 以内。
+生成与预览 (render_source) 都使用分页后的大纲，两者页序一致
+"""
+import math
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from ..config import settings
+from ..models import OutlineResponse, SlideContent, SlideLayout, ThemeStyle
+from .ppt_generator import PPTGenerator
+from .table_builder import normalize_table
+from .text_fit import split_slide
+
+logger = logging.getLogger("ai-ppt.pagination")
+
+
+@dataclass
+class PaginatedOutline:
+    """分页结果"""
+    outline: OutlineResponse
+    continued: int = 0  # 新增的续页数
+    dropped_slides: int = 0  # 超出页数上限被舍弃的幻灯片数
+    dropped_rows: int = 0  # 超出页数上限被舍弃的表格行数
+
+    @property
+    def truncated(self) -> bool:
+        return bool(self.dropped_slides or self.dropped_rows)
+
+
+def page_count(slide: SlideContent) -> int:
+    """幻灯片在生成结果中占用的页数 (拆分续页之前)"""
+    if slide.layout == SlideLayout.TITLE:
+        return 0  # 标题版式不单独生成页面，封面另行计入
+    if slide.layout == SlideLayout.TABLE:
+        rows = len(normalize_table(slide.data_points).rows)
+        return max(math.ceil(rows / max(settings.table_rows_per_slide, 1)), 1)
+    return 1
+
+
+def paginate_outline(outline: OutlineResponse, theme: ThemeStyle,
+                     max_slides: Optional[int] = None) -> PaginatedOutline:
+    """
+    分页
+
+    先保证原有幻灯片都能输出：总页数超出上限时截断过长的表格、舍弃末尾的幻灯片 (保留致谢页)；
+    剩余的页数额度按顺序分给需要续页的文字页，某页的续页放不进剩余额度时不拆分，
+    由生成器以最小字号排版
+
+    Args:
+        outline: 原始大纲
+        theme: 主题，按主题字体估算文字宽度
+        max_slides: 总页数上限，默认 settings.max_slides
+    """
+    font_name = PPTGenerator.THEMES.get(theme, PPTGenerator.THEMES[ThemeStyle.BUSINESS])["font_name"]
+    budget = (max_slides or settings.max_slides) - 1  # 封面页
+    result = PaginatedOutline(outline=outline)
+    slides = list(outline.slides)
+
+    # 致谢页放在最后，截断时优先保留
+    closing = slides.pop() if slides and slides[-1].layout == SlideLayout.THANK_YOU else None
+    if closing:
+        budget -= 1
+
+    kept: List[SlideContent] = []
+    for index, slide in enumerate(slides):
+        pages = page_count(slide)
+        if pages <= budget:
+            kept.append(slide)
+            budget -= pages
+            continue
+        rest = slides[index:]
+        if slide.layout == SlideLayout.TABLE and budget > 0:
+            # 表格按剩余页数截断行数；与 normalize_table 一致，只有字典数据点构成表格行
+            rows = budget * settings.table_rows_per_slide
+            points = [point for point in slide.data_points or [] if isinstance(point, dict)]
+            result.dropped_rows = max(len(points) - rows, 0)
+            kept.append(slide.model_copy(update={"data_points": points[:rows]}))
+            budget = 0
+            rest = slides[index + 1:]
+        result.dropped_slides = sum(1 for s in rest if s.layout != SlideLayout.TITLE)
+        break
+
+    paged: List[SlideContent] = []
+    for slide in kept:
+        pages = split_slide(slide, font_name)
+        if len(pages) > 1 and len(pages) - 1 <= budget:
+            paged.extend(pages)
+            budget -= len(pages) - 1
+            result.continued += len(pages) - 1
+        else:
+            if len(pages) > 1:
+                logger.info(f"幻灯片 '{slide.title}' 内容超出版面，但已达页数上限，不再拆分")
+            paged.append(slide)
+    if closing:
+        paged.append(closing)
+
+    if result.truncated:
+        logger.warning(
+            f"大纲超出 {max_slides or settings.max_slides} 页上限: 舍弃 {result.dropped_slides} 张幻灯片、"
+            f"{result.dropped_rows} 行表格数据"
+        )
+    if result.continued or result.truncated:
+        result.outline = outline.model_copy(update={"slides": paged})
+    return result
@@ -4,16 +4,30 @@ PPT 生成引擎
 """
 import os
 import logging
-from typing import List, Optional
+import tempfile
+from typing import BinaryIO, List, Optional
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR, MSO_AUTO_SIZE
 from pptx.dml.color import RGBColor
 from pptx.enum.shapes import MSO_SHAPE, PP_PLACEHOLDER
-from pptx.chart.data import ChartData
 from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION
+from pptx.oxml import parse_xml
+from ..config import settings
 from ..models import SlideContent, ThemeStyle, SlideLayout
+from .chart_data import CachedChartData, normalize_data_points
 from .image_generator import image_generator
+from .pptx_writer import save_presentation
+from .metrics import GENERATE_SECONDS, SLIDE_SECONDS, timed
+from .tracing import span
+from .profiling import profiled
+from .text_fit import (
+    BULLET_BOX, COLUMN_BOX, COLUMN_TEXTBOX_BOX, fit_text, scaled_box, timeline_labels,
+)
+from .table_builder import (
+    TABLE_LEFT, TABLE_TOP, ROW_HEIGHT, build_table_xml, column_widths, normalize_table, page_title, paginate,
+    table_style,
+)
 import requests
 from io import BytesIO
 
@@ -49,18 +63,27 @@ class PPTGenerator:
         },
     }
     
-    def __init__(self, theme: ThemeStyle = ThemeStyle.BUSINESS, template_path: str = None):
+    def __init__(self, theme: ThemeStyle = ThemeStyle.BUSINESS, template_path: str = None,
+                 template_data: Optional[bytes] = None):
+        """
+        Args:
+            theme: 主题风格
+            template_path: 模板文件路径
+            template_data: 已读入内存的模板内容，批量生成时多个生成器共用，优先于 template_path
+        """
         self.logger = logging.getLogger("ai-ppt.generator")
-        if template_path and os.path.exists(template_path):
-            self.logger.info(f"正在从模板初始化 Presentation: {template_path}")
+        # 逐页日志单独使用子日志器，按 settings.log_sample_rates 采样
+        self.slide_logger = logging.getLogger("ai-ppt.generator.slide")
+        if template_data or (template_path and os.path.exists(template_path)):
+            self.logger.info("正在从模板初始化 Presentation: %s", template_path or "<内存模板>")
             try:
-                self.prs = Presentation(template_path)
+                self.prs = Presentation(BytesIO(template_data) if template_data else template_path)
                 self.template_mode = True
                 # 记录模板中的布局名称，方便调试
-                layout_names = [l.name for l in self.prs.slide_layouts]
-                self.logger.debug(f"模板可用布局: {layout_names}")
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug("模板可用布局: %s", [l.name for l in self.prs.slide_layouts])
             except Exception as e:
-                self.logger.error(f"加载模板失败: {str(e)}，将使用默认样式")
+                self.logger.error("加载模板失败: %s，将使用默认样式", e)
                 self.prs = Presentation()
                 self.prs.slide_width = Inches(13.33)
                 self.prs.slide_height = Inches(7.5)
@@ -95,7 +118,7 @@ class PPTGenerator:
             response.raise_for_status()
             return BytesIO(response.content)
         except Exception as e:
-            self.logger.error(f"Failed to download image: {str(e)}")
+            self.logger.error("Failed to download image: %s", e)
             return None
 
     def _add_image_to_slide(self, slide, image_stream: BytesIO, left, top, width, height):
@@ -113,7 +136,7 @@ class PPTGenerator:
         try:
             slide.shapes.add_picture(image_stream, left, top, width, height)
         except Exception as e:
-            self.logger.error(f"Failed to add image to slide: {str(e)}")
+            self.logger.error("Failed to add image to slide: %s", e)
 
     async def _generate_and_add_image(self, slide, slide_data: SlideContent):
         """
@@ -242,12 +265,14 @@ class PPTGenerator:
             search_keywords = ["TITLE AND CONTENT", "标题和内容", "正文", "CONTENT"]
         elif layout_type == SlideLayout.THANK_YOU:
             search_keywords = ["THANK", "感谢", "结束", "CLOSING"]
+        elif layout_type == SlideLayout.TABLE:
+            search_keywords = ["TITLE ONLY", "仅标题", "只有标题"]
         
         # 遍历布局名进行关键词匹配
         for keyword in search_keywords:
             for layout in self.prs.slide_layouts:
                 if keyword in layout.name.upper():
-                    self.logger.info(f"匹配到模板布局: {layout.name} (关键词: {keyword})")
+                    self.slide_logger.info("匹配到模板布局: %s (关键词: %s)", layout.name, keyword)
                     return layout
         
         # 2. 如果没匹配到，尝试按索引匹配常用布局
@@ -276,12 +301,8 @@ class PPTGenerator:
                 break
         
         if body_placeholder:
-            tf = body_placeholder.text_frame
-            tf.clear() # 清除默认文本
-            for idx, point in enumerate(slide_data.bullet_points):
-                p = tf.add_paragraph() if idx > 0 else tf.paragraphs[0]
-                p.text = point
-                p.level = 0
+            body_placeholder.text_frame.clear() # 清除默认文本
+            self._fill_placeholder(body_placeholder, slide_data.bullet_points)
         else:
             # 兜底手动添加
             left, top, width, height = Inches(1.2), Inches(1.8), Inches(11), Inches(4.5)
@@ -289,12 +310,31 @@ class PPTGenerator:
             tf = body_shape.text_frame
             tf.word_wrap = True
             
+            # 字号随内容量在 24-14pt 之间自适应
+            size = fit_text(slide_data.bullet_points, BULLET_BOX, self.theme["font_name"]).size
             for idx, point in enumerate(slide_data.bullet_points):
                 p = tf.add_paragraph() if idx > 0 else tf.paragraphs[0]
-                p.space_before = Pt(18)
+                p.space_before = Pt(BULLET_BOX.space_at(size))
                 run = p.add_run()
                 run.text = f"●  {point}"
-                self._apply_font_style(run, 24, self.theme["text_color"])
+                self._apply_font_style(run, size, self.theme["text_color"])
+
+    def _fill_placeholder(self, placeholder, points: List[str]):
+        """
+        填充正文占位符
+        默认沿用母版字号，按占位符实际尺寸估算放不下时才显式缩小字号
+        """
+        tf = placeholder.text_frame
+        for idx, point in enumerate(points):
+            p = tf.add_paragraph() if idx > 0 else tf.paragraphs[0]
+            p.text = point
+            p.level = 0
+        box = scaled_box(COLUMN_BOX, placeholder.width / 914400, placeholder.height / 914400)
+        size = fit_text(points, box, self.theme["font_name"]).size
+        if size < box.max_size:
+            for p in tf.paragraphs:
+                for run in p.runs:
+                    run.font.size = Pt(size)
 
     def add_column_slide(self, slide_data: SlideContent):
         slide = self.prs.slides.add_slide(self._get_layout(layout_type=SlideLayout.TWO_COLUMN))
@@ -315,17 +355,17 @@ class PPTGenerator:
         if len(placeholders) >= 2:
             # 使用模板的双栏占位符
             for i, pts in enumerate([left_points, right_points]):
-                tf = placeholders[i].text_frame
-                tf.clear()
-                for j, p_text in enumerate(pts):
-                    p = tf.add_paragraph() if j > 0 else tf.paragraphs[0]
-                    p.text = p_text
+                placeholders[i].text_frame.clear()
+                self._fill_placeholder(placeholders[i], pts)
         else:
             # 左右双栏 手动添加
             col_width = Inches(5.5)
             mid_gap = Inches(0.5)
             left_start = Inches(1)
             
+            # 两栏使用相同字号
+            size = min(fit_text(points, COLUMN_TEXTBOX_BOX, self.theme["font_name"]).size
+                       for points in [left_points, right_points])
             for i, points in enumerate([left_points, right_points]):
                 box = slide.shapes.add_textbox(
                     left_start + i*(col_width + mid_gap), 
@@ -335,10 +375,10 @@ class PPTGenerator:
                 tf.word_wrap = True
                 for j, p_text in enumerate(points):
                     p = tf.add_paragraph() if j > 0 else tf.paragraphs[0]
-                    p.space_before = Pt(15)
+                    p.space_before = Pt(COLUMN_TEXTBOX_BOX.space_at(size))
                     run = p.add_run()
                     run.text = f"▪ {p_text}"
-                    self._apply_font_style(run, 20, self.theme["text_color"])
+                    self._apply_font_style(run, size, self.theme["text_color"])
 
     def add_process_slide(self, slide_data: SlideContent):
         slide = self.prs.slides.add_slide(self._get_layout(layout_type=SlideLayout.PROCESS))
@@ -397,26 +437,11 @@ class PPTGenerator:
                     continue
                 break
         
-        # 图表数据准备
-        chart_data = ChartData()
-        if slide_data.data_points:
-            is_multi_series = any("series" in d for d in slide_data.data_points)
-            if is_multi_series:
-                labels = [d.get("label", f"项{i}") for i, d in enumerate(slide_data.data_points)]
-                chart_data.categories = labels
-                series_names = set()
-                for d in slide_data.data_points:
-                    if "series" in d:
-                        series_names.update(d["series"].keys())
-                for s_name in sorted(list(series_names)):
-                    values = [d.get("series", {}).get(s_name, 0) for d in slide_data.data_points]
-                    chart_data.add_series(s_name, values)
-            else:
-                chart_data.categories = [d.get("label", f"项{i}") for i, d in enumerate(slide_data.data_points)]
-                chart_data.add_series("数值", [d.get("value", 0) for d in slide_data.data_points])
-        else:
-            chart_data.categories = ["示例 A", "示例 B", "示例 C"]
-            chart_data.add_series("系列 1", [30, 50, 20])
+        # 图表数据准备：一次性规整为列式数组，无法识别的数值作为缺失值 (图表中留空)
+        table = normalize_data_points(slide_data.data_points)
+        if table.invalid:
+            self.logger.warning("图表 '%s' 中有 %d 个无法识别的数值，已按缺失处理", slide_data.title, table.invalid)
+        chart_data = CachedChartData(table)
 
         if chart_placeholder and not has_text:
             # 全屏图表占位符
@@ -482,8 +507,10 @@ class PPTGenerator:
         if count == 0: return
         
         gap = (line_end - line_start) / max(count - 1, 1)
+        # 节点统一字号，最小字号仍放不下的文字截断
+        size, labels = timeline_labels(points, self.theme["font_name"])
         
-        for i, point in enumerate(points):
+        for i, point in enumerate(labels):
             x = line_start + i * gap
             
             # 节点圆圈
@@ -505,7 +532,7 @@ class PPTGenerator:
             p.alignment = PP_ALIGN.CENTER
             run = p.add_run()
             run.text = point
-            self._apply_font_style(run, 16, self.theme["text_color"], bold=True)
+            self._apply_font_style(run, size, self.theme["text_color"], bold=True)
 
     def add_big_number_slide(self, slide_data: SlideContent):
         """添加数字大屏/关键KPI页"""
@@ -541,6 +568,47 @@ class PPTGenerator:
             run_desc.text = slide_data.bullet_points[0]
             self._apply_font_style(run_desc, 24, self.theme["text_color"])
 
+    def _remove_empty_placeholders(self, slide):
+        """删除未填写的正文占位符，避免模板版式在表格下方露出“单击此处添加文本”的提示"""
+        for shape in list(slide.placeholders):
+            if shape.placeholder_format.type in [PP_PLACEHOLDER.BODY, PP_PLACEHOLDER.OBJECT, PP_PLACEHOLDER.TABLE] \
+                    and not (shape.has_text_frame and shape.text_frame.text):
+                shape._element.getparent().remove(shape._element)
+
+    def add_table_slide(self, slide_data: SlideContent):
+        """
+        添加数据表格页
+        data_points 每项为一行，行数超过 settings.table_rows_per_slide 时拆分为多页，每页重复表头
+        """
+        table = normalize_table(slide_data.data_points)
+        if not table.headers:
+            self.logger.warning("表格 '%s' 没有可用的数据，改用要点页", slide_data.title)
+            self.add_bullet_slide(slide_data)
+            return
+
+        pages = paginate(table, settings.table_rows_per_slide)
+        style = table_style(self.theme)
+        left, top, row_height = Inches(TABLE_LEFT), Inches(TABLE_TOP), Inches(ROW_HEIGHT)
+        width = self.prs.slide_width - 2 * left
+        widths = column_widths(table, width)
+
+        for page, rows in enumerate(pages, start=1):
+            slide = self.prs.slides.add_slide(self._get_layout(layout_type=SlideLayout.TABLE))
+            self._setup_background(slide)
+            self._add_page_header(slide, page_title(slide_data.title, page, len(pages)), slide_data.icon)
+            if self.template_mode:
+                self._remove_empty_placeholders(slide)
+
+            # 先由 python-pptx 创建单行表格的外框，再将 a:tbl 整体替换为直接拼接的 XML
+            frame = slide.shapes.add_table(1, len(table.headers), left, top, width, row_height)
+            frame.height = row_height * (len(rows) + 1)
+            tbl = frame._element.graphic.graphicData.tbl
+            xml = build_table_xml(table.headers, rows, table.numeric, widths, row_height, style)
+            tbl.getparent().replace(tbl, parse_xml(xml))
+
+        if len(pages) > 1:
+            self.slide_logger.info("表格 '%s' 共 %d 行，已拆分为 %d 页", slide_data.title, len(table.rows), len(pages))
+
     def add_thank_you_slide(self, message: str = "感谢聆听"):
         """添加精美致谢页"""
         slide = self.prs.slides.add_slide(self._get_layout(layout_type=SlideLayout.THANK_YOU))
@@ -577,83 +645,113 @@ class PPTGenerator:
         run.text = message
         self._apply_font_style(run, 64, self.theme["title_color"], bold=True)
 
+    @profiled("PPTGenerator.generate")
     def generate(self, title: str, slides: List[SlideContent], output_path: str) -> str:
         try:
-            self.logger.info(f"PPT生成开始: 标题={title}, 幻灯片数量={len(slides)}, 输出路径={output_path}")
+            self.logger.info("PPT生成开始: 标题=%s, 幻灯片数量=%d, 输出路径=%s", title, len(slides), output_path)
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            
-            # 如果是模板模式，且模板本身不是空的（即有超过0页），我们通常是在后面追加。
-            # 但用户通常希望"基于模板"生成，如果模板只有母版而没有页面，则直接开始。
-            # 如果模板有封面页，我们甚至可以考虑直接修改封面页。
-            
-            has_existing_slides = len(self.prs.slides) > 0
-            self.logger.info(f"模板模式检查: template_mode={self.template_mode}, 已有幻灯片数={has_existing_slides}")
-            
-            if self.template_mode and has_existing_slides:
-                # 尝试寻找并填充已有的封面
-                first_slide = self.prs.slides[0]
-                found_title = False
-                for shape in first_slide.shapes:
-                    if shape.is_placeholder and shape.placeholder_format.type in [PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE]:
-                        shape.text = title
-                        found_title = True
-                
-                # 如果没在第一页找到标题位，且模板模式开启，通常我们不主动增加新封面，以免破坏模板结构
-                # 除非用户明确要求（目前逻辑是跳过 TITLE 布局的循环）
-            elif not self.template_mode:
-                self.logger.info("添加标题幻灯片")
-                self.add_title_slide(title)
-            else:
-                # 模板模式但没页面，还是得加个封面
-                self.logger.info("模板模式下添加标题幻灯片")
-                self.add_title_slide(title)
-            
-            self.logger.info(f"开始添加 {len(slides)} 个幻灯片")
-            for i, slide in enumerate(slides):
-                self.logger.info(f"处理第 {i+1}/{len(slides)} 张幻灯片: 标题='{slide.title}', 布局={slide.layout}")
-                if slide.layout == SlideLayout.TITLE:
-                    continue
-                elif slide.layout == SlideLayout.TWO_COLUMN:
-                    self.logger.info(f"添加双栏幻灯片: {slide.title}")
-                    self.add_column_slide(slide)
-                elif slide.layout == SlideLayout.PROCESS:
-                    self.logger.info(f"添加流程幻灯片: {slide.title}")
-                    self.add_process_slide(slide)
-                elif slide.layout == SlideLayout.DATA_COLUMN:
-                    self.logger.info(f"添加柱状图幻灯片: {slide.title}")
-                    self.add_chart_slide(slide, XL_CHART_TYPE.COLUMN_CLUSTERED)
-                elif slide.layout == SlideLayout.DATA_BAR:
-                    self.logger.info(f"添加条形图幻灯片: {slide.title}")
-                    self.add_chart_slide(slide, XL_CHART_TYPE.BAR_CLUSTERED)
-                elif slide.layout == SlideLayout.DATA_LINE:
-                    self.logger.info(f"添加折线图幻灯片: {slide.title}")
-                    self.add_chart_slide(slide, XL_CHART_TYPE.LINE)
-                elif slide.layout == SlideLayout.DATA_PIE:
-                    self.logger.info(f"添加饼图幻灯片: {slide.title}")
-                    self.add_chart_slide(slide, XL_CHART_TYPE.PIE)
-                elif slide.layout == SlideLayout.DATA_AREA:
-                    self.logger.info(f"添加面积图幻灯片: {slide.title}")
-                    self.add_chart_slide(slide, XL_CHART_TYPE.AREA)
-                elif slide.layout == SlideLayout.DATA_STACKED:
-                    self.logger.info(f"添加堆积图幻灯片: {slide.title}")
-                    self.add_chart_slide(slide, XL_CHART_TYPE.COLUMN_STACKED)
-                elif slide.layout == SlideLayout.TIMELINE:
-                    self.logger.info(f"添加时间轴幻灯片: {slide.title}")
-                    self.add_timeline_slide(slide)
-                elif slide.layout == SlideLayout.BIG_NUMBER:
-                    self.logger.info(f"添加大数据幻灯片: {slide.title}")
-                    self.add_big_number_slide(slide)
-                elif slide.layout == SlideLayout.THANK_YOU:
-                    self.logger.info(f"添加感谢幻灯片: {slide.title}")
-                    self.add_thank_you_slide(slide.title)
-                else:
-                    self.logger.info(f"添加要点幻灯片: {slide.title}")
-                    self.add_bullet_slide(slide)
-            self.logger.info("所有幻灯片添加完成")
-            self.logger.info(f"开始保存PPT到: {output_path}")
-            self.prs.save(output_path)
-            self.logger.info(f"PPT保存完成: {output_path}")
+            with timed(GENERATE_SECONDS, output="file"), span("ppt.generate", {"slide.count": len(slides)}):
+                self._build(title, slides)
+                self.logger.debug("开始保存PPT到: %s", output_path)
+                save_presentation(self.prs, output_path)
+            self.logger.info("PPT保存完成: %s", output_path)
             return output_path
         except Exception as e:
-            self.logger.error(f"PPT 生成失败: {str(e)}", exc_info=True)
-            raise Exception(f"PPT 生成失败: {str(e)}")
\ No newline at end of file
+            self.logger.error("PPT 生成失败: %s", e, exc_info=True)
+            raise Exception(f"PPT 生成失败: {str(e)}")
+
+    @profiled("PPTGenerator.generate_to_stream")
+    def generate_to_stream(self, title: str, slides: List[SlideContent],
+                           stream: Optional[BinaryIO] = None) -> BinaryIO:
+        """
+        生成 PPT 并写入流，不经过磁盘上的中间文件
+
+        Args:
+            title: 演示文稿标题
+            slides: 幻灯片内容
+            stream: 写入目标，默认使用 SpooledTemporaryFile：
+                    小于 settings.stream_spool_size 的文稿全程在内存中，超出后自动转存临时文件
+
+        Returns:
+            已定位到开头的流，可直接用于 HTTP 响应、缓存或 artifact_store.put_stream
+        """
+        try:
+            self.logger.info("PPT生成开始: 标题=%s, 幻灯片数量=%d, 输出到流", title, len(slides))
+            with timed(GENERATE_SECONDS, output="stream"), span("ppt.generate", {"slide.count": len(slides)}):
+                self._build(title, slides)
+                if stream is None:
+                    stream = tempfile.SpooledTemporaryFile(max_size=settings.stream_spool_size)
+                save_presentation(self.prs, stream)
+            stream.seek(0)
+            self.logger.info("PPT写入流完成")
+            return stream
+        except Exception as e:
+            self.logger.error("PPT 生成失败: %s", e, exc_info=True)
+            raise Exception(f"PPT 生成失败: {str(e)}")
+
+    def _build(self, title: str, slides: List[SlideContent]) -> None:
+        """按大纲向 Presentation 添加全部幻灯片，slides 应已经过 paginate_outline 分页"""
+        # 如果是模板模式，且模板本身不是空的（即有超过0页），我们通常是在后面追加。
+        # 但用户通常希望"基于模板"生成，如果模板只有母版而没有页面，则直接开始。
+        # 如果模板有封面页，我们甚至可以考虑直接修改封面页。
+
+        has_existing_slides = len(self.prs.slides) > 0
+        self.logger.debug("模板模式检查: template_mode=%s, 已有幻灯片=%s", self.template_mode, has_existing_slides)
+
+        if self.template_mode and has_existing_slides:
+            # 尝试寻找并填充已有的封面
+            first_slide = self.prs.slides[0]
+            found_title = False
+            for shape in first_slide.shapes:
+                if shape.is_placeholder and shape.placeholder_format.type in [PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE]:
+                    shape.text = title
+                    found_title = True
+
+            # 如果没在第一页找到标题位，且模板模式开启，通常我们不主动增加新封面，以免破坏模板结构
+            # 除非用户明确要求（目前逻辑是跳过 TITLE 布局的循环）
+        elif not self.template_mode:
+            self.slide_logger.info("添加标题幻灯片")
+            self.add_title_slide(title)
+        else:
+            # 模板模式但没页面，还是得加个封面
+            self.slide_logger.info("模板模式下添加标题幻灯片")
+            self.add_title_slide(title)
+
+        self.logger.debug("开始添加 %d 个幻灯片", len(slides))
+        for i, slide in enumerate(slides):
+            self.slide_logger.info("处理第 %d/%d 张幻灯片: 标题='%s', 布局=%s", i + 1, len(slides), slide.title,
+                                   slide.layout.value)
+            if slide.layout == SlideLayout.TITLE:
+                continue
+            with timed(SLIDE_SECONDS, layout=slide.layout.value), span(f"ppt.slide.{slide.layout.value}"):
+                self._add_slide(slide)
+        self.logger.debug("所有幻灯片添加完成")
+
+    def _add_slide(self, slide: SlideContent) -> None:
+        """按版式添加一张幻灯片 (TITLE 版式由 _build 跳过)"""
+        if slide.layout == SlideLayout.TWO_COLUMN:
+            self.add_column_slide(slide)
+        elif slide.layout == SlideLayout.PROCESS:
+            self.add_process_slide(slide)
+        elif slide.layout == SlideLayout.DATA_COLUMN:
+            self.add_chart_slide(slide, XL_CHART_TYPE.COLUMN_CLUSTERED)
+        elif slide.layout == SlideLayout.DATA_BAR:
+            self.add_chart_slide(slide, XL_CHART_TYPE.BAR_CLUSTERED)
+        elif slide.layout == SlideLayout.DATA_LINE:
+            self.add_chart_slide(slide, XL_CHART_TYPE.LINE)
+        elif slide.layout == SlideLayout.DATA_PIE:
+            self.add_chart_slide(slide, XL_CHART_TYPE.PIE)
+        elif slide.layout == SlideLayout.DATA_AREA:
+            self.add_chart_slide(slide, XL_CHART_TYPE.AREA)
+        elif slide.layout == SlideLayout.DATA_STACKED:
+            self.add_chart_slide(slide, XL_CHART_TYPE.COLUMN_STACKED)
+        elif slide.layout == SlideLayout.TIMELINE:
+            self.add_timeline_slide(slide)
+        elif slide.layout == SlideLayout.BIG_NUMBER:
+            self.add_big_number_slide(slide)
+        elif slide.layout == SlideLayout.TABLE:
+            self.add_table_slide(slide)
+        elif slide.layout == SlideLayout.THANK_YOU:
+            self.add_thank_you_slide(slide.title)
+        else:
+            self.add_bullet_slide(slide)
@@ -0,0 +1,80 @@
+"""
+PPTX 包写入
+python-pptx 保存时对每个部件都使用默认级别的 deflate 压缩，图片等已压缩的媒体会被重复压缩。
+这里按部件类型选择压缩方式：已压缩的图片/音视频直接存储 (ZIP_STORED)，
+XML 部件使用可配置的 deflate 级别
+"""
+import os
+import zipfile
+from typing import BinaryIO, Optional, Union
+
+from pptx.opc.serialized import PackageWriter
+
+from ..config import settings
+from .metrics import SAVE_SECONDS, timed
+from .tracing import span
+
+# 本身已经压缩的媒体扩展名：再次 deflate 体积只减小几个百分点，却占去保存的绝大部分 CPU。
+# 图表内嵌的 .xlsx 体积小且再压缩仍有收益，继续使用 deflate
+PRECOMPRESSED_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".jpe", ".gif", ".webp", ".tif", ".tiff",
+    ".mp3", ".m4a", ".mp4", ".m4v", ".mov", ".wmv", ".avi",
+}
+
+
+class _TunedZipPkgWriter:
+    """与 python-pptx 的 _ZipPkgWriter 接口一致，按部件扩展名选择压缩方式"""
+
+    def __init__(self, pkg_file: Union[str, BinaryIO], xml_level: int, store_media: bool):
+        self._zipf = zipfile.ZipFile(pkg_file, "w", compression=zipfile.ZIP_DEFLATED)
+        self._xml_level = xml_level
+        self._store_media = store_media
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self._zipf.close()
+
+    def write(self, pack_uri, blob):
+        membername = pack_uri.membername
+        ext = os.path.splitext(membername)[1].lower()
+        if self._store_media and ext in PRECOMPRESSED_EXTENSIONS:
+            self._zipf.writestr(membername, blob, compress_type=zipfile.ZIP_STORED)
+        else:
+            self._zipf.writestr(membername, blob, compress_type=zipfile.ZIP_DEFLATED,
+                                compresslevel=self._xml_level)
+
+
+class _TunedPackageWriter(PackageWriter):
+    """复用 python-pptx 的部件序列化逻辑，仅替换底层 ZIP 写入器"""
+
+    def __init__(self, pkg_file, pkg_rels, parts, xml_level: int, store_media: bool):
+        super().__init__(pkg_file, pkg_rels, parts)
+        self._xml_level = xml_level
+        self._store_media = store_media
+
+    def _write(self):
+        with _TunedZipPkgWriter(self._pkg_file, self._xml_level, self._store_media) as phys_writer:
+            self._write_content_types_stream(phys_writer)
+            self._write_pkg_rels(phys_writer)
+            self._write_parts(phys_writer)
+
+
+def save_presentation(prs, target: Union[str, BinaryIO], xml_level: Optional[int] = None,
+                      store_media: Optional[bool] = None) -> None:
+    """
+    保存 Presentation，替代 prs.save(target)
+
+    Args:
+        prs: python-pptx Presentation 对象
+        target: 文件路径或可写的文件对象
+        xml_level: XML 部件的 deflate 级别 (0-9)，默认取 settings.pptx_xml_compress_level
+        store_media: 已压缩的媒体是否直接存储，默认取 settings.pptx_store_media
+    """
+    xml_level = settings.pptx_xml_compress_level if xml_level is None else xml_level
+    store_media = settings.pptx_store_media if store_media is None else store_media
+    # 依赖 python-pptx 0.6.x 的包结构 (requirements 中固定版本)
+    package = prs.part.package
+    with timed(SAVE_SECONDS), span("ppt.save"):
+        _TunedPackageWriter(target, package._rels, tuple(package.iter_parts()), xml_level, store_media)._write()
@@ -0,0 +1,183 @@
+"""
+幻灯片预览流水线
+非模板模式由 SlideRenderer 直接绘制；模板模式先用 LibreOffice 快速导出首页缩略图，
+再在后台生成完整 PDF 并逐页栅格化
+"""
+import os
+import re
+import logging
+import zipfile
+from typing import Any, Dict, List, Optional
+from PIL import Image
+from pdf2image import convert_from_path, pdfinfo_from_path
+from ..config import settings
+from ..models import OutlineResponse, ThemeStyle
+from .artifact_store import artifact_store
+from .conversion import convert_with_libreoffice
+from .slide_renderer import SlideRenderer
+
+logger = logging.getLogger("ai-ppt.preview")
+
+_SLIDE_PART = re.compile(r"^ppt/slides/slide\d+\.xml$")
+
+
+def preview_dir(task_id: str) -> str:
+    """任务预览文件所在的本地工作区目录"""
+    return artifact_store.local_path(f"previews/{task_id}")
+
+
+def slide_image_path(task_id: str, index: int, fmt: Optional[str] = None) -> str:
+    """第 index 页 (从 1 开始) 缩略图路径"""
+    fmt = fmt or settings.preview_format
+    return os.path.join(preview_dir(task_id), f"slide_{index:03d}.{fmt}")
+
+
+def preview_pdf_path(task_id: str) -> str:
+    """纯 Python 渲染路径生成的预览 PDF (由缩略图拼接的位图 PDF)"""
+    return os.path.join(preview_dir(task_id), "preview.pdf")
+
+
+def count_slides(pptx_path: str) -> int:
+    """读取 PPTX 包目录统计幻灯片数，无需解析整个文档"""
+    with zipfile.ZipFile(pptx_path) as zf:
+        return sum(1 for name in zf.namelist() if _SLIDE_PART.match(name))
+
+
+def publish_preview(task_id: str) -> None:
+    """将预览目录中已生成的缩略图与 PDF 发布到产物存储"""
+    if not os.path.isdir(preview_dir(task_id)):
+        return
+    for name in sorted(os.listdir(preview_dir(task_id))):
+        if name.endswith((".tmp", ".part")):
+            continue
+        artifact_store.publish(f"previews/{task_id}/{name}")
+
+
+def ready_slides(task_id: str, slide_count: int) -> List[int]:
+    """已生成缩略图的页码列表"""
+    return [i for i in range(1, slide_count + 1) if os.path.exists(slide_image_path(task_id, i))]
+
+
+def _save_image(image: Image.Image, path: str) -> None:
+    """原子写入图片，避免读取方拿到写了一半的文件"""
+    fmt = os.path.splitext(path)[1].lstrip(".").upper()
+    tmp_path = path + ".tmp"
+    if fmt == "WEBP":
+        image.save(tmp_path, format="WEBP", quality=settings.preview_quality, method=4)
+    else:
+        image.save(tmp_path, format=fmt, optimize=False)
+    os.replace(tmp_path, path)
+
+
+def render_first_slide(task_id: str, pptx_path: str) -> bool:
+    """
+    首页快速路径：LibreOffice 导出图片格式时只渲染第一页，远快于整份 PDF 转换
+    """
+    os.makedirs(preview_dir(task_id), exist_ok=True)
+    png_path = os.path.join(preview_dir(task_id), "first_slide.png")
+    if not convert_with_libreoffice(pptx_path, png_path, target_format="png"):
+        return False
+    with Image.open(png_path) as image:
+        image.load()
+        target_width = int(13.33 * settings.preview_dpi)
+        if image.width > target_width:
+            image = image.resize((target_width, round(image.height * target_width / image.width)), Image.LANCZOS)
+        _save_image(image.convert("RGB"), slide_image_path(task_id, 1))
+    os.remove(png_path)
+    return True
+
+
+def render_pdf_pages(task_id: str, pdf_path: str, skip_first: bool = False, fmt: Optional[str] = None) -> int:
+    """
+    将 PDF 逐页栅格化为缩略图，按页分批渲染以控制内存
+
+    Returns:
+        生成的缩略图数量
+    """
+    os.makedirs(preview_dir(task_id), exist_ok=True)
+    page_count = pdfinfo_from_path(pdf_path)["Pages"]
+    rendered = 0
+    first = 2 if skip_first else 1
+    batch = 4
+    for start in range(first, page_count + 1, batch):
+        end = min(start + batch - 1, page_count)
+        images = convert_from_path(pdf_path, dpi=settings.preview_dpi, first_page=start, last_page=end, thread_count=2)
+        for offset, image in enumerate(images):
+            _save_image(image.convert("RGB"), slide_image_path(task_id, start + offset, fmt))
+            rendered += 1
+    logger.info(f"预览缩略图生成完成: task={task_id}, 共 {rendered} 页")
+    return rendered
+
+
+def render_outline_slides(task_id: str, source: Dict[str, Any], fmt: Optional[str] = None) -> str:
+    """
+    非模板模式的纯 Python 预览：由大纲直接绘制全部缩略图并拼接预览 PDF，全程不启动 soffice
+
+    Args:
+        task_id: 任务 ID
+        source: 生成时记录的 {"title", "slides", "theme"}
+        fmt: 缩略图格式，默认取 settings.preview_format
+
+    Returns:
+        预览 PDF 路径
+    """
+    os.makedirs(preview_dir(task_id), exist_ok=True)
+    outline = OutlineResponse(title=source["title"], slides=source["slides"])
+    renderer = SlideRenderer(theme=ThemeStyle(source["theme"]))
+    images = renderer.render(outline.title, outline.slides)
+    for index, image in enumerate(images, start=1):
+        _save_image(image, slide_image_path(task_id, index, fmt))
+
+    pdf_path = preview_pdf_path(task_id)
+    tmp_path = pdf_path + ".tmp"
+    images[0].save(tmp_path, format="PDF", save_all=True, append_images=images[1:], resolution=settings.preview_dpi)
+    os.replace(tmp_path, pdf_path)
+    logger.info(f"纯 Python 预览渲染完成: task={task_id}, 共 {len(images)} 页")
+    return pdf_path
+
+
+def export_artifacts(task_id: str, pptx_path: str, formats: List[str],
+                     render_source: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    生成完成后在同一任务内导出附加格式 (同步阻塞，应在转换线程池中调用)
+
+    Args:
+        task_id: 任务 ID
+        pptx_path: 已保存的 PPTX 路径
+        formats: 需要导出的格式，如 ["pdf", "png"]
+        render_source: 非模板模式的大纲数据，有则 PNG 直接由 SlideRenderer 绘制
+
+    Returns:
+        导出成功并已发布到产物存储的产物 key: {"pdf": PDF key, "png": [逐页图片 key]}，
+        失败的格式不包含在内
+    """
+    artifacts: Dict[str, Any] = {}
+    pdf_path = os.path.splitext(pptx_path)[0] + ".pdf"
+    # 模板模式的 PNG 需要先有 PDF 再栅格化
+    need_pdf = "pdf" in formats or ("png" in formats and not render_source)
+    pdf_ready = False
+    # 每种格式单独捕获异常：某一格式失败只会缺少该产物，已发布的 PPTX 与其他格式不受影响
+    try:
+        pdf_ready = os.path.exists(pdf_path) or (need_pdf and convert_with_libreoffice(pptx_path, pdf_path))
+        if "pdf" in formats and pdf_ready:
+            artifacts["pdf"] = artifact_store.publish(artifact_store.key_for(pdf_path))
+    except Exception as e:
+        logger.error(f"PDF 导出失败: task={task_id}, {e}", exc_info=True)
+
+    if "png" in formats:
+        try:
+            if render_source:
+                render_outline_slides(task_id, render_source, fmt="png")
+            elif pdf_ready:
+                render_pdf_pages(task_id, pdf_path, fmt="png")
+            slide_count = count_slides(pptx_path)
+            pages = [slide_image_path(task_id, i, "png") for i in range(1, slide_count + 1)]
+            if pages and all(os.path.exists(page) for page in pages):
+                artifacts["png"] = [artifact_store.publish(artifact_store.key_for(page)) for page in pages]
+        except Exception as e:
+            logger.error(f"PNG 导出失败: task={task_id}, {e}", exc_info=True)
+
+    missing = [fmt for fmt in formats if fmt not in artifacts]
+    if missing:
+        logger.error(f"附加格式导出失败: task={task_id}, 格式={missing}")
+    return artifacts
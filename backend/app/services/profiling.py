@@ -0,0 +1,165 @@
+"""
+性能剖析
+按需对单个任务做 CPU (cProfile) 与可选的内存 (tracemalloc) 剖析：请求中带 profile 标志
+(settings.profiling_request_flag 开启时) 或按 settings.profiling_sample_rate 抽样的任务，
+其 PPTGenerator.generate / generate_to_stream 与各转换函数在剖析器下运行。
+任务结束后保存两个产物：profiles/{task_id}.prof (pstats 格式，可用 snakeviz 等工具打开)
+与 profiles/{task_id}.txt (按累计耗时排序的文本报告)，通过管理员接口下载。
+剖析器与 tracemalloc 均为进程级，同一时刻只剖析一个调用，其余调用照常执行并在报告中注明
+"""
+import io
+import os
+import time
+import random
+import pstats
+import logging
+import cProfile
+import threading
+import functools
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..config import settings
+from .artifact_store import ArtifactStore
+
+logger = logging.getLogger("ai-ppt.profiling")
+
+_current: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+# Python 3.12 起 cProfile 基于进程级的 sys.monitoring，不能在多个线程中同时启用
+_profiler_lock = threading.Lock()
+_local = threading.local()
+
+
+class ProfileSession:
+    """一个任务的剖析结果，任务内各被剖析调用的统计合并在一起"""
+
+    def __init__(self, task_id: str, memory: bool):
+        self.task_id = task_id
+        self.memory = memory
+        self.stats: Optional[pstats.Stats] = None
+        self.calls: List[Tuple[str, float]] = []  # (调用名, 耗时秒数)
+        self.skipped: List[str] = []  # 因其他调用正在剖析而未剖析的调用
+        self.memory_reports: List[Tuple[str, int, List[str]]] = []  # (调用名, 峰值字节数, 分配最多的位置)
+        self._lock = threading.Lock()
+
+    def run(self, name: str, func: Callable, *args, **kwargs):
+        """在剖析器下执行 func，剖析器被占用时直接执行"""
+        if getattr(_local, "active", False):
+            return func(*args, **kwargs)  # 外层调用已在剖析，结果中已包含本调用
+        if not _profiler_lock.acquire(blocking=False):
+            with self._lock:
+                self.skipped.append(name)
+            return func(*args, **kwargs)
+        try:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # 调试器等其他剖析工具正在运行
+                with self._lock:
+                    self.skipped.append(name)
+                return func(*args, **kwargs)
+            profiler.disable()
+            started_tracing = self.memory and not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start(settings.profiling_traceback_depth)
+            before = tracemalloc.take_snapshot() if self.memory else None
+            if self.memory:
+                tracemalloc.reset_peak()
+            _local.active = True
+            start = time.perf_counter()
+            try:
+                return profiler.runcall(func, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                _local.active = False
+                memory_report = None
+                if self.memory:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    top = tracemalloc.take_snapshot().compare_to(before, "lineno")[:settings.profiling_top]
+                    memory_report = (name, peak, [str(stat) for stat in top])
+                    if started_tracing:
+                        tracemalloc.stop()
+                self._record(name, elapsed, profiler, memory_report)
+        finally:
+            _profiler_lock.release()
+
+    def _record(self, name: str, elapsed: float, profiler: cProfile.Profile,
+                memory_report: Optional[Tuple[str, int, List[str]]]) -> None:
+        with self._lock:
+            self.calls.append((name, elapsed))
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+            if memory_report:
+                self.memory_reports.append(memory_report)
+
+    def report(self) -> str:
+        """文本报告：各调用耗时、按累计与自身耗时排序的函数、内存分配"""
+        out = io.StringIO()
+        out.write(f"任务 {self.task_id} 剖析报告\n\n")
+        for name, elapsed in self.calls:
+            out.write(f"{name}: {elapsed * 1000:.1f} ms\n")
+        if self.skipped:
+            out.write(f"未剖析 (其他调用正在剖析): {', '.join(self.skipped)}\n")
+        if self.stats is not None:
+            self.stats.stream = out
+            for sort_key, label in (("cumulative", "按累计耗时"), ("tottime", "按自身耗时")):
+                out.write(f"\n===== {label} (前 {settings.profiling_top} 项) =====\n")
+                self.stats.sort_stats(sort_key).print_stats(settings.profiling_top)
+        for name, peak, top in self.memory_reports:
+            out.write(f"\n===== 内存: {name}，峰值 {peak / (1024 * 1024):.1f} MB (含同时运行的其他线程) =====\n")
+            out.write("\n".join(top) + "\n")
+        return out.getvalue()
+
+    def save(self, store: ArtifactStore) -> Dict[str, str]:
+        """保存为任务产物，返回 {"prof": key, "txt": key}；没有任何调用被剖析时返回空字典"""
+        if self.stats is None:
+            return {}
+        keys = {"prof": f"profiles/{self.task_id}.prof", "txt": f"profiles/{self.task_id}.txt"}
+        prof_path = store.local_path(keys["prof"])
+        os.makedirs(os.path.dirname(prof_path), exist_ok=True)
+        self.stats.dump_stats(prof_path)
+        with open(store.local_path(keys["txt"]), "w", encoding="utf-8") as f:
+            f.write(self.report())
+        for key in keys.values():
+            store.publish(key)
+        logger.info("任务 %s 的剖析结果已保存: %s", self.task_id, keys["txt"])
+        return keys
+
+
+def should_profile(requested: bool = False) -> bool:
+    """请求带有 profile 标志 (需开启 profiling_request_flag) 或按采样比例命中时剖析"""
+    if requested and settings.profiling_request_flag:
+        return True
+    return settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate
+
+
+@contextmanager
+def profile_task(task_id: str, enabled: bool) -> Iterator[Optional[ProfileSession]]:
+    """在当前上下文 (含经调度器进入的工作线程) 中启用剖析，enabled 为 False 时返回 None"""
+    if not enabled:
+        yield None
+        return
+    session = ProfileSession(task_id, settings.profiling_memory)
+    token = _current.set(session)
+    try:
+        yield session
+    finally:
+        _current.reset(token)
+
+
+def profiled(name: str) -> Callable:
+    """被装饰的函数在剖析中的任务里调用时在剖析器下运行，否则无额外开销"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            session = _current.get()
+            if session is None:
+                return func(*args, **kwargs)
+            return session.run(name, func, *args, **kwargs)
+        return wrapper
+    return decorator
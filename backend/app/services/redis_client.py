@@ -4,8 +4,10 @@ Redis客户端工具类
 """
 import json
 import redis
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 from app.config import settings
+from app.services.metrics import REDIS_SECONDS, timed
+from app.services.tracing import span
 import logging
 
 logger = logging.getLogger(__name__)
@@ -39,7 +41,9 @@ class RedisClient:
         try:
             if not self.client:
                 return None
-            data = self.client.get(key)
+            client = self.client
+            with timed(REDIS_SECONDS, op="get"), span("redis.get"):
+                data = client.get(key)
             if data:
                 return json.loads(data)
             return None
@@ -53,7 +57,9 @@ class RedisClient:
             if not self.client:
                 return False
             data = json.dumps(value, ensure_ascii=False)
-            self.client.setex(key, self.redis_expiry, data)
+            client = self.client
+            with timed(REDIS_SECONDS, op="setex"), span("redis.setex"):
+                client.setex(key, self.redis_expiry, data)
             return True
         except Exception as e:
             logger.error(f"Redis set操作失败: {str(e)}")
@@ -64,7 +70,9 @@ class RedisClient:
         try:
             if not self.client:
                 return False
-            self.client.delete(key)
+            client = self.client
+            with timed(REDIS_SECONDS, op="delete"), span("redis.delete"):
+                client.delete(key)
             return True
         except Exception as e:
             logger.error(f"Redis delete操作失败: {str(e)}")
@@ -75,11 +83,39 @@ class RedisClient:
         try:
             if not self.client:
                 return False
-            return bool(self.client.exists(key))
+            client = self.client
+            with timed(REDIS_SECONDS, op="exists"), span("redis.exists"):
+                return bool(client.exists(key))
         except Exception as e:
             logger.error(f"Redis exists操作失败: {str(e)}")
             return False
 
+    def scan_json(self, pattern: str, count: int = 500) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        按模式遍历 key (SCAN 分批进行，不阻塞 Redis) 并批量读取 JSON 值
+
+        Redis 未连接时不返回任何数据；遍历中出错时抛出异常，调用方据此区分"没有数据"与"读取失败"
+        """
+        if not self.client:
+            return
+        client = self.client
+        batch: List[str] = []
+        for key in client.scan_iter(match=pattern, count=count):
+            batch.append(key)
+            if len(batch) >= count:
+                yield from self._mget_json(client, batch)
+                batch = []
+        if batch:
+            yield from self._mget_json(client, batch)
+
+    @staticmethod
+    def _mget_json(client: redis.Redis, keys: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with timed(REDIS_SECONDS, op="mget"), span("redis.mget"):
+            values = client.mget(keys)
+        for key, data in zip(keys, values):
+            if data:
+                yield key, json.loads(data)
+
 
 # 全局Redis客户端实例
 redis_client = RedisClient()
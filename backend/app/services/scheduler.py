@@ -0,0 +1,306 @@
+"""
+作业调度
+位于生成/转换线程池之前：作业按优先级 (交互 / 普通 / 批量) 严格排序，
+同一优先级内按提交者 (登录用户或匿名请求的客户端 IP) 加权公平排队分配线程池空位，
+单个用户一次提交几十份大纲时只占用自己的份额，交互请求 (预览、单份生成) 不会排在批量作业之后。
+另提供按自然日计数的配额，在提交时检查
+"""
+import time
+import asyncio
+import contextvars
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from ..config import settings
+from .metrics import JOBS_QUEUED, JOBS_RUNNING, QUEUE_WAIT_SECONDS, inc, observe
+from .tracing import span
+from .redis_client import redis_client
+from .workers import conversion_executor, generation_executor
+
+logger = logging.getLogger("ai-ppt.scheduler")
+
+class Priority(IntEnum):
+    """作业优先级，数值越小越优先"""
+    INTERACTIVE = 0  # 用户在界面上等待结果：预览、转 PDF 预览、直接下载、单份生成
+    NORMAL = 1  # 单个文件转换、生成后附带的格式导出
+    BATCH = 2  # 批量生成 / 批量转换的子项
+
+
+@dataclass
+class _Job:
+    owner: str
+    priority: Priority
+    start: float  # 虚拟起始时间
+    finish: float  # 虚拟结束时间
+    seq: int
+    granted: asyncio.Future
+
+
+@dataclass
+class _Flow:
+    """某个用户在某个优先级上的作业队列"""
+    queue: Deque[_Job] = field(default_factory=deque)
+    last_finish: float = 0.0  # 该用户在本优先级上最近一个作业的虚拟结束时间
+
+
+@dataclass
+class _Lane:
+    """一个优先级：各用户的队列与本优先级的虚拟时间"""
+    flows: Dict[str, _Flow] = field(default_factory=dict)
+    vtime: float = 0.0
+    running: int = 0
+
+
+class FairScheduler:
+    """
+    单个线程池的调度器 (只在事件循环线程中使用)
+
+    优先级之间严格有序：有空位时先从高优先级取作业，已开始的作业不会被抢占；
+    reserved[p] 为优先级 p 预留的并发数，未被 p 占用的预留位不分给更低的优先级，
+    批量作业塞满队列时交互作业仍能立即拿到空位。
+    同一优先级内按用户加权公平排队 (起始时间公平排队，SFQ)：每个作业带有成本 cost 与权重 weight，入队时
+        start = max(虚拟时间, 该用户上一作业的 finish)，finish = start + cost / weight；
+    在各用户的队首作业中选 finish 最小者执行，同一用户的作业按提交顺序执行。
+    同时运行的作业数不超过 slots (与线程池大小一致)，单个用户不超过 max_per_owner
+    """
+
+    def __init__(self, name: str, executor: Executor, slots: int, max_per_owner: int,
+                 reserved: Optional[Dict[Priority, int]] = None):
+        self.name = name
+        self.executor = executor
+        self.slots = max(slots, 1)
+        self.max_per_owner = max_per_owner
+        # 预留总数至多 slots - 1，最低优先级始终至少有一个空位可用
+        self.reserved: Dict[Priority, int] = {}
+        available = self.slots - 1
+        for priority in Priority:
+            count = min(max((reserved or {}).get(priority, 0), 0), available)
+            self.reserved[priority] = count
+            available -= count
+        self._lanes: Dict[Priority, _Lane] = {priority: _Lane() for priority in Priority}
+        self._owner_running: Dict[str, int] = {}
+        self._running = 0
+        self._seq = 0
+
+    async def run(self, owner: str, func: Callable, *args: Any, priority: Priority = Priority.NORMAL,
+                  cost: float = 1.0, weight: float = 1.0) -> Any:
+        """
+        排队等待空位后在线程池中执行 func(*args)
+
+        func 在调用方 contextvars 的副本中运行 (run_in_executor 本身不传递)，
+        工作线程内创建的 span 挂在调用方的 span 之下并计入所属任务的耗时分解。
+        调用方在执行期间被取消时线程仍会运行到结束，空位在线程结束时才释放
+        """
+        with span(f"{self.name}.queue", {"job.priority": priority.name.lower()}):
+            await self._acquire(owner, priority, cost, weight)
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        try:
+            future = loop.run_in_executor(self.executor, context.run, func, *args)
+        except BaseException:
+            self._release(owner, priority)
+            raise
+        future.add_done_callback(lambda done: self._job_done(done, owner, priority))
+        return await asyncio.shield(future)
+
+    def _job_done(self, future: asyncio.Future, owner: str, priority: Priority) -> None:
+        # 在事件循环线程中回调；调用方已被取消时结果无人读取，在此取出异常避免未读取告警
+        if not future.cancelled():
+            future.exception()
+        self._release(owner, priority)
+
+    async def _acquire(self, owner: str, priority: Priority, cost: float, weight: float) -> None:
+        lane = self._lanes[priority]
+        flow = lane.flows.setdefault(owner, _Flow())
+        start = max(lane.vtime, flow.last_finish)
+        self._seq += 1
+        job = _Job(owner, priority, start, start + max(cost, 0.0) / max(weight, 1e-6), self._seq,
+                   asyncio.get_running_loop().create_future())
+        flow.last_finish = job.finish
+        flow.queue.append(job)
+        self._gauge(JOBS_QUEUED, priority, 1)
+        queued_at = time.perf_counter()
+        self._dispatch()
+        try:
+            await job.granted
+            observe(QUEUE_WAIT_SECONDS, time.perf_counter() - queued_at,
+                    pool=self.name, priority=priority.name.lower())
+        except asyncio.CancelledError:
+            if job.granted.done() and not job.granted.cancelled():
+                self._release(owner, priority)  # 已分配空位后才被取消
+            else:
+                if job in flow.queue:
+                    flow.queue.remove(job)
+                    self._gauge(JOBS_QUEUED, priority, -1)
+                if flow.last_finish == job.finish:
+                    flow.last_finish = job.start
+                self._forget(lane, owner)
+            raise
+
+    def _gauge(self, gauge, priority: Priority, amount: int) -> None:
+        # 运行/排队作业数在变化时增减，多 worker 部署时 /metrics 汇总各进程的当前值
+        inc(gauge, amount, pool=self.name, priority=priority.name.lower())
+
+    def _release(self, owner: str, priority: Priority) -> None:
+        lane = self._lanes[priority]
+        self._running -= 1
+        lane.running -= 1
+        self._gauge(JOBS_RUNNING, priority, -1)
+        self._owner_running[owner] -= 1
+        if not self._owner_running[owner]:
+            del self._owner_running[owner]
+        self._forget(lane, owner)
+        self._dispatch()
+
+    @staticmethod
+    def _forget(lane: _Lane, owner: str) -> None:
+        # 队列已空且未领先于虚拟时间的用户不再保留状态，再次提交时与新用户等同
+        flow = lane.flows.get(owner)
+        if flow and not flow.queue and flow.last_finish <= lane.vtime:
+            del lane.flows[owner]
+        # 本优先级全部空闲时重置，之前的提交不再影响之后的排序
+        if not lane.running and not any(flow.queue for flow in lane.flows.values()):
+            lane.flows.clear()
+            lane.vtime = 0.0
+
+    def _unused_reserve(self, priority: Priority) -> int:
+        """高于 priority 的各优先级尚未占用的预留位"""
+        return sum(
+            max(self.reserved[p] - self._lanes[p].running, 0) for p in Priority if p < priority
+        )
+
+    def _next_job(self) -> Optional[_Job]:
+        for priority in Priority:
+            if self._running + self._unused_reserve(priority) >= self.slots:
+                continue
+            lane = self._lanes[priority]
+            candidates = []
+            for owner, flow in lane.flows.items():
+                while flow.queue and flow.queue[0].granted.done():
+                    flow.queue.popleft()  # 排队期间已被取消
+                    self._gauge(JOBS_QUEUED, priority, -1)
+                if flow.queue and (self.max_per_owner <= 0
+                                   or self._owner_running.get(owner, 0) < self.max_per_owner):
+                    candidates.append(flow.queue[0])
+            if candidates:
+                job = min(candidates, key=lambda j: (j.finish, j.seq))
+                lane.flows[job.owner].queue.popleft()
+                self._gauge(JOBS_QUEUED, priority, -1)
+                lane.vtime = max(lane.vtime, job.start)
+                return job
+        return None
+
+    def _dispatch(self) -> None:
+        while self._running < self.slots:
+            job = self._next_job()
+            if job is None:
+                return
+            self._running += 1
+            self._lanes[job.priority].running += 1
+            self._gauge(JOBS_RUNNING, job.priority, 1)
+            self._owner_running[job.owner] = self._owner_running.get(job.owner, 0) + 1
+            job.granted.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        """当前运行与排队情况，按优先级细分"""
+        lanes = {
+            priority.name.lower(): {
+                "running": lane.running,
+                "queued": sum(len(flow.queue) for flow in lane.flows.values()),
+                "reserved": self.reserved[priority],
+            }
+            for priority, lane in self._lanes.items()
+        }
+        return {
+            "running": self._running,
+            "queued": sum(lane["queued"] for lane in lanes.values()),
+            "owners": len({owner for lane in self._lanes.values() for owner in lane.flows}
+                          | set(self._owner_running)),
+            "slots": self.slots,
+            "lanes": lanes,
+        }
+
+
+class QuotaExceeded(Exception):
+    """超出每日配额"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        super().__init__(limit)
+
+
+class DailyQuota:
+    """
+    按自然日 (服务器本地时间) 计数的配额
+
+    Redis 可用时计数存于 quota:{名称}:{用户}:{日期}，多个 worker 共享；否则退化为进程内计数
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def consume(self, owner: str, amount: int = 1) -> None:
+        """占用 amount 个配额，不足时不占用并抛出 QuotaExceeded"""
+        if self.limit <= 0 or amount <= 0:
+            return
+        day = time.strftime("%Y%m%d")
+        if amount > self.limit or not self._try_consume(owner, day, amount):
+            raise QuotaExceeded(self.limit)
+
+    def _try_consume(self, owner: str, day: str, amount: int) -> bool:
+        client = redis_client.client
+        if client is None:
+            return self._consume_local(owner, day, amount)
+        key = f"quota:{self.name}:{owner}:{day}"
+        try:
+            used = client.incrby(key, amount)
+            if used == amount:
+                client.expire(key, 2 * 86400)
+            if used > self.limit:
+                client.decrby(key, amount)
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"配额计数失败，改用进程内计数: {e}")
+            return self._consume_local(owner, day, amount)
+
+    def _consume_local(self, owner: str, day: str, amount: int) -> bool:
+        with self._lock:
+            # 只保留当天的计数
+            for key in [k for k in self._counts if k[1] != day]:
+                del self._counts[key]
+            used = self._counts.get((owner, day), 0)
+            if used + amount > self.limit:
+                return False
+            self._counts[(owner, day)] = used + amount
+            return True
+
+
+def anonymous_owner(client_host: Optional[str]) -> str:
+    """未登录请求按客户端 IP 归属"""
+    return f"ip:{client_host or 'unknown'}"
+
+
+# 全局调度器与配额
+_RESERVED_SLOTS = {
+    Priority.INTERACTIVE: settings.interactive_reserved_slots,
+    Priority.NORMAL: settings.normal_reserved_slots,
+}
+generation_scheduler = FairScheduler(
+    "generate", generation_executor, settings.generation_workers, settings.user_max_concurrent_jobs,
+    _RESERVED_SLOTS,
+)
+conversion_scheduler = FairScheduler(
+    "convert", conversion_executor, settings.conversion_workers, settings.user_max_concurrent_jobs,
+    _RESERVED_SLOTS,
+)
+generation_quota = DailyQuota("generate", settings.daily_generation_quota)
+conversion_quota = DailyQuota("convert", settings.daily_conversion_quota)
@@ -0,0 +1,175 @@
+"""
+认证依赖
+解析 Authorization: Bearer 令牌并校验，校验结果按令牌哈希缓存在进程内的 TTL LRU 中，
+轮询任务进度等高频接口在缓存命中时不再重复 jwt.decode。
+接口通过 Depends(require_user_id) / Depends(require_user) / Depends(optional_user_id) 使用，
+解析出的用户 ID 与用户记录同时挂在 request.state 上，用户 ID 同时写入日志上下文；
+Depends(require_admin) 只允许 settings.admin_emails 中的用户访问；
+Depends(request_owner) 给出作业调度与配额使用的归属。
+浏览器跳转、<img> 等无法携带 Authorization 头的下载与预览请求使用 signed_url 生成的短期链接，
+由 Depends(download_user_id) 校验链接中绑定任务的下载令牌
+"""
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from .auth import AuthService
+from .logging_config import user_id_var
+from .scheduler import anonymous_owner
+
+_BEARER_PREFIX = "bearer "
+# 下载令牌的 scope 声明，带 scope 的令牌只能用于其绑定的任务，不能作为登录令牌
+DOWNLOAD_SCOPE = "download"
+
+
+class TokenCache:
+    """
+    已校验令牌的声明缓存
+
+    键为令牌的 SHA-256 (不在内存中保留原始令牌)，条目在 ttl 秒后或令牌自身 exp 到期时失效，
+    以先到者为准；超过 maxsize 时淘汰最近最少使用的条目。只缓存校验通过的令牌
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, claims["exp"])
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# 全局令牌缓存
+token_cache = TokenCache(settings.token_cache_size, settings.token_cache_ttl)
+
+
+def verify_token(token: str) -> Optional[Dict[str, Any]]:
+    """校验登录令牌并返回声明 (缓存命中时不解码)，令牌无效、缺少 sub 或为下载令牌时返回 None"""
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = AuthService.decode_token(token)
+        if not claims or not claims.get("sub") or claims.get("scope"):
+            return None
+        token_cache.put(token, claims)
+    return claims
+
+
+def create_download_token(task_id: str, user_id: str) -> str:
+    """签发绑定单个任务的短期下载令牌，settings.download_token_ttl 秒后过期"""
+    return AuthService.create_access_token(
+        {"sub": user_id, "task": task_id, "scope": DOWNLOAD_SCOPE},
+        timedelta(seconds=settings.download_token_ttl),
+    )
+
+
+def signed_url(url: Optional[str], task_id: str, user_id: Optional[str]) -> Optional[str]:
+    """给登录用户任务的下载或预览链接附加下载令牌 (token 查询参数)；匿名任务的链接原样返回"""
+    if not url or not user_id:
+        return url
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}token={create_download_token(task_id, user_id)}"
+
+
+def _bearer_token(request: Request) -> Optional[str]:
+    header = request.headers.get("Authorization")
+    if not header or not header.lower().startswith(_BEARER_PREFIX):
+        return None
+    return header[len(_BEARER_PREFIX):].strip() or None
+
+
+async def optional_user_id(request: Request) -> Optional[str]:
+    """可选认证：未提供令牌或令牌无效时返回 None (按匿名请求处理)"""
+    token = _bearer_token(request)
+    claims = verify_token(token) if token else None
+    request.state.user_id = claims["sub"] if claims else None
+    user_id_var.set(request.state.user_id)
+    return request.state.user_id
+
+
+async def download_user_id(request: Request, user_id: Optional[str] = Depends(optional_user_id)) -> Optional[str]:
+    """
+    下载与预览接口的认证：优先使用 Authorization 头，否则校验 token 查询参数中的下载令牌，
+    令牌须绑定路径中的 task_id；两者都没有或无效时返回 None (按匿名请求处理)
+    """
+    if user_id:
+        return user_id
+    token = request.query_params.get("token")
+    claims = AuthService.decode_token(token) if token else None
+    if not claims or claims.get("scope") != DOWNLOAD_SCOPE or claims.get("task") != request.path_params.get("task_id"):
+        return None
+    request.state.user_id = claims.get("sub")
+    user_id_var.set(request.state.user_id)
+    return request.state.user_id
+
+
+async def require_user_id(request: Request) -> str:
+    """必须认证：返回令牌中的用户 ID，不查询用户存储"""
+    token = _bearer_token(request)
+    if not token:
+        raise HTTPException(status_code=401, detail="未提供认证令牌")
+    claims = verify_token(token)
+    if not claims:
+        raise HTTPException(status_code=401, detail="无效的认证令牌")
+    request.state.user_id = claims["sub"]
+    user_id_var.set(claims["sub"])
+    return claims["sub"]
+
+
+async def require_user(request: Request, user_id: str = Depends(require_user_id)) -> Dict[str, Any]:
+    """必须认证并加载用户记录"""
+    user = await run_in_threadpool(AuthService.get_user, user_id)
+    if not user:
+        raise HTTPException(status_code=401, detail="用户不存在")
+    request.state.user = user
+    return user
+
+
+async def require_admin(user: Dict[str, Any] = Depends(require_user)) -> Dict[str, Any]:
+    """必须是管理员 (邮箱在 settings.admin_emails 中)"""
+    if (user.get("email") or "").lower() not in settings.admin_emails_list:
+        raise HTTPException(status_code=403, detail="需要管理员权限")
+    return user
+
+
+async def request_owner(request: Request, user_id: Optional[str] = Depends(optional_user_id)) -> str:
+    """作业归属：登录用户为用户 ID，未登录请求为客户端 IP"""
+    return user_id or anonymous_owner(request.client.host if request.client else None)
@@ -0,0 +1,471 @@
+"""
+幻灯片预览渲染器
+直接根据大纲与主题用 Pillow 绘制预览图，几何参数与 PPTGenerator 的 add_*_slide 保持一致，
+非模板模式生成的 PPT 预览无需启动 LibreOffice
+"""
+import re
+import logging
+from typing import List, Optional, Sequence, Tuple
+from PIL import Image, ImageDraw
+from pptx.enum.shapes import MSO_SHAPE
+from ..config import settings
+from ..models import SlideContent, SlideLayout, ThemeStyle
+from .chart_data import normalize_data_points
+from .fonts import load_font
+from .ppt_generator import PPTGenerator
+from .text_fit import (
+    BULLET_BOX, COLUMN_BOX, INSET_X, INSET_Y, LINE_SPACING, WRAP_TOKEN, fit_text, timeline_labels,
+)
+from .table_builder import (
+    CELL_MARGIN_X, ROW_HEIGHT, TABLE_LEFT, TABLE_TOP, TABLE_WIDTH, column_widths, font_size, normalize_table,
+    page_title, paginate, table_style,
+)
+
+logger = logging.getLogger("ai-ppt.slide-renderer")
+
+# Office 默认图表配色 (accent1-6)
+CHART_COLORS = [(68, 114, 196), (237, 125, 49), (165, 165, 165), (255, 192, 0), (91, 155, 213), (112, 173, 71)]
+CHART_TEXT_COLOR = (89, 89, 89)
+GRID_COLOR = (217, 217, 217)
+# 表格样式的单元格边框颜色
+TABLE_BORDER_COLOR = (255, 255, 255)
+# 默认母版占位符文字颜色
+PLACEHOLDER_TEXT_COLOR = (0, 0, 0)
+SUBTITLE_TEXT_COLOR = (137, 137, 137)
+
+CHART_LAYOUTS = {
+    SlideLayout.DATA_COLUMN: "column",
+    SlideLayout.DATA_BAR: "bar",
+    SlideLayout.DATA_LINE: "line",
+    SlideLayout.DATA_PIE: "pie",
+    SlideLayout.DATA_AREA: "area",
+    SlideLayout.DATA_STACKED: "stacked",
+}
+
+# 预览字体不含彩色 Emoji 字形，绘制前去掉 BMP 以外的字符
+_NON_BMP = re.compile(r"[\U00010000-\U0010FFFF]")
+
+Box = Tuple[float, float, float, float]
+
+
+def _rgb(hex_color: str) -> Tuple[int, int, int]:
+    return tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+class SlideRenderer:
+    """基于 Pillow 的幻灯片预览渲染器"""
+
+    SLIDE_WIDTH = 13.33
+    SLIDE_HEIGHT = 7.5
+
+    def __init__(self, theme: ThemeStyle = ThemeStyle.BUSINESS, dpi: Optional[int] = None):
+        self.theme = PPTGenerator.THEMES.get(theme, PPTGenerator.THEMES[ThemeStyle.BUSINESS])
+        self.dpi = dpi or settings.preview_dpi
+        self.size = (self._px(self.SLIDE_WIDTH), self._px(self.SLIDE_HEIGHT))
+
+    # ---------- 基础工具 ----------
+
+    def _px(self, inches: float) -> int:
+        return round(inches * self.dpi)
+
+    def _pt(self, points: float) -> int:
+        return max(round(points * self.dpi / 72), 1)
+
+    def _font(self, size_pt: float, bold: bool = False):
+        return load_font(self.theme["font_name"], self._pt(size_pt), bold)
+
+    def _new_slide(self) -> Tuple[Image.Image, ImageDraw.ImageDraw]:
+        image = Image.new("RGB", self.size, tuple(self.theme["bg_color"]))
+        return image, ImageDraw.Draw(image)
+
+    @staticmethod
+    def _wrap(text: str, font, max_width: float) -> List[str]:
+        lines, current = [], ""
+        for token in WRAP_TOKEN.findall(text):
+            candidate = current + token
+            if current and font.getlength(candidate) > max_width:
+                lines.append(current.rstrip())
+                current = token.lstrip()
+            else:
+                current = candidate
+        if current.strip() or not lines:
+            lines.append(current.rstrip())
+        return lines
+
+    def _text(self, draw: ImageDraw.ImageDraw, paragraphs: Sequence[str], box: Box, size_pt: float, color,
+              bold: bool = False, align: str = "left", anchor: str = "top", wrap: bool = True,
+              space_before_pt: float = 0) -> None:
+        """在文本框 (英寸坐标) 内绘制段落，换行与内边距规则与 PowerPoint 文本框一致"""
+        x, y, w, h = box
+        font = self._font(size_pt, bold)
+        line_height = self._pt(size_pt) * LINE_SPACING
+        inner_left = self._px(x + INSET_X)
+        inner_width = self._px(w - 2 * INSET_X)
+
+        layout = []  # (相对 y, 文本行)
+        cursor = 0.0
+        for idx, paragraph in enumerate(paragraphs):
+            if idx > 0 or space_before_pt:
+                cursor += self._pt(space_before_pt)
+            lines = self._wrap(_NON_BMP.sub("", paragraph), font, inner_width) if wrap else [_NON_BMP.sub("", paragraph)]
+            for line in lines:
+                layout.append((cursor, line))
+                cursor += line_height
+
+        top = self._px(y + INSET_Y)
+        if anchor == "middle":
+            top = self._px(y) + (self._px(h) - cursor) / 2
+        for offset, line in layout:
+            if align == "center":
+                left = inner_left + (inner_width - font.getlength(line)) / 2
+            else:
+                left = inner_left
+            draw.text((left, top + offset), line, font=font, fill=tuple(color))
+
+    def _rect(self, draw: ImageDraw.ImageDraw, box: Box, fill=None, outline=None, width_pt: float = 0,
+              shape=MSO_SHAPE.RECTANGLE) -> None:
+        x, y, w, h = box
+        xy = [self._px(x), self._px(y), self._px(x + w), self._px(y + h)]
+        fill = tuple(fill) if fill is not None else None
+        outline = tuple(outline) if outline is not None else None
+        width = self._pt(width_pt) if width_pt else 1
+        if shape == MSO_SHAPE.OVAL:
+            draw.ellipse(xy, fill=fill, outline=outline, width=width)
+        elif shape == MSO_SHAPE.ROUNDED_RECTANGLE:
+            radius = min(xy[2] - xy[0], xy[3] - xy[1]) * 0.1667
+            draw.rounded_rectangle(xy, radius=radius, fill=fill, outline=outline, width=width)
+        elif shape == MSO_SHAPE.CHEVRON:
+            notch = min(xy[2] - xy[0], xy[3] - xy[1]) * 0.5
+            mid_y = (xy[1] + xy[3]) / 2
+            points = [(xy[0], xy[1]), (xy[2] - notch, xy[1]), (xy[2], mid_y), (xy[2] - notch, xy[3]),
+                      (xy[0], xy[3]), (xy[0] + notch, mid_y)]
+            draw.polygon(points, fill=fill, outline=outline)
+        else:
+            draw.rectangle(xy, fill=fill, outline=outline, width=width if outline else 0)
+
+    def _page_header(self, draw: ImageDraw.ImageDraw, title: str, icon: Optional[str] = None) -> None:
+        """对应 PPTGenerator._add_page_header"""
+        self._rect(draw, (0.5, 0.4, 0.2, 0.8), fill=self.theme["accent_color"])
+        display_title = f"{icon} {title}" if icon else title
+        self._text(draw, [display_title], (0.9, 0.35, 12, 1), 36, self.theme["title_color"], bold=True, wrap=False)
+
+    # ---------- 各版式 ----------
+
+    def render_title_slide(self, title: str, subtitle: str = "AI-PPT Architect 智绘大纲") -> Image.Image:
+        """对应 add_title_slide：默认版式 0 的标题/副标题占位符"""
+        image, draw = self._new_slide()
+        self._rect(draw, (0, 0, 0.8, self.SLIDE_HEIGHT), fill=self.theme["accent_color"],
+                   shape=self.theme["decoration_shape"])
+        self._text(draw, [title], (0.75, 2.33, 8.5, 1.61), 44, PLACEHOLDER_TEXT_COLOR, align="center", anchor="middle")
+        self._text(draw, [subtitle], (1.5, 4.25, 7.0, 1.92), 32, SUBTITLE_TEXT_COLOR, align="center")
+        return image
+
+    def render_bullet_slide(self, slide: SlideContent) -> Image.Image:
+        image, draw = self._new_slide()
+        self._page_header(draw, slide.title, slide.icon)
+        size = fit_text(slide.bullet_points, BULLET_BOX, self.theme["font_name"]).size
+        self._text(draw, [f"●  {p}" for p in slide.bullet_points], (1.2, 1.8, 11, 4.5), size,
+                   self.theme["text_color"], space_before_pt=BULLET_BOX.space_at(size))
+        return image
+
+    def render_column_slide(self, slide: SlideContent) -> Image.Image:
+        """对应 add_column_slide：默认版式 3 的两个内容占位符"""
+        image, draw = self._new_slide()
+        self._page_header(draw, slide.title, slide.icon)
+        mid = len(slide.bullet_points) // 2
+        for points, left in ((slide.bullet_points[:mid], 0.5), (slide.bullet_points[mid:], 5.08)):
+            size = fit_text(points, COLUMN_BOX, self.theme["font_name"]).size
+            self._text(draw, [f"•  {p}" for p in points], (left, 1.75, 4.42, 4.95), size, PLACEHOLDER_TEXT_COLOR,
+                       space_before_pt=COLUMN_BOX.space_at(size))
+        return image
+
+    def render_process_slide(self, slide: SlideContent) -> Image.Image:
+        image, draw = self._new_slide()
+        self._page_header(draw, slide.title, slide.icon)
+        count = min(len(slide.bullet_points), 4)
+        if count == 0:
+            return image
+        shape_w, shape_h, gap = 2.8, 1.5, 0.2
+        start_x = (self.SLIDE_WIDTH - (shape_w * count + gap * (count - 1))) / 2
+        for i in range(count):
+            x = start_x + i * (shape_w + gap)
+            self._rect(draw, (x, 3, shape_w, shape_h), fill=self.theme["accent_color"],
+                       outline=self.theme["title_color"], width_pt=0.75, shape=MSO_SHAPE.ROUNDED_RECTANGLE)
+            self._text(draw, [slide.bullet_points[i]], (x, 3, shape_w, shape_h), 18, self.theme["title_color"],
+                       bold=True, align="center", anchor="middle")
+            if i < count - 1:
+                ax, ay, aw, ah = x + shape_w + 0.02, 3.5, 0.16, 0.5
+                draw.polygon([(self._px(ax), self._px(ay + ah * 0.25)), (self._px(ax + aw * 0.5), self._px(ay + ah * 0.25)),
+                              (self._px(ax + aw * 0.5), self._px(ay)), (self._px(ax + aw), self._px(ay + ah / 2)),
+                              (self._px(ax + aw * 0.5), self._px(ay + ah)), (self._px(ax + aw * 0.5), self._px(ay + ah * 0.75)),
+                              (self._px(ax), self._px(ay + ah * 0.75))], fill=tuple(self.theme["title_color"]))
+        return image
+
+    def render_chart_slide(self, slide: SlideContent, kind: str) -> Image.Image:
+        image, draw = self._new_slide()
+        self._page_header(draw, slide.title, slide.icon)
+        if slide.bullet_points:
+            self._text(draw, [f"• {p}" for p in slide.bullet_points], (0.8, 1.8, 4.2, 5), 18,
+                       self.theme["text_color"], space_before_pt=12)
+            chart_box = (5.2, 1.8, 7.5, 5)
+        else:
+            chart_box = (1.5, 1.8, 10.5, 5)
+        categories, series = self._chart_series(slide)
+        self._draw_chart(draw, chart_box, kind, categories, series)
+        return image
+
+    def render_timeline_slide(self, slide: SlideContent) -> Image.Image:
+        image, draw = self._new_slide()
+        self._page_header(draw, slide.title, slide.icon)
+        line_y, line_start, line_end = 4.0, 1.0, self.SLIDE_WIDTH - 1
+        self._rect(draw, (line_start, line_y, line_end - line_start, 4 / 72), fill=self.theme["accent_color"])
+        points = slide.bullet_points or ["开始", "过程", "结束"]
+        gap = (line_end - line_start) / max(len(points) - 1, 1)
+        r = 0.2
+        size, labels = timeline_labels(points, self.theme["font_name"])
+        for i, point in enumerate(labels):
+            x = line_start + i * gap
+            self._rect(draw, (x - r / 2, line_y - r / 2 + 2 / 72, r, r), fill=self.theme["title_color"],
+                       outline=self.theme["accent_color"], width_pt=2, shape=MSO_SHAPE.OVAL)
+            text_y = line_y - 1.2 if i % 2 == 0 else line_y + 0.5
+            self._text(draw, [point], (x - 1, text_y, 2, 0.8), size, self.theme["text_color"], bold=True,
+                       align="center")
+        return image
+
+    def render_big_number_slide(self, slide: SlideContent) -> Image.Image:
+        image, draw = self._new_slide()
+        self._page_header(draw, slide.title, slide.icon)
+        cx, cy = self.SLIDE_WIDTH / 2, self.SLIDE_HEIGHT / 2
+        big_val = "100%"
+        if slide.data_points:
+            first_dp = slide.data_points[0]
+            big_val = str(first_dp.get("value", first_dp.get("label", "100%")))
+        self._text(draw, [big_val], (cx - 3, cy - 1.5, 6, 2), 120, self.theme["accent_color"], bold=True,
+                   align="center", wrap=False)
+        if slide.bullet_points:
+            self._text(draw, [slide.bullet_points[0]], (cx - 4, cy + 1, 8, 1.5), 24, self.theme["text_color"],
+                       align="center")
+        return image
+
+    def render_table_slides(self, slide: SlideContent) -> List[Image.Image]:
+        """对应 add_table_slide：按相同规则分页，每页一张图"""
+        table = normalize_table(slide.data_points)
+        if not table.headers:
+            return [self.render_bullet_slide(slide)]
+        pages = paginate(table, settings.table_rows_per_slide)
+        style = table_style(self.theme)
+        size = font_size(len(table.headers))
+        header_font, body_font = self._font(size, bold=True), self._font(size)
+        header_fill, header_color = _rgb(style.header_fill), _rgb(style.header_color)
+        body_fills, body_color = [_rgb(fill) for fill in style.body_fills], _rgb(style.body_color)
+        # 与 PPTGenerator 相同的列宽分配，按英寸计算
+        widths = [w / 1000 for w in column_widths(table, round(TABLE_WIDTH * 1000))]
+        lefts = [TABLE_LEFT + sum(widths[:j]) for j in range(len(widths))]
+
+        images = []
+        for page, rows in enumerate(pages, start=1):
+            image, draw = self._new_slide()
+            self._page_header(draw, page_title(slide.title, page, len(pages)), slide.icon)
+            for i, row in enumerate([table.headers] + list(rows)):
+                y = TABLE_TOP + i * ROW_HEIGHT
+                is_header = i == 0
+                self._rect(draw, (TABLE_LEFT, y, TABLE_WIDTH, ROW_HEIGHT),
+                           fill=header_fill if is_header else body_fills[(i - 1) % 2])
+                font = header_font if is_header else body_font
+                for j, text in enumerate(row):
+                    inner_w = self._px(widths[j] - 2 * CELL_MARGIN_X)
+                    line = self._clip(_NON_BMP.sub("", text), font, inner_w)
+                    if is_header:
+                        x = self._px(lefts[j] + CELL_MARGIN_X) + (inner_w - font.getlength(line)) / 2
+                    elif table.numeric[j]:
+                        x = self._px(lefts[j] + widths[j] - CELL_MARGIN_X) - font.getlength(line)
+                    else:
+                        x = self._px(lefts[j] + CELL_MARGIN_X)
+                    top = self._px(y + ROW_HEIGHT / 2) - self._pt(size) / 2
+                    draw.text((x, top), line, font=font, fill=header_color if is_header else body_color)
+            # 单元格边框
+            bottom = self._px(TABLE_TOP + (len(rows) + 1) * ROW_HEIGHT)
+            for left in lefts[1:]:
+                draw.line([(self._px(left), self._px(TABLE_TOP)), (self._px(left), bottom)],
+                          fill=TABLE_BORDER_COLOR, width=1)
+            for i in range(1, len(rows) + 1):
+                y = self._px(TABLE_TOP + i * ROW_HEIGHT)
+                draw.line([(self._px(TABLE_LEFT), y), (self._px(TABLE_LEFT + TABLE_WIDTH), y)],
+                          fill=TABLE_BORDER_COLOR, width=1)
+            images.append(image)
+        return images
+
+    @staticmethod
+    def _clip(text: str, font, max_width: float) -> str:
+        """单行显示，超出宽度时截断并加省略号 (PowerPoint 中为换行，预览只做近似)"""
+        if font.getlength(text) <= max_width:
+            return text
+        while text and font.getlength(text + "…") > max_width:
+            text = text[:-1]
+        return text + "…"
+
+    def render_thank_you_slide(self, message: str = "感谢聆听") -> Image.Image:
+        image, draw = self._new_slide()
+        cx, cy = self.SLIDE_WIDTH / 2, self.SLIDE_HEIGHT / 2
+        box_w, box_h = 8, 3
+        self._rect(draw, (cx - box_w / 2, cy - box_h / 2, box_w, box_h), outline=self.theme["accent_color"], width_pt=5)
+        self._text(draw, [message], (cx - box_w / 2, cy - 0.6, box_w, 1.2), 64, self.theme["title_color"], bold=True,
+                   align="center", wrap=False)
+        return image
+
+    def render_slide(self, slide: SlideContent) -> Image.Image:
+        """按版式分派，与 PPTGenerator.generate 的分支保持一致"""
+        if slide.layout == SlideLayout.TWO_COLUMN:
+            return self.render_column_slide(slide)
+        if slide.layout == SlideLayout.PROCESS:
+            return self.render_process_slide(slide)
+        if slide.layout in CHART_LAYOUTS:
+            return self.render_chart_slide(slide, CHART_LAYOUTS[slide.layout])
+        if slide.layout == SlideLayout.TIMELINE:
+            return self.render_timeline_slide(slide)
+        if slide.layout == SlideLayout.BIG_NUMBER:
+            return self.render_big_number_slide(slide)
+        if slide.layout == SlideLayout.TABLE:
+            # 表格可能分为多页，这里只返回第一页；整份文稿请使用 render
+            return self.render_table_slides(slide)[0]
+        if slide.layout == SlideLayout.THANK_YOU:
+            return self.render_thank_you_slide(slide.title)
+        return self.render_bullet_slide(slide)
+
+    def render(self, title: str, slides: List[SlideContent]) -> List[Image.Image]:
+        """渲染整份演示文稿 (非模板模式)，页序与 PPTGenerator.generate 输出一致"""
+        images = [self.render_title_slide(title)]
+        for slide in slides:
+            if slide.layout == SlideLayout.TITLE:
+                continue
+            if slide.layout == SlideLayout.TABLE:
+                images.extend(self.render_table_slides(slide))
+                continue
+            images.append(self.render_slide(slide))
+        return images
+
+    # ---------- 图表 ----------
+
+    @staticmethod
+    def _chart_series(slide: SlideContent) -> Tuple[List[str], List[Tuple[str, List[float]]]]:
+        """与 add_chart_slide 相同的数据规整规则，缺失值按 0 绘制"""
+        table = normalize_data_points(slide.data_points)
+        return list(table.categories), table.series(fill=0.0)
+
+    def _draw_chart(self, draw: ImageDraw.ImageDraw, box: Box, kind: str, categories: List[str],
+                    series: List[Tuple[str, List[float]]]) -> None:
+        x, y, w, h = box
+        label_font = self._font(10)
+        left, top = self._px(x + 0.1), self._px(y + 0.15)
+        right, bottom = self._px(x + w - 0.1), self._px(y + h - 0.45)
+
+        # 图例
+        legend = categories if kind == "pie" else [name for name, _ in series]
+        widths = [self._pt(10) + 6 + label_font.getlength(name) + 16 for name in legend]
+        lx = (left + right - sum(widths)) / 2
+        ly = self._px(y + h - 0.3)
+        for i, name in enumerate(legend):
+            color = CHART_COLORS[i % len(CHART_COLORS)]
+            draw.rectangle([lx, ly, lx + self._pt(7), ly + self._pt(7)], fill=color)
+            draw.text((lx + self._pt(7) + 6, ly - self._pt(2)), name, font=label_font, fill=CHART_TEXT_COLOR)
+            lx += widths[i]
+
+        if kind == "pie":
+            values = [max(v, 0) for v in series[0][1]] if series else []
+            total = sum(values) or 1
+            diameter = min(right - left, bottom - top)
+            cx, cy = (left + right) / 2, (top + bottom) / 2
+            bbox = [cx - diameter / 2, cy - diameter / 2, cx + diameter / 2, cy + diameter / 2]
+            angle = -90.0
+            for i, value in enumerate(values):
+                sweep = value / total * 360
+                if sweep > 0:
+                    draw.pieslice(bbox, angle, angle + sweep, fill=CHART_COLORS[i % len(CHART_COLORS)], outline=(255, 255, 255))
+                angle += sweep
+            return
+
+        n_cat = max(len(categories), 1)
+        if kind == "stacked":
+            max_v = max([sum(max(s[1][i], 0) for s in series) for i in range(len(categories))] or [1])
+            min_v = min([sum(min(s[1][i], 0) for s in series) for i in range(len(categories))] or [0])
+        else:
+            all_values = [v for _, values in series for v in values] or [0]
+            max_v, min_v = max(max(all_values), 0), min(min(all_values), 0)
+        span = (max_v - min_v) or 1
+
+        # 坐标轴区域：类别轴留出标签空间
+        axis_label_w = self._px(0.5)
+        if kind == "bar":
+            left += self._px(1.0)
+        else:
+            left += axis_label_w
+            bottom -= self._pt(14)
+
+        def value_pos(v: float) -> float:
+            if kind == "bar":
+                return left + (v - min_v) / span * (right - left)
+            return bottom - (v - min_v) / span * (bottom - top)
+
+        for step in range(5):
+            v = min_v + span * step / 4
+            if kind == "bar":
+                gx = value_pos(v)
+                draw.line([gx, top, gx, bottom], fill=GRID_COLOR)
+            else:
+                gy = value_pos(v)
+                draw.line([left, gy, right, gy], fill=GRID_COLOR)
+                text = f"{v:g}"
+                draw.text((left - label_font.getlength(text) - 4, gy - self._pt(6)), text, font=label_font, fill=CHART_TEXT_COLOR)
+
+        if kind == "bar":
+            band = (bottom - top) / n_cat
+            for ci, category in enumerate(categories):
+                # 条形图第一个类别位于底部
+                band_top = bottom - (ci + 1) * band
+                text = category[:8]
+                draw.text((left - label_font.getlength(text) - 4, band_top + band / 2 - self._pt(6)), text,
+                          font=label_font, fill=CHART_TEXT_COLOR)
+                bar_h = band * 0.6 / max(len(series), 1)
+                for si, (_, values) in enumerate(series):
+                    y0 = band_top + band * 0.2 + si * bar_h
+                    x0, x1 = sorted((value_pos(0), value_pos(values[ci])))
+                    draw.rectangle([x0, y0, x1, y0 + bar_h], fill=CHART_COLORS[si % len(CHART_COLORS)])
+            return
+
+        band = (right - left) / n_cat
+        for ci, category in enumerate(categories):
+            text = category[:10]
+            draw.text((left + ci * band + (band - label_font.getlength(text)) / 2, bottom + 4), text,
+                      font=label_font, fill=CHART_TEXT_COLOR)
+
+        if kind in ("column", "stacked"):
+            for ci in range(len(categories)):
+                base_pos, base_neg = 0.0, 0.0
+                bar_w = band * 0.6 / (1 if kind == "stacked" else max(len(series), 1))
+                for si, (_, values) in enumerate(series):
+                    v = values[ci]
+                    if kind == "stacked":
+                        x0 = left + ci * band + band * 0.2
+                        start = base_pos if v >= 0 else base_neg
+                        y0, y1 = sorted((value_pos(start), value_pos(start + v)))
+                        if v >= 0:
+                            base_pos += v
+                        else:
+                            base_neg += v
+                    else:
+                        x0 = left + ci * band + band * 0.2 + si * bar_w
+                        y0, y1 = sorted((value_pos(0), value_pos(v)))
+                    draw.rectangle([x0, y0, x0 + bar_w, y1], fill=CHART_COLORS[si % len(CHART_COLORS)])
+            return
+
+        for si, (_, values) in enumerate(series):
+            color = CHART_COLORS[si % len(CHART_COLORS)]
+            points = [(left + ci * band + band / 2, value_pos(v)) for ci, v in enumerate(values)]
+            if kind == "area" and points:
+                polygon = [(points[0][0], value_pos(0))] + points + [(points[-1][0], value_pos(0))]
+                draw.polygon(polygon, fill=color)
+            elif len(points) > 1:
+                draw.line(points, fill=color, width=self._pt(2.25), joint="curve")
+            elif points:
+                px, py = points[0]
+                draw.ellipse([px - 3, py - 3, px + 3, py + 3], fill=color)
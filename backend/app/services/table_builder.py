@@ -0,0 +1,241 @@
+"""
+原生表格构建
+将 data_points 规整为表头与单元格文本，按页拆分后直接拼接 DrawingML 表格 XML (a:tbl)。
+python-pptx 逐个单元格设置文本与字体时每次都要查找、创建子元素，千行级表格耗时以秒计；
+这里按列预先生成单元格模板，每页表格只解析一次 XML
+"""
+import re
+import json
+import math
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from .chart_data import DEFAULT_SERIES_NAME
+
+# 表格区域 (英寸)，PPTGenerator 与 SlideRenderer 共用
+TABLE_LEFT = 0.5
+TABLE_TOP = 1.6
+TABLE_WIDTH = 12.33
+ROW_HEIGHT = 0.4
+
+# 单元格内边距 (英寸)
+CELL_MARGIN_X = 0.1
+CELL_MARGIN_Y = 0.05
+
+# 单元格文本上限，过长的文本截断，避免换行撑高行高打乱分页
+MAX_CELL_CHARS = 60
+
+# 多系列数据的分类列表头
+LABEL_HEADER = "项目"
+# 图表格式数据的键 -> 表头
+_KEY_HEADERS = {"label": LABEL_HEADER, "value": DEFAULT_SERIES_NAME}
+
+# python-pptx add_table 默认使用的表格样式 (中度样式 2 - 强调 1)，提供单元格边框
+TABLE_STYLE_ID = "{5C22544A-7EE6-4342-B048-85BDC9FD1C3A}"
+
+_EMU_PER_INCH = 914400
+# XML 1.0 不允许的控制字符
+_INVALID_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+@dataclass(frozen=True)
+class TableData:
+    """规整后的表格：rows 为单元格文本，numeric[j] 表示第 j 列全部为数值 (右对齐)"""
+    headers: Tuple[str, ...]
+    rows: Tuple[Tuple[str, ...], ...]
+    numeric: Tuple[bool, ...]
+
+
+@dataclass(frozen=True)
+class TableStyle:
+    """表格配色与字体，颜色为 6 位十六进制 RGB"""
+    font_name: str
+    header_fill: str
+    header_color: str
+    body_fills: Tuple[str, str]  # 奇偶行交替底色
+    body_color: str
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def format_cell(value: Any) -> str:
+    """单元格显示文本：数值加千分位，浮点数最多保留两位小数"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "是" if value else "否"
+    if isinstance(value, int):
+        return f"{value:,}"
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return ""
+        return f"{value:,.2f}".rstrip("0").rstrip(".")
+    if isinstance(value, (dict, list)):
+        text = json.dumps(value, ensure_ascii=False)
+    else:
+        text = str(value)
+    text = text.strip()
+    return text if len(text) <= MAX_CELL_CHARS else text[:MAX_CELL_CHARS - 1] + "…"
+
+
+def normalize_table(points: Optional[Sequence[dict]]) -> TableData:
+    """
+    规整 data_points 为表格
+
+    每个数据点为一行，列为全部数据点键的并集 (按首次出现顺序)：
+        明细行   [{"地区": "华东", "营收": 1200, "同比": "12%"}, ...]
+        图表格式 [{"label": "A", "value": 30}, ...] 或 [{"label": "2023", "series": {...}}, ...]
+                 与图表版式相同的数据可直接切换为表格展示
+    """
+    records = []
+    for point in points or []:
+        if not isinstance(point, dict):
+            continue
+        record = {}
+        for key, value in point.items():
+            if key == "series" and isinstance(value, dict):
+                record.update((str(name), v) for name, v in value.items())
+            else:
+                record[_KEY_HEADERS.get(key, str(key))] = value
+        records.append(record)
+
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    rows = tuple(tuple(format_cell(record.get(col)) for col in columns) for record in records)
+    numeric = tuple(
+        any(col in record for record in records)
+        and all(_is_number(record[col]) for record in records if record.get(col) is not None)
+        for col in columns
+    )
+    return TableData(tuple(columns), rows, numeric)
+
+
+def paginate(table: TableData, rows_per_page: int) -> List[Tuple[Tuple[str, ...], ...]]:
+    """按每页行数拆分表体，每页都会重复表头"""
+    rows_per_page = max(rows_per_page, 1)
+    return [table.rows[i:i + rows_per_page] for i in range(0, len(table.rows), rows_per_page)] or [()]
+
+
+def page_title(title: str, page: int, pages: int) -> str:
+    """分页后各页的标题，如 销售明细 (2/5)"""
+    return title if pages <= 1 else f"{title} ({page}/{pages})"
+
+
+def _hex(color: Sequence[int]) -> str:
+    return "%02X%02X%02X" % tuple(color)
+
+
+def table_style(theme: dict) -> TableStyle:
+    """
+    由 PPTGenerator 主题生成表格配色：表头以标题色为底、背景色为字，
+    表体在背景色与向标题色混合 8% 的底色间交替
+    """
+    bg, title = tuple(theme["bg_color"]), tuple(theme["title_color"])
+    band = tuple(round(b + (t - b) * 0.08) for b, t in zip(bg, title))
+    return TableStyle(
+        font_name=theme["font_name"],
+        header_fill=_hex(title),
+        header_color=_hex(bg),
+        body_fills=(_hex(bg), _hex(band)),
+        body_color=_hex(theme["text_color"]),
+    )
+
+
+def _text_width(text: str) -> int:
+    # 近似显示宽度：ASCII 计 1，中文等多字节字符计 2
+    return (len(text.encode("utf-8")) + len(text)) // 2
+
+
+def column_weights(table: TableData, sample: int = 200) -> List[float]:
+    """按各列 (表头与前 sample 行) 最长文本估算相对列宽，限制在 [4, 30] 之间避免过窄或独占整行"""
+    weights = []
+    for j, header in enumerate(table.headers):
+        longest = max([_text_width(header)] + [_text_width(row[j]) for row in table.rows[:sample]])
+        weights.append(float(min(max(longest, 4), 30)))
+    return weights
+
+
+def column_widths(table: TableData, total_width: int) -> List[int]:
+    """按 column_weights 分配总宽度 (EMU)，末列吸收取整误差"""
+    weights = column_weights(table)
+    total_weight = sum(weights) or 1.0
+    widths = [int(total_width * w / total_weight) for w in weights]
+    if widths:
+        widths[-1] += total_width - sum(widths)
+    return widths
+
+
+def font_size(column_count: int) -> int:
+    """单元格字号 (磅)：列数较多时缩小"""
+    if column_count <= 4:
+        return 14
+    if column_count <= 7:
+        return 12
+    return 10
+
+
+def _cell_template(style: TableStyle, size: int, fill: str, color: str, bold: bool,
+                   align: str) -> Tuple[str, str]:
+    """单元格 XML 模板 (文本之前, 文本之后)，中间填入已转义的文本"""
+    margin_x = int(CELL_MARGIN_X * _EMU_PER_INCH)
+    margin_y = int(CELL_MARGIN_Y * _EMU_PER_INCH)
+    font = escape(style.font_name, {'"': "&quot;"})
+    head = (
+        '<a:tc><a:txBody><a:bodyPr/><a:lstStyle/>'
+        f'<a:p><a:pPr algn="{align}"/><a:r>'
+        f'<a:rPr lang="zh-CN" sz="{size * 100}" b="{1 if bold else 0}" dirty="0">'
+        f'<a:solidFill><a:srgbClr val="{color}"/></a:solidFill>'
+        f'<a:latin typeface="{font}"/><a:ea typeface="{font}"/></a:rPr>'
+        '<a:t>'
+    )
+    tail = (
+        '</a:t></a:r></a:p></a:txBody>'
+        f'<a:tcPr marL="{margin_x}" marR="{margin_x}" marT="{margin_y}" marB="{margin_y}" anchor="ctr">'
+        f'<a:solidFill><a:srgbClr val="{fill}"/></a:solidFill></a:tcPr></a:tc>'
+    )
+    return head, tail
+
+
+def build_table_xml(headers: Sequence[str], rows: Sequence[Sequence[str]], numeric: Sequence[bool],
+                    widths: Sequence[int], row_height: int, style: TableStyle) -> str:
+    """
+    拼接完整的 a:tbl 元素
+
+    Args:
+        headers: 表头
+        rows: 本页表体单元格文本
+        numeric: 各列是否右对齐
+        widths: 各列宽度 (EMU)
+        row_height: 行高 (EMU)
+        style: 配色与字体
+    """
+    size = font_size(len(headers))
+    header_head, header_tail = _cell_template(style, size, style.header_fill, style.header_color, True, "ctr")
+    header_cells = [header_head + _escape(h) + header_tail for h in headers]
+    # 每种 (底色, 对齐) 组合的单元格模板只生成一次
+    body_templates = [
+        [_cell_template(style, size, fill, style.body_color, False, "r" if is_numeric else "l")
+         for is_numeric in numeric]
+        for fill in style.body_fills
+    ]
+
+    tr_open = f'<a:tr h="{row_height}">'
+    parts = [
+        '<a:tbl xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">',
+        f'<a:tblPr firstRow="1" bandRow="1"><a:tableStyleId>{TABLE_STYLE_ID}</a:tableStyleId></a:tblPr>',
+        "<a:tblGrid>", "".join(f'<a:gridCol w="{w}"/>' for w in widths), "</a:tblGrid>",
+        tr_open, "".join(header_cells), "</a:tr>",
+    ]
+    for i, row in enumerate(rows):
+        templates = body_templates[i % 2]
+        parts.append(tr_open)
+        parts.extend(head + _escape(text) + tail for (head, tail), text in zip(templates, row))
+        parts.append("</a:tr>")
+    parts.append("</a:tbl>")
+    return "".join(parts)
+
+
+def _escape(text: str) -> str:
+    return escape(_INVALID_XML_CHARS.sub("", text))
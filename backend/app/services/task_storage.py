@@ -0,0 +1,49 @@
+"""
+进程内任务存储
+task_id -> 任务数据的字典，增删任务与通过 set_status 修改状态时同步更新按状态统计的任务数指标。
+指标随状态变化写入而不是在抓取时统计：多个 worker 部署时每个进程的计数都是最新的，/metrics 汇总即为全局值
+"""
+from typing import Any, Dict, Optional
+
+from . import metrics
+
+
+def _status_label(status: Any) -> Optional[str]:
+    return getattr(status, "value", status)
+
+
+class TaskStorage(Dict[str, Dict]):
+    """
+    任务存储
+
+    任务状态须通过 set_status 修改 (直接给 task["status"] 赋值不会计入指标)；
+    以同一任务对象重复赋值 (如从 Redis 读回后写入) 不会重复计数
+    """
+
+    def __setitem__(self, task_id: str, task: Dict) -> None:
+        old = self.get(task_id)
+        if old is not task:
+            if old is not None:
+                metrics.task_status_changed(_status_label(old.get("status")), None)
+            metrics.task_status_changed(None, _status_label(task.get("status")))
+        super().__setitem__(task_id, task)
+
+    def __delitem__(self, task_id: str) -> None:
+        metrics.task_status_changed(_status_label(self[task_id].get("status")), None)
+        super().__delitem__(task_id)
+
+    def pop(self, task_id: str, *default: Any) -> Any:
+        if task_id in self:
+            metrics.task_status_changed(_status_label(self[task_id].get("status")), None)
+        return super().pop(task_id, *default)
+
+    def setdefault(self, task_id: str, task: Dict) -> Dict:
+        if task_id not in self:
+            self[task_id] = task
+        return self[task_id]
+
+    def set_status(self, task_id: str, status: Any) -> None:
+        """修改任务状态并更新指标"""
+        task = self[task_id]
+        metrics.task_status_changed(_status_label(task.get("status")), _status_label(status))
+        task["status"] = status
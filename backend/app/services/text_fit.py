@@ -0,0 +1,259 @@
+"""
+文本自适应排版
+按主题字体的字形宽度估算文本框中各段落换行后的行数与高度，
+在字号区间内选出能放下全部内容的最大字号；最小字号仍放不下时给出可容纳的段落数，
+其余内容拆分到续页。字宽以 em 为单位按字体缓存，每个字符只测量一次
+"""
+import re
+import logging
+import threading
+import unicodedata
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from ..models import SlideContent, SlideLayout
+from .fonts import find_font_file, load_font
+
+logger = logging.getLogger("ai-ppt.text_fit")
+
+# PowerPoint 文本框默认内边距 (英寸) 与单倍行距的近似行高
+INSET_X = 0.1
+INSET_Y = 0.05
+LINE_SPACING = 1.2
+
+# 断行单位：拉丁单词整体换行，其余字符 (中文等) 逐字换行
+WRAP_TOKEN = re.compile(r"[A-Za-z0-9_\-\.,:;!?%'\"()/]+\s*|\s+|.")
+
+# 测量字宽时加载字体的像素字号，越大取整误差越小
+_REFERENCE_SIZE = 200
+# 预先测量的字符：可打印 ASCII 与常用中文标点
+_PRELOAD_CHARS = "".join(chr(c) for c in range(32, 127)) + "，。、；：？！“”‘’（）《》【】—…·●▪•"
+
+# 续页标题后缀
+CONTINUATION_SUFFIX = "（续）"
+# 时间轴单页最多节点数，超出拆分到续页 (节点文字框宽 2 英寸，再多会相互重叠)
+TIMELINE_MAX_NODES = 8
+
+
+class FontMetrics:
+    """单个字体 (字体名 + 粗细) 的字宽表，单位 em"""
+
+    def __init__(self, font_name: str, bold: bool = False):
+        self.font_name = font_name
+        self.bold = bold
+        self._font = load_font(font_name, _REFERENCE_SIZE, bold)
+        # 回退字体 (如 DejaVu) 不含中文字形时测得的是缺字符号的宽度，全角字符统一按 1em 计
+        self._has_font_file = find_font_file(font_name, bold) is not None
+        self._widths: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.measure(_PRELOAD_CHARS)
+
+    def _char_width(self, char: str) -> float:
+        if unicodedata.east_asian_width(char) in ("W", "F"):
+            return 1.0
+        if char in "\r\n":
+            return 0.0
+        if not self._has_font_file and not char.isascii():
+            return 1.0
+        return self._font.getlength(char) / _REFERENCE_SIZE
+
+    def measure(self, chars: Iterable[str]) -> None:
+        """测量并缓存尚未记录的字符"""
+        missing = {c for c in chars if c not in self._widths}
+        if not missing:
+            return
+        widths = {c: self._char_width(c) for c in missing}
+        with self._lock:
+            self._widths.update(widths)
+
+    def width(self, text: str) -> float:
+        """文本宽度 (em)"""
+        widths = self._widths
+        try:
+            return sum(widths[c] for c in text)
+        except KeyError:
+            self.measure(text)
+            return sum(widths[c] for c in text)
+
+    def tokens(self, text: str) -> List[Tuple[float, bool]]:
+        """按断行单位切分：[(宽度 em, 是否空白)]，同一段落换不同字号时复用"""
+        return [(self.width(token), token.isspace()) for token in WRAP_TOKEN.findall(text)]
+
+
+@lru_cache(maxsize=16)
+def get_metrics(font_name: str, bold: bool = False) -> FontMetrics:
+    return FontMetrics(font_name, bold)
+
+
+def preload_metrics(font_names: Iterable[str]) -> None:
+    """启动时预加载主题字体的字宽表，避免首个生成任务承担字体加载开销"""
+    for font_name in set(font_names):
+        for bold in (False, True):
+            get_metrics(font_name, bold)
+    logger.info(f"字体度量已加载: {', '.join(sorted(set(font_names)))}")
+
+
+def count_lines(tokens: Sequence[Tuple[float, bool]], max_em: float) -> int:
+    """贪心换行后的行数，与 SlideRenderer._wrap 规则一致；超长单词按宽度折算为多行"""
+    lines, current = 1, 0.0
+    for width, is_space in tokens:
+        if current + width <= max_em:
+            current += width
+        elif is_space:
+            continue  # 行尾空白不换行
+        else:
+            if current:
+                lines += 1
+            extra = int(width // max_em) if width > max_em else 0
+            lines += extra
+            current = width - extra * max_em
+    return lines
+
+
+@dataclass(frozen=True)
+class TextBox:
+    """
+    文本框排版参数
+
+    width/height 为文本框尺寸 (英寸)；字号在 [min_size, max_size] 之间按 step 递减尝试；
+    段前间距按 space_before (对应 max_size) 随字号等比缩放；prefix 为每段前的项目符号
+    """
+    width: float
+    height: float
+    max_size: int
+    min_size: int
+    space_before: float = 0
+    prefix: str = ""
+    bold: bool = False
+    step: int = 2
+
+    def space_at(self, size: int) -> float:
+        return self.space_before * size / self.max_size
+
+
+@dataclass(frozen=True)
+class TextFit:
+    """排版结果：size 为字号，count 为本页能放下的段落数"""
+    size: int
+    count: int
+
+
+# 各版式的文本框，与 PPTGenerator 中的几何参数一致
+BULLET_BOX = TextBox(11, 4.5, max_size=24, min_size=14, space_before=18, prefix="●  ")
+COLUMN_BOX = TextBox(4.42, 4.95, max_size=28, min_size=14, space_before=6, prefix="•  ")  # 默认母版双栏占位符
+COLUMN_TEXTBOX_BOX = TextBox(5.5, 4, max_size=20, min_size=12, space_before=15, prefix="▪ ")  # 模板无双栏占位符时
+TIMELINE_BOX = TextBox(2, 0.8, max_size=16, min_size=10, bold=True)
+
+
+def _paragraph_heights(paragraphs: Sequence[List[Tuple[float, bool]]], box: TextBox, size: int) -> List[float]:
+    max_em = (box.width - 2 * INSET_X) * 72 / size
+    line_height = size * LINE_SPACING
+    space = box.space_at(size)
+    return [space + count_lines(tokens, max_em) * line_height for tokens in paragraphs]
+
+
+def fit_text(paragraphs: Sequence[str], box: TextBox, font_name: str) -> TextFit:
+    """
+    为一组段落选择字号
+
+    Returns:
+        能放下全部段落的最大字号；最小字号仍放不下时返回最小字号与能放下的段落数 (至少 1)
+    """
+    if not paragraphs:
+        return TextFit(box.max_size, 0)
+    metrics = get_metrics(font_name, box.bold)
+    tokens = [metrics.tokens(box.prefix + p) for p in paragraphs]
+    inner_height = (box.height - 2 * INSET_Y) * 72
+    for size in range(box.max_size, box.min_size - 1, -box.step):
+        heights = _paragraph_heights(tokens, box, size)
+        if sum(heights) <= inner_height:
+            return TextFit(size, len(paragraphs))
+
+    used, count = 0.0, 0
+    for height in heights:
+        if used + height > inner_height:
+            break
+        used += height
+        count += 1
+    return TextFit(box.min_size, max(count, 1))
+
+
+def truncate_to_fit(text: str, box: TextBox, font_name: str) -> str:
+    """最小字号下仍放不下的单段文本截断并加省略号 (用于无法拆页的时间轴节点)"""
+    if _fits(text, box, font_name):
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if _fits(text[:mid] + "…", box, font_name):
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + "…"
+
+
+def _fits(text: str, box: TextBox, font_name: str) -> bool:
+    metrics = get_metrics(font_name, box.bold)
+    heights = _paragraph_heights([metrics.tokens(box.prefix + text)], box, box.min_size)
+    return heights[0] <= (box.height - 2 * INSET_Y) * 72
+
+
+def _continuation(slide: SlideContent, points: List[str], index: int) -> SlideContent:
+    title = slide.title if index == 0 else f"{slide.title}{CONTINUATION_SUFFIX}"
+    return slide.model_copy(update={"title": title, "bullet_points": points})
+
+
+def _split_columns(slide: SlideContent, font_name: str) -> List[SlideContent]:
+    """
+    双栏页按栏分别排版；续页左右两栏各取相同条数，
+    使 add_column_slide 按 len // 2 拆栏时仍与原来的左右栏一致
+    """
+    mid = len(slide.bullet_points) // 2
+    left, right = slide.bullet_points[:mid], slide.bullet_points[mid:]
+    pages = []
+    while True:
+        if fit_text(left, COLUMN_BOX, font_name).count == len(left) \
+                and fit_text(right, COLUMN_BOX, font_name).count == len(right):
+            pages.append(left + right)
+            break
+        take = min(fit_text(left, COLUMN_BOX, font_name).count if left else len(right),
+                   fit_text(right, COLUMN_BOX, font_name).count)
+        pages.append(left[:take] + right[:take])
+        left, right = left[take:], right[take:]
+    return [_continuation(slide, points, i) for i, points in enumerate(pages)]
+
+
+def split_slide(slide: SlideContent, font_name: str) -> List[SlideContent]:
+    """
+    将内容放不下的文字页拆分为多页，续页标题追加 CONTINUATION_SUFFIX
+
+    覆盖要点页、双栏页与时间轴页；其余版式原样返回
+    """
+    points = slide.bullet_points
+    if slide.layout == SlideLayout.BULLETS:
+        pages = []
+        while points:
+            count = fit_text(points, BULLET_BOX, font_name).count
+            pages.append(points[:count])
+            points = points[count:]
+        return [_continuation(slide, page, i) for i, page in enumerate(pages)] or [slide]
+    if slide.layout == SlideLayout.TWO_COLUMN and points:
+        return _split_columns(slide, font_name)
+    if slide.layout == SlideLayout.TIMELINE and len(points) > TIMELINE_MAX_NODES:
+        chunks = [points[i:i + TIMELINE_MAX_NODES] for i in range(0, len(points), TIMELINE_MAX_NODES)]
+        return [_continuation(slide, chunk, i) for i, chunk in enumerate(chunks)]
+    return [slide]
+
+
+def timeline_labels(points: Sequence[str], font_name: str) -> Tuple[int, List[str]]:
+    """时间轴节点统一字号，最小字号仍放不下的节点文字截断"""
+    size = min(fit_text([p], TIMELINE_BOX, font_name).size for p in points) if points else TIMELINE_BOX.max_size
+    if size > TIMELINE_BOX.min_size:
+        return size, list(points)
+    return size, [truncate_to_fit(p, TIMELINE_BOX, font_name) for p in points]
+
+
+def scaled_box(box: TextBox, width: float, height: float) -> TextBox:
+    """按实际占位符尺寸 (英寸) 替换文本框大小，用于模板版式"""
+    return replace(box, width=width, height=height)
@@ -0,0 +1,151 @@
+"""
+链路追踪
+基于 OpenTelemetry，为大纲生成 (附 token 用量)、逐页构建、保存、文件转换与 Redis 调用创建 span；
+FairScheduler 在线程池中执行作业时复制 contextvars，工作线程内的 span 挂在所属任务的 span 之下。
+另在任务级记录各 span 的累计耗时 (TaskTrace)，完成后存入任务数据，由 /api/task/{id} 返回耗时分解，
+未部署追踪后端时同样可用。
+未安装 opentelemetry-api 或 settings.tracing_enabled 为 False 时只记录耗时分解，不创建 span。
+设置 OTEL_EXPORTER_OTLP_ENDPOINT 且安装了 opentelemetry-sdk 与 OTLP 导出器时，启动时自动配置导出
+"""
+import time
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ..config import settings
+
+logger = logging.getLogger("ai-ppt.tracing")
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+ENABLED = trace is not None and settings.tracing_enabled
+_tracer = trace.get_tracer("ai-ppt") if ENABLED else None
+
+
+class TaskTrace:
+    """
+    一个任务内各 span 的累计耗时与次数
+
+    嵌套的 span 各自计时 (如 ppt.generate 包含其中的 ppt.slide.* 与 ppt.save)，
+    同一任务的多个子项可能在不同工作线程中同时记录，因此加锁
+    """
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id
+        self._entries: Dict[str, List[float]] = {}  # 名称 -> [累计秒数, 次数]
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._entries.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def breakdown(self) -> Dict[str, Dict[str, Any]]:
+        """按名称汇总的耗时分解: {名称: {"count": 次数, "total_ms": 累计毫秒}}"""
+        with self._lock:
+            return {
+                name: {"count": count, "total_ms": round(seconds * 1000, 1)}
+                for name, (seconds, count) in self._entries.items()
+            }
+
+
+_current_task: ContextVar[Optional[TaskTrace]] = ContextVar("task_trace", default=None)
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[None]:
+    """创建子 span 并计入当前任务的耗时分解，异常会记录在 span 上后继续抛出"""
+    task = _current_task.get()
+    start = time.perf_counter()
+    try:
+        if _tracer is None:
+            yield
+        else:
+            with _tracer.start_as_current_span(name, attributes=attributes):
+                yield
+    finally:
+        if task is not None:
+            task.add(name, time.perf_counter() - start)
+
+
+def traced(name: str) -> Callable:
+    """以 span(name) 包装函数调用"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def trace_task(name: str, task_id: str) -> Iterator[TaskTrace]:
+    """
+    任务级追踪：创建任务的 span 并绑定 TaskTrace，
+    其中 (含经调度器进入工作线程后) 的 span 都计入返回的 TaskTrace；任务自身的总耗时记为 name
+    """
+    task = TaskTrace()
+    token = _current_task.set(task)
+    try:
+        with span(name, {"task.id": task_id}):
+            task.trace_id = current_trace_id()
+            yield task
+    finally:
+        _current_task.reset(token)
+
+
+def current_trace_id() -> Optional[str]:
+    """当前 span 的 trace id (十六进制)，未在有效的 span 中时返回 None"""
+    if _tracer is None:
+        return None
+    context = trace.get_current_span().get_span_context()
+    return format(context.trace_id, "032x") if context.is_valid else None
+
+
+def set_attributes(attributes: Dict[str, Any]) -> None:
+    """给当前 span 追加属性"""
+    if _tracer is None:
+        return
+    current = trace.get_current_span()
+    if current.is_recording():
+        current.set_attributes({key: value for key, value in attributes.items() if value is not None})
+
+
+def configure_tracing(app) -> None:
+    """
+    启动时调用：配置了 OTEL_EXPORTER_OTLP_ENDPOINT 时安装 SDK 的 TracerProvider 与 OTLP 导出器
+    (已由 opentelemetry-instrument 等外部方式配置时不覆盖)，并在可用时为 FastAPI 接口创建 span
+    """
+    if not ENABLED:
+        return
+    if settings.otel_exporter_otlp_endpoint and not _sdk_configured():
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("未安装 opentelemetry-sdk / opentelemetry-exporter-otlp-proto-http，span 不会导出")
+        else:
+            provider = TracerProvider(resource=Resource.create({"service.name": settings.otel_service_name}))
+            endpoint = settings.otel_exporter_otlp_endpoint.rstrip("/") + "/v1/traces"
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+            trace.set_tracer_provider(provider)
+            logger.info(f"链路追踪已启用，导出到 {settings.otel_exporter_otlp_endpoint}")
+    try:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    except ImportError:
+        return
+    FastAPIInstrumentor.instrument_app(app, excluded_urls="/metrics")
+
+
+def _sdk_configured() -> bool:
+    return type(trace.get_tracer_provider()).__name__ != "ProxyTracerProvider"
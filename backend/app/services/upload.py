@@ -0,0 +1,113 @@
+"""
+上传文件处理
+按固定大小分块流式写盘，边写边计算哈希，并尽早拒绝超限或类型不符的文件
+"""
+import os
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from ..config import settings
+
+logger = logging.getLogger("ai-ppt.upload")
+
+# OOXML (pptx/docx/zip) 均为 ZIP 容器，旧版 Office (ppt/doc) 为 OLE2 复合文档
+_ZIP_MAGIC = (b"PK\x03\x04",)
+_OLE_MAGIC = (b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1",)
+
+# 扩展名 -> 允许的文件头
+MAGIC_BYTES: Dict[str, Tuple[bytes, ...]] = {
+    ".pdf": (b"%PDF-",),
+    ".pptx": _ZIP_MAGIC,
+    ".docx": _ZIP_MAGIC,
+    ".zip": _ZIP_MAGIC,
+    ".ppt": _OLE_MAGIC,
+    ".doc": _OLE_MAGIC,
+}
+
+
+class UploadRejected(Exception):
+    """上传文件被拒绝（超限或类型不符）"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+@dataclass
+class SavedUpload:
+    """已落盘的上传文件信息"""
+    path: str
+    size: int
+    sha256: str
+
+
+def _check_magic(ext: str, head: bytes) -> None:
+    """校验文件头是否与扩展名匹配，未登记的扩展名不做校验"""
+    expected = MAGIC_BYTES.get(ext)
+    if expected and not any(head.startswith(magic) for magic in expected):
+        raise UploadRejected(f"文件内容与扩展名 {ext} 不匹配")
+
+
+async def save_upload(
+    file: UploadFile,
+    dest_path: str,
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> SavedUpload:
+    """
+    将上传文件分块写入磁盘
+
+    Args:
+        file: FastAPI 上传文件对象
+        dest_path: 目标文件路径
+        max_size: 大小上限（字节），默认取 settings.max_upload_size
+        chunk_size: 分块大小（字节），默认取 settings.upload_chunk_size
+
+    Returns:
+        SavedUpload: 落盘路径、大小及 SHA-256
+
+    Raises:
+        UploadRejected: 文件超限或文件头与扩展名不符
+    """
+    max_size = max_size or settings.max_upload_size
+    chunk_size = chunk_size or settings.upload_chunk_size
+    ext = os.path.splitext(file.filename or "")[1].lower()
+
+    # 客户端声明了大小时直接拒绝，无需读取内容
+    if file.size is not None and file.size > max_size:
+        raise UploadRejected(f"文件大小超过上限 {max_size // (1024 * 1024)}MB", status_code=413)
+
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    part_path = dest_path + ".part"
+    hasher = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(part_path, "wb") as f:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                if size == 0:
+                    _check_magic(ext, chunk)
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadRejected(f"文件大小超过上限 {max_size // (1024 * 1024)}MB", status_code=413)
+                hasher.update(chunk)
+                await run_in_threadpool(f.write, chunk)
+
+        if size == 0:
+            raise UploadRejected("上传文件为空")
+        os.replace(part_path, dest_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    digest = hasher.hexdigest()
+    logger.info(f"上传落盘完成: {file.filename} -> {dest_path} ({size} 字节, sha256={digest[:12]})")
+    return SavedUpload(path=dest_path, size=size, sha256=digest)
@@ -0,0 +1,221 @@
+"""
+用户存储
+按用户 ID 存取用户，并维护 邮箱 -> 用户 ID 索引，登录与注册查找为 O(1)。
+内存后端仅用于开发调试；Redis / SQLite 后端在多个 uvicorn worker 间共享，重启后数据不丢失
+"""
+import os
+import json
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from redis.exceptions import WatchError
+
+from ..config import settings
+from .redis_client import redis_client
+
+logger = logging.getLogger("ai-ppt.user_store")
+
+# 用户记录字段
+USER_FIELDS = ("id", "name", "email", "password", "is_active", "created_at")
+
+
+class EmailAlreadyRegistered(Exception):
+    """邮箱已被注册"""
+
+
+def normalize_email(email: str) -> str:
+    """邮箱索引键：去除首尾空白并转为小写"""
+    return email.strip().lower()
+
+
+class UserRepository(ABC):
+    """用户存储接口，用户以字典表示，字段见 USER_FIELDS"""
+
+    @abstractmethod
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """按 ID 获取用户"""
+
+    @abstractmethod
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """按邮箱获取用户"""
+
+    @abstractmethod
+    def create(self, user: Dict[str, Any]) -> None:
+        """保存新用户，邮箱已存在时抛出 EmailAlreadyRegistered (检查与写入为原子操作)"""
+
+    @abstractmethod
+    def update(self, user_id: str, **fields: Any) -> None:
+        """更新用户字段 (邮箱除外)"""
+
+
+class MemoryUserRepository(UserRepository):
+    """进程内存后端"""
+
+    def __init__(self):
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._email_index: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        user = self._users.get(user_id)
+        return dict(user) if user else None
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        user_id = self._email_index.get(normalize_email(email))
+        return self.get(user_id) if user_id else None
+
+    def create(self, user: Dict[str, Any]) -> None:
+        key = normalize_email(user["email"])
+        with self._lock:
+            if key in self._email_index:
+                raise EmailAlreadyRegistered(user["email"])
+            self._users[user["id"]] = dict(user)
+            self._email_index[key] = user["id"]
+
+    def update(self, user_id: str, **fields: Any) -> None:
+        fields.pop("email", None)
+        with self._lock:
+            if user_id in self._users:
+                self._users[user_id].update(fields)
+
+
+class RedisUserRepository(UserRepository):
+    """
+    Redis 后端
+
+    用户记录存为 JSON 字符串 user:{id}，邮箱索引为 user_email:{邮箱}；
+    注册时以 SET NX 占用邮箱索引，并发注册同一邮箱只有一个成功。两类 key 都不设过期时间
+    """
+
+    def _client(self):
+        client = redis_client.client
+        if client is None:
+            raise RuntimeError("Redis 不可用，无法访问用户数据")
+        return client
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        data = self._client().get(f"user:{user_id}")
+        return json.loads(data) if data else None
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        user_id = self._client().get(f"user_email:{normalize_email(email)}")
+        return self.get(user_id) if user_id else None
+
+    def create(self, user: Dict[str, Any]) -> None:
+        client = self._client()
+        email_key = f"user_email:{normalize_email(user['email'])}"
+        if not client.set(email_key, user["id"], nx=True):
+            raise EmailAlreadyRegistered(user["email"])
+        try:
+            client.set(f"user:{user['id']}", json.dumps(user, ensure_ascii=False))
+        except Exception:
+            client.delete(email_key)
+            raise
+
+    def update(self, user_id: str, **fields: Any) -> None:
+        fields.pop("email", None)
+        client = self._client()
+        key = f"user:{user_id}"
+        # 乐观锁：记录在读取后被其他 worker 修改时重试
+        with client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    data = pipe.get(key)
+                    if not data:
+                        return
+                    user = json.loads(data)
+                    user.update(fields)
+                    pipe.multi()
+                    pipe.set(key, json.dumps(user, ensure_ascii=False))
+                    pipe.execute()
+                    return
+                except WatchError:
+                    continue
+
+
+class SqliteUserRepository(UserRepository):
+    """
+    SQLite 后端
+
+    规范化后的邮箱存于 email_key 列并建唯一索引；WAL 模式下同一主机上的多个 worker 进程可并发读写
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                " id TEXT PRIMARY KEY,"
+                " email TEXT NOT NULL,"
+                " email_key TEXT NOT NULL UNIQUE,"
+                " name TEXT NOT NULL,"
+                " password TEXT NOT NULL,"
+                " is_active INTEGER NOT NULL DEFAULT 1,"
+                " created_at TEXT NOT NULL)"
+            )
+
+    @staticmethod
+    def _to_user(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        user = {field: row[field] for field in USER_FIELDS}
+        user["is_active"] = bool(user["is_active"])
+        return user
+
+    def _query_one(self, sql: str, params: tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(sql, params).fetchone()
+        return self._to_user(row)
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self._query_one("SELECT * FROM users WHERE id = ?", (user_id,))
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return self._query_one("SELECT * FROM users WHERE email_key = ?", (normalize_email(email),))
+
+    def create(self, user: Dict[str, Any]) -> None:
+        columns = USER_FIELDS + ("email_key",)
+        record = dict(user, email_key=normalize_email(user["email"]), is_active=int(user["is_active"]))
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    f"INSERT INTO users ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    tuple(record[column] for column in columns),
+                )
+        except sqlite3.IntegrityError:
+            raise EmailAlreadyRegistered(user["email"])
+
+    def update(self, user_id: str, **fields: Any) -> None:
+        fields = {k: v for k, v in fields.items() if k in USER_FIELDS and k not in ("id", "email")}
+        if not fields:
+            return
+        if "is_active" in fields:
+            fields["is_active"] = int(fields["is_active"])
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE users SET {assignments} WHERE id = ?", (*fields.values(), user_id))
+
+
+def create_user_repository() -> UserRepository:
+    """按 settings.user_store_backend 创建用户存储"""
+    backend = settings.user_store_backend.lower()
+    if backend == "memory":
+        return MemoryUserRepository()
+    if backend == "redis":
+        return RedisUserRepository()
+    if backend == "sqlite":
+        return SqliteUserRepository(settings.sqlite_path)
+    raise ValueError(f"未知的用户存储后端: {settings.user_store_backend}")
+
+
+# 全局用户存储实例
+user_repository = create_user_repository()
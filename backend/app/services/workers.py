@@ -0,0 +1,24 @@
+"""
+共享工作线程池
+所有请求共用同一组有界线程池，避免每个任务各自创建线程/子进程
+"""
+import concurrent.futures
+from ..config import settings
+
+# 文件转换线程池 (LibreOffice / pdf2docx / pdf2image)
+conversion_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=settings.conversion_workers,
+    thread_name_prefix="convert",
+)
+
+# PPT 生成线程池 (python-pptx)
+generation_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=settings.generation_workers,
+    thread_name_prefix="generate",
+)
+
+# 密码哈希线程池 (bcrypt)，与生成、转换任务隔离，登录高峰不占用其他线程池
+password_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password",
+)
@@ -0,0 +1,80 @@
+"""
+流式 ZIP 打包
+边打包边输出字节块，无需先在磁盘或内存中生成完整压缩包
+"""
+import zipfile
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Tuple
+
+from starlette.concurrency import iterate_in_threadpool
+
+
+class _ChunkBuffer:
+    """仅支持追加写入的缓冲区，供 ZipFile 以不可 seek 流的方式写入"""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+            self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries: Iterable[Tuple[str, Iterable[bytes]]]) -> Iterator[bytes]:
+    """
+    将 (压缩包内文件名, 文件内容块迭代器) 依次写入 ZIP 并逐块产出
+
+    entries 可以是惰性生成器：每取到一项就立即写入，适合边转换边下载；
+    内容块通常来自 artifact_store.iter_chunks，本地文件与对象存储一样流式读取。
+    PDF/Office 文件本身已压缩，因此使用 ZIP_STORED 避免无谓的 CPU 开销。
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for arcname, chunks in entries:
+            with zf.open(arcname, mode="w", force_zip64=True) as dest:
+                for chunk in chunks:
+                    dest.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    data = buffer.drain()
+    if data:
+        yield data
+
+
+async def aiter_zip(entries: AsyncIterable[Tuple[str, Iterable[bytes]]]) -> AsyncIterator[bytes]:
+    """
+    iter_zip 的异步版本：entries 为异步迭代器 (可在事件循环上等待子项完成)，
+    各文件的内容块在线程池中读取，不阻塞事件循环
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        async for arcname, chunks in entries:
+            with zf.open(arcname, mode="w", force_zip64=True) as dest:
+                async for chunk in iterate_in_threadpool(iter(chunks)):
+                    dest.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    data = buffer.drain()
+    if data:
+        yield data
@@ -0,0 +1,83 @@
+"""
+登录高峰基准测试
+并发发起大量登录校验，同时以定时器探测事件循环延迟 (期望 sleep 5ms，实际多等待的时间)；
+对比在协程中直接调用 bcrypt 与 AuthService.authenticate (password_executor 线程池) 两种方式
+
+用法 (在 backend 目录下):
+    python -m benchmarks.bench_auth [--logins 50] [--rounds 12]
+"""
+import os
+import time
+import asyncio
+import logging
+import argparse
+from statistics import median, quantiles
+
+# 使用内存存储，不写入 SQLite 数据文件
+os.environ.setdefault("USER_STORE_BACKEND", "memory")
+os.environ.setdefault("HISTORY_STORE_BACKEND", "memory")
+
+from app.config import settings  # noqa: E402
+from app.services.auth import AuthService  # noqa: E402
+
+PROBE_INTERVAL = 0.005
+EMAIL = "bench@example.com"
+PASSWORD = "benchmark-password"
+
+
+async def probe(lags: list, stop: asyncio.Event):
+    """每隔 PROBE_INTERVAL 唤醒一次，记录实际唤醒时间比预期晚多少"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def inline_login(email: str, password: str) -> bool:
+    """改造前的写法：在协程中直接调用 bcrypt，作为对照"""
+    user = AuthService.get_user_by_email(email)
+    return bool(user) and AuthService.verify_password(password, user["password"])
+
+
+async def executor_login(email: str, password: str) -> bool:
+    return await AuthService.authenticate(email, password) is not None
+
+
+async def storm(name: str, login, count: int):
+    lags: list = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL * 4)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login(EMAIL, PASSWORD) for _ in range(count)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await prober
+
+    assert all(results)
+    p99 = quantiles(lags, n=100, method="inclusive")[98] if len(lags) >= 2 else lags[0]
+    print(f"  {name:<14} 总耗时 {elapsed * 1000:8.1f} ms   事件循环延迟 中位数 {median(lags) * 1000:7.2f} ms"
+          f"   p99 {p99 * 1000:7.2f} ms   最大 {max(lags) * 1000:7.2f} ms")
+
+
+async def run(args):
+    await AuthService.create_user("bench", EMAIL, PASSWORD)
+    print(f"\n{args.logins} 次并发登录，bcrypt cost {settings.bcrypt_rounds}，"
+          f"密码哈希线程 {settings.password_hash_workers}")
+    await storm("协程内直接计算", inline_login, args.logins)
+    await storm("专用线程池", executor_login, args.logins)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=settings.bcrypt_rounds)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    settings.bcrypt_rounds = args.rounds
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+预览渲染基准测试
+对比 SlideRenderer (纯 Python) 与 LibreOffice + pdf2image 两条预览路径的耗时
+
+用法 (在 backend 目录下):
+    python -m benchmarks.bench_preview [--slides 20] [--repeat 3]
+"""
+import os
+import time
+import logging
+import shutil
+import argparse
+import tempfile
+from statistics import median
+
+from app.config import settings
+from app.models import SlideContent, SlideLayout, ThemeStyle
+from app.services.ppt_generator import PPTGenerator
+from app.services.slide_renderer import SlideRenderer
+from app.services import preview
+from app.services.artifact_store import artifact_store
+
+
+def sample_slides(count: int):
+    """覆盖各版式的示例大纲"""
+    bullets = [f"第 {i} 条要点：结合行业数据分析增长驱动因素与潜在风险" for i in range(1, 5)]
+    data = [{"label": f"{2019 + i}", "series": {"营收": 40 + i * 9, "利润": 10 + i * 4}} for i in range(5)]
+    templates = [
+        SlideContent(title="核心观点", bullet_points=bullets, layout=SlideLayout.BULLETS),
+        SlideContent(title="方案对比", bullet_points=bullets, layout=SlideLayout.TWO_COLUMN),
+        SlideContent(title="实施流程", bullet_points=bullets, layout=SlideLayout.PROCESS),
+        SlideContent(title="营收趋势", bullet_points=bullets[:2], layout=SlideLayout.DATA_LINE, data_points=data),
+        SlideContent(title="市场份额", layout=SlideLayout.DATA_PIE,
+                     data_points=[{"label": n, "value": v} for n, v in [("A", 45), ("B", 30), ("C", 25)]]),
+        SlideContent(title="业务结构", layout=SlideLayout.DATA_STACKED, data_points=data),
+        SlideContent(title="发展路线", bullet_points=bullets, layout=SlideLayout.TIMELINE),
+        SlideContent(title="关键指标", bullet_points=bullets[:1], layout=SlideLayout.BIG_NUMBER,
+                     data_points=[{"label": "增长率", "value": "38%"}]),
+    ]
+    return [templates[i % len(templates)] for i in range(count)]
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slides", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    slides = sample_slides(args.slides)
+    work_dir = tempfile.mkdtemp(prefix="bench_preview_")
+    # 预览目录由产物存储的工作区决定，两者都指向临时目录
+    settings.output_dir = artifact_store.root = work_dir
+    try:
+        pptx_path = os.path.join(work_dir, "bench.pptx")
+        PPTGenerator(theme=ThemeStyle.BUSINESS).generate("基准测试", slides, pptx_path)
+
+        renderer = SlideRenderer(theme=ThemeStyle.BUSINESS)
+        first = timed(lambda: renderer.render_title_slide("基准测试"), args.repeat)
+        full = timed(lambda: preview.render_outline_slides(
+            "bench-python",
+            {"title": "基准测试", "slides": [s.model_dump(mode="json") for s in slides], "theme": "business"},
+        ), args.repeat)
+        print(f"SlideRenderer   首页: {first * 1000:8.1f} ms   全部 {args.slides + 1} 页 (含编码与 PDF): {full * 1000:8.1f} ms")
+
+        if not (shutil.which("soffice") or shutil.which("libreoffice")):
+            print("LibreOffice      未安装，跳过对比")
+            return
+        first = timed(lambda: preview.render_first_slide("bench-lo", pptx_path), args.repeat)
+
+        def libreoffice_full():
+            pdf_path = os.path.join(work_dir, "bench.pdf")
+            if os.path.exists(pdf_path):
+                os.remove(pdf_path)
+            preview.convert_with_libreoffice(pptx_path, pdf_path)
+            preview.render_pdf_pages("bench-lo", pdf_path)
+
+        full = timed(libreoffice_full, args.repeat)
+        print(f"LibreOffice     首页: {first * 1000:8.1f} ms   全部 {args.slides + 1} 页 (含 PDF 转换): {full * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
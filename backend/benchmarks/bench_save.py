@@ -0,0 +1,90 @@
+"""
+PPTX 保存基准测试
+对比 python-pptx 默认保存与 save_presentation 各压缩配置的耗时和文件大小
+
+两类文稿：
+    文本/图表: PPTGenerator 按示例大纲生成，以 XML 部件为主
+    图片:     与 PDF 转 PPT 相同，每页一张 200dpi 整页 PNG 位图 (由 SlideRenderer 绘制)，
+              并叠加一块照片质感的插图区域 (模拟 AI 生成配图)
+
+用法 (在 backend 目录下):
+    python -m benchmarks.bench_save [--slides 20] [--repeat 5]
+"""
+import io
+import time
+import logging
+import argparse
+from statistics import median
+
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+from app.models import ThemeStyle
+from app.services.ppt_generator import PPTGenerator
+from app.services.pptx_writer import save_presentation
+from app.services.slide_renderer import SlideRenderer
+from benchmarks.bench_preview import sample_slides
+
+# (名称, 保存函数)
+MODES = [
+    ("python-pptx 默认", lambda prs, buf: prs.save(buf)),
+    ("全部 deflate-6", lambda prs, buf: save_presentation(prs, buf, xml_level=6, store_media=False)),
+    ("媒体存储 + XML-6", lambda prs, buf: save_presentation(prs, buf, xml_level=6, store_media=True)),
+    ("媒体存储 + XML-1", lambda prs, buf: save_presentation(prs, buf, xml_level=1, store_media=True)),
+    ("媒体存储 + XML-9", lambda prs, buf: save_presentation(prs, buf, xml_level=9, store_media=True)),
+]
+
+
+def text_deck(slide_count: int):
+    generator = PPTGenerator(theme=ThemeStyle.BUSINESS)
+    generator._build("基准测试", sample_slides(slide_count))
+    return generator.prs
+
+
+def image_deck(slide_count: int):
+    # pdf2image 默认 200dpi，与 convert_pdf_to_pptx_file 的页面位图尺寸一致
+    renderer = SlideRenderer(theme=ThemeStyle.TECH, dpi=200)
+    images = renderer.render("基准测试", sample_slides(slide_count - 1))
+    illustration = Image.effect_noise((800, 600), 40).convert("RGB").resize((1200, 900))
+    for image in images:
+        image.paste(illustration, (image.width - 1300, image.height - 1000))
+    prs = Presentation()
+    prs.slide_width = Inches(13.33)
+    prs.slide_height = Inches(7.5)
+    for image in images:
+        stream = io.BytesIO()
+        image.save(stream, format="PNG")
+        stream.seek(0)
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        slide.shapes.add_picture(stream, 0, 0, width=prs.slide_width, height=prs.slide_height)
+    return prs
+
+
+def bench(name: str, prs, repeat: int):
+    print(f"\n{name}")
+    for mode, save in MODES:
+        samples = []
+        size = 0
+        for _ in range(repeat):
+            buf = io.BytesIO()
+            start = time.perf_counter()
+            save(prs, buf)
+            samples.append(time.perf_counter() - start)
+            size = buf.tell()
+        print(f"  {mode:<18} {median(samples) * 1000:8.1f} ms   {size / 1024:9.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slides", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    bench(f"文本/图表文稿 ({args.slides} 页)", text_deck(args.slides), args.repeat)
+    bench(f"图片文稿 ({args.slides} 页)", image_deck(args.slides), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
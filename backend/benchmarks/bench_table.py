@@ -0,0 +1,101 @@
+"""
+表格版式基准测试
+对比 python-pptx 逐单元格设置文本/字体/底色与 add_table_slide 直接拼接 XML 的耗时
+
+用法 (在 backend 目录下):
+    python -m benchmarks.bench_table [--rows 1000] [--cols 5] [--repeat 3]
+"""
+import io
+import time
+import random
+import logging
+import argparse
+from statistics import median
+
+from pptx.util import Inches, Pt
+
+from app.config import settings
+from app.models import SlideContent, SlideLayout, ThemeStyle
+from app.services.ppt_generator import PPTGenerator
+from app.services.pptx_writer import save_presentation
+from app.services.table_builder import (
+    ROW_HEIGHT, TABLE_LEFT, TABLE_TOP, normalize_table, page_title, paginate, table_style,
+)
+
+
+def sample_table(rows: int, cols: int) -> SlideContent:
+    rng = random.Random(0)
+    regions = ["华东", "华南", "华北", "西南", "西北", "东北"]
+    data_points = []
+    for i in range(rows):
+        point = {"编号": f"SKU-{i:05d}", "地区": rng.choice(regions)}
+        for j in range(cols - 2):
+            point[f"指标{j + 1}"] = round(rng.uniform(0, 100000), 2)
+        data_points.append(point)
+    return SlideContent(title="销售明细", layout=SlideLayout.TABLE, data_points=data_points)
+
+
+def build_with_setters(slide_data: SlideContent) -> PPTGenerator:
+    """按 python-pptx 常规写法逐个单元格设置，作为对照"""
+    generator = PPTGenerator(theme=ThemeStyle.BUSINESS)
+    table = normalize_table(slide_data.data_points)
+    style = table_style(generator.theme)
+    width = generator.prs.slide_width - 2 * Inches(TABLE_LEFT)
+    pages = paginate(table, settings.table_rows_per_slide)
+    for page, rows in enumerate(pages, start=1):
+        slide = generator.prs.slides.add_slide(generator._get_layout(layout_type=SlideLayout.TABLE))
+        generator._setup_background(slide)
+        generator._add_page_header(slide, page_title(slide_data.title, page, len(pages)), slide_data.icon)
+        shape = slide.shapes.add_table(len(rows) + 1, len(table.headers), Inches(TABLE_LEFT), Inches(TABLE_TOP),
+                                       width, Inches(ROW_HEIGHT) * (len(rows) + 1)).table
+        for i, row in enumerate([table.headers] + list(rows)):
+            for j, text in enumerate(row):
+                cell = shape.cell(i, j)
+                cell.text = text
+                cell.fill.solid()
+                cell.fill.fore_color.rgb = generator.theme["title_color" if i == 0 else "bg_color"]
+                run = cell.text_frame.paragraphs[0].runs[0] if text else None
+                if run is not None:
+                    run.font.name = style.font_name
+                    run.font.size = Pt(12)
+                    run.font.bold = i == 0
+    return generator
+
+
+def build_with_xml(slide_data: SlideContent) -> PPTGenerator:
+    generator = PPTGenerator(theme=ThemeStyle.BUSINESS)
+    generator.add_table_slide(slide_data)
+    return generator
+
+
+def bench(name: str, build, slide_data: SlideContent, repeat: int):
+    build_times, save_times = [], []
+    slides = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generator = build(slide_data)
+        build_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        save_presentation(generator.prs, io.BytesIO())
+        save_times.append(time.perf_counter() - start)
+        slides = len(generator.prs.slides)
+    print(f"  {name:<12} 构建 {median(build_times) * 1000:8.1f} ms   保存 {median(save_times) * 1000:7.1f} ms"
+          f"   ({slides} 页)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--cols", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    slide_data = sample_table(args.rows, args.cols)
+    print(f"\n{args.rows} 行 x {args.cols} 列，每页 {settings.table_rows_per_slide} 行")
+    bench("逐单元格设置", build_with_setters, slide_data, args.repeat)
+    bench("直接拼接 XML", build_with_xml, slide_data, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
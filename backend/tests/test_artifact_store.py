@@ -0,0 +1,133 @@
+"""
+S3ArtifactStore 单元测试：注入内存中的假 S3 客户端，不访问网络
+
+用法 (在 backend 目录下):
+    python -m unittest discover tests
+"""
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+from app.services.artifact_store import S3ArtifactStore, boto3
+
+if boto3 is not None:
+    from botocore.exceptions import ClientError
+    from botocore.response import StreamingBody
+
+
+class FakeS3Client:
+    """按 boto3 S3 客户端的接口在内存中保存对象，缺失的对象抛出与真实服务一致的 ClientError"""
+
+    def __init__(self):
+        self.objects = {}  # (bucket, key) -> (内容, ContentType)
+
+    def _get(self, bucket, key, operation):
+        if (bucket, key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, operation)
+        return self.objects[(bucket, key)]
+
+    def upload_file(self, path, bucket, key, ExtraArgs=None):
+        with open(path, "rb") as f:
+            self.objects[(bucket, key)] = (f.read(), (ExtraArgs or {}).get("ContentType"))
+
+    def upload_fileobj(self, stream, bucket, key, ExtraArgs=None):
+        self.objects[(bucket, key)] = (stream.read(), (ExtraArgs or {}).get("ContentType"))
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        data, content_type = self.objects[(Bucket, Key)]
+        return {"ContentLength": len(data), "ContentType": content_type}
+
+    def get_object(self, Bucket, Key):
+        data, _ = self._get(Bucket, Key, "GetObject")
+        return {"Body": StreamingBody(io.BytesIO(data), len(data))}
+
+    def download_file(self, bucket, key, path):
+        data, _ = self._get(bucket, key, "GetObject")
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        query = "&".join(f"{name}={value}" for name, value in Params.items() if name.startswith("Response"))
+        return f"https://s3.example.com/{Params['Bucket']}/{Params['Key']}?{query}&X-Amz-Expires={ExpiresIn}"
+
+
+@unittest.skipIf(boto3 is None, "未安装 boto3")
+class S3ArtifactStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.client = FakeS3Client()
+        self.store = S3ArtifactStore(self.root, "bucket", prefix="artifacts", client=self.client)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_put_stream_uploads_under_prefix(self):
+        self.store.put_stream("ppt_1.pptx", io.BytesIO(b"pptx"))
+        data, content_type = self.client.objects[("bucket", "artifacts/ppt_1.pptx")]
+        self.assertEqual(data, b"pptx")
+        self.assertEqual(
+            content_type, "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+        )
+        self.assertTrue(self.store.exists("ppt_1.pptx"))
+
+    def test_publish_uploads_local_file(self):
+        path = self.store.local_path("previews/t1/slide_001.webp")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(b"webp")
+        self.assertEqual(self.store.publish("previews/t1/slide_001.webp"), "previews/t1/slide_001.webp")
+        self.assertEqual(self.client.objects[("bucket", "artifacts/previews/t1/slide_001.webp")][0], b"webp")
+
+    def test_fetch_downloads_once_into_local_cache(self):
+        self.store.put_stream("doc.pdf", io.BytesIO(b"%PDF-1.7"))
+        path = self.store.fetch("doc.pdf")
+        self.assertEqual(path, self.store.local_path("doc.pdf"))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"%PDF-1.7")
+        # 本地副本作为缓存，远端对象删除后仍可读取
+        del self.client.objects[("bucket", "artifacts/doc.pdf")]
+        self.assertEqual(self.store.fetch("doc.pdf"), path)
+        self.assertEqual([name for name in os.listdir(self.root) if name.endswith(".part")], [])
+
+    def test_iter_chunks_streams_in_chunks(self):
+        data = bytes(range(256)) * 40
+        self.store.put_stream("big.bin", io.BytesIO(data))
+        chunks = list(self.store.iter_chunks("big.bin", chunk_size=4096))
+        self.assertEqual(b"".join(chunks), data)
+        self.assertEqual([len(chunk) for chunk in chunks], [4096, 4096, len(data) - 8192])
+
+    def test_missing_key(self):
+        self.assertFalse(self.store.exists("missing.pptx"))
+        with self.assertRaises(FileNotFoundError):
+            list(self.store.iter_chunks("missing.pptx"))
+        with self.assertRaises(FileNotFoundError):
+            self.store.fetch("missing.pptx")
+        self.assertFalse(os.path.exists(self.store.local_path("missing.pptx")))
+
+    def test_other_client_errors_propagate(self):
+        def denied(**kwargs):
+            raise ClientError({"Error": {"Code": "AccessDenied", "Message": "Forbidden"}}, "HeadObject")
+        self.client.head_object = denied
+        with self.assertRaises(ClientError):
+            self.store.exists("ppt_1.pptx")
+
+    def test_presigned_url_disposition(self):
+        def disposition(url):
+            return parse_qs(urlparse(url).query)["ResponseContentDisposition"][0]
+        self.assertEqual(disposition(self.store.presigned_url("previews/t1/doc.pdf")),
+                         "attachment; filename*=utf-8''doc.pdf")
+        self.assertEqual(disposition(self.store.presigned_url("previews/t1/doc.pdf", disposition="inline")),
+                         "inline; filename*=utf-8''doc.pdf")
+
+
+if __name__ == "__main__":
+    unittest.main()
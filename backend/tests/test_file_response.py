@@ -0,0 +1,35 @@
+"""
+Range 请求头解析测试
+
+用法 (在 backend 目录下):
+    python -m unittest discover tests
+"""
+import unittest
+
+from app.services.file_response import _parse_range
+
+
+class ParseRangeTest(unittest.TestCase):
+
+    def test_satisfiable_ranges(self):
+        self.assertEqual(_parse_range("bytes=0-9", 50), (0, 9))
+        self.assertEqual(_parse_range("bytes=5-", 50), (5, 49))
+        self.assertEqual(_parse_range("bytes=-5", 50), (45, 49))
+        self.assertEqual(_parse_range("bytes=-500", 50), (0, 49))
+        self.assertEqual(_parse_range("bytes=40-999", 50), (40, 49))
+
+    def test_invalid_syntax_is_ignored(self):
+        for header in ("bytes=abc-", "bytes=-", "bytes=5-3", "bytes=--5", "bytes=+1-2", "bytes=0", "items=0-1",
+                       "bytes=0-1,5-6"):
+            with self.subTest(header=header):
+                self.assertIsNone(_parse_range(header, 50))
+
+    def test_unsatisfiable_ranges_raise(self):
+        for header, size in (("bytes=50-", 50), ("bytes=100-200", 50), ("bytes=-0", 50), ("bytes=0-", 0)):
+            with self.subTest(header=header, size=size):
+                with self.assertRaises(ValueError):
+                    _parse_range(header, size)
+
+
+if __name__ == "__main__":
+    unittest.main()
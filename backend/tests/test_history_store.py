@@ -0,0 +1,189 @@
+"""
+历史记录存储测试：内存、SQLite 与 Redis 后端按同一组用例校验游标分页
+Redis 后端使用内存中的假客户端 (只实现用到的有序集合与哈希命令)，不需要 Redis 服务
+
+用法 (在 backend 目录下):
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+
+from app.services import history_store
+from app.services.history_store import (
+    InvalidCursor, MemoryHistoryRepository, RedisHistoryRepository, SqliteHistoryRepository, encode_cursor,
+)
+from app.services.redis_client import redis_client
+
+
+class FakeRedis:
+    """按 redis-py (decode_responses=True) 的接口在内存中实现有序集合与哈希"""
+
+    def __init__(self):
+        self.zsets = {}  # 键 -> {成员: 分值}
+        self.hashes = {}  # 键 -> {字段: 值}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = value
+
+    def hmget(self, name, keys):
+        values = self.hashes.get(name, {})
+        return [values.get(key) for key in keys]
+
+    def zadd(self, name, mapping):
+        self.zsets.setdefault(name, {}).update((m, float(s)) for m, s in mapping.items())
+
+    def zcard(self, name):
+        return len(self.zsets.get(name, {}))
+
+    def _desc(self, name):
+        # 分值倒序，同分值按成员字典序倒序
+        return sorted(self.zsets.get(name, {}).items(), key=lambda item: (item[1], item[0]), reverse=True)
+
+    def zrevrange(self, name, start, end, withscores=False):
+        items = self._desc(name)[start:end + 1]
+        return items if withscores else [m for m, _ in items]
+
+    def zcount(self, name, min, max):
+        return sum(1 for s in self.zsets.get(name, {}).values() if float(min) <= s <= float(max))
+
+    def zrevrangebyscore(self, name, max, min, start=None, num=None, withscores=False):
+        items = [(m, s) for m, s in self._desc(name) if float(min) <= s <= float(max)]
+        if start is not None:
+            items = items[start:start + num]
+        return items if withscores else [m for m, _ in items]
+
+
+class FakePipeline:
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class HistoryRepositoryTests:
+    """各后端共用的用例，子类在 setUp 中创建 self.repo"""
+
+    def add_many(self, count, user_id="u1"):
+        return [self.repo.add(user_id, f"标题 {i}", f"task-{i}") for i in range(count)]
+
+    def list_all(self, user_id, limit):
+        """逐页翻到底，返回全部记录与每页条数"""
+        records, sizes, cursor = [], [], None
+        while True:
+            page, cursor = self.repo.list(user_id, limit, cursor)
+            records.extend(page)
+            sizes.append(len(page))
+            if cursor is None:
+                return records, sizes
+
+    def test_newest_first(self):
+        added = self.add_many(5)
+        self.add_many(2, user_id="u2")
+        page, cursor = self.repo.list("u1", 10)
+        self.assertEqual([r["id"] for r in page], [r["id"] for r in reversed(added)])
+        self.assertEqual(page[0], added[-1])
+        self.assertIsNone(cursor)
+        self.assertEqual(self.repo.count("u1"), 5)
+        self.assertEqual(self.repo.count("u2"), 2)
+        self.assertEqual(self.repo.list("nobody", 10), ([], None))
+
+    def test_last_page_has_no_cursor(self):
+        added = self.add_many(6)
+        records, sizes = self.list_all("u1", 3)
+        self.assertEqual(sizes, [3, 3])  # 记录数恰为每页条数的整数倍时不再返回空的末页
+        self.assertEqual([r["id"] for r in records], [r["id"] for r in reversed(added)])
+
+        records, sizes = self.list_all("u1", 4)
+        self.assertEqual(sizes, [4, 2])
+        self.assertEqual(len(records), 6)
+
+    def test_ties_in_same_millisecond_keep_insert_order(self):
+        with mock.patch.object(history_store.time, "time", return_value=1_700_000_000.0):
+            added = self.add_many(7)
+        self.assertEqual(len({r["created_at"] for r in added}), 1)
+        records, sizes = self.list_all("u1", 2)
+        self.assertEqual(sizes, [2, 2, 2, 1])
+        self.assertEqual([r["id"] for r in records], [r["id"] for r in reversed(added)])
+
+    def test_ties_with_unordered_ids_are_paged_once(self):
+        # 多个进程在同一毫秒写入时 ID 与写入顺序无关：翻页按 (时间戳, ID) 倒序，不重复也不遗漏
+        ids = [uuid.uuid4().hex for _ in range(9)]
+        for i, record_id in enumerate(ids):
+            ts = 1_700_000_000_000 + (i % 2)
+            self.repo._insert({
+                "id": record_id, "user_id": "u1", "title": "t", "task_id": record_id, "file_key": None,
+                "created_at": "2023-11-14T22:13:20", "created_ts": ts,
+            })
+        expected = sorted(((1_700_000_000_000 + (i % 2), record_id) for i, record_id in enumerate(ids)),
+                          reverse=True)
+        for limit in (1, 2, 4):
+            with self.subTest(limit=limit):
+                records, _ = self.list_all("u1", limit)
+                self.assertEqual([r["id"] for r in records], [record_id for _, record_id in expected])
+
+    def test_tampered_cursor_raises(self):
+        self.add_many(3)
+        _, cursor = self.repo.list("u1", 1)
+        self.assertIsNotNone(cursor)
+        ts, record_id = history_store.decode_cursor(cursor)
+        tampered_cursors = (
+            cursor[:-3] + "!!!",
+            cursor + "==",
+            "not-a-cursor",
+            encode_cursor(("abc", record_id)),
+            encode_cursor((f"+{ts}", record_id)),
+            encode_cursor((ts, "")),
+        )
+        for tampered in tampered_cursors:
+            with self.subTest(cursor=tampered):
+                with self.assertRaises(InvalidCursor):
+                    self.repo.list("u1", 1, tampered)
+
+
+class MemoryHistoryRepositoryTest(HistoryRepositoryTests, unittest.TestCase):
+
+    def setUp(self):
+        self.repo = MemoryHistoryRepository()
+
+
+class SqliteHistoryRepositoryTest(HistoryRepositoryTests, unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.repo = SqliteHistoryRepository(os.path.join(self.root, "history.db"))
+
+    def tearDown(self):
+        self.repo._conn.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class RedisHistoryRepositoryTest(HistoryRepositoryTests, unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(redis_client, "_client", FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repo = RedisHistoryRepository()
+
+    def test_unavailable_redis_raises(self):
+        with mock.patch.object(redis_client, "_client", None), \
+                mock.patch.object(type(redis_client), "client", new_callable=mock.PropertyMock, return_value=None):
+            with self.assertRaises(RuntimeError):
+                self.repo.list("u1", 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
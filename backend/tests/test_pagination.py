@@ -0,0 +1,47 @@
+"""
+大纲分页测试：超出页数上限时表格按规整后的行截断
+
+用法 (在 backend 目录下):
+    python -m unittest discover tests
+"""
+import unittest
+
+from app.config import settings
+from app.models import OutlineResponse, SlideContent, SlideLayout, ThemeStyle
+from app.services.pagination import paginate_outline
+from app.services.table_builder import normalize_table
+
+
+class TableTruncationTest(unittest.TestCase):
+
+    def paginate(self, data_points, max_slides):
+        # model_construct 跳过校验，模拟数据点中混入非字典项 (normalize_table 会跳过)
+        table = SlideContent.model_construct(
+            title="明细", bullet_points=[], layout=SlideLayout.TABLE, icon=None, data_points=data_points, notes=None
+        )
+        outline = OutlineResponse.model_construct(title="T", slides=[table])
+        return paginate_outline(outline, ThemeStyle.BUSINESS, max_slides=max_slides)
+
+    def test_truncates_whole_pages_of_rows(self):
+        per_page = settings.table_rows_per_slide
+        points = [{"序号": i} for i in range(per_page * 3 + 1)]
+        result = self.paginate(points, max_slides=3)  # 封面 + 2 页表格
+        rows = normalize_table(result.outline.slides[0].data_points).rows
+        self.assertEqual(len(rows), per_page * 2)
+        self.assertEqual(result.dropped_rows, per_page + 1)
+        self.assertEqual(result.dropped_slides, 0)
+
+    def test_non_dict_points_are_not_counted_as_rows(self):
+        per_page = settings.table_rows_per_slide
+        points = []
+        for i in range(per_page * 2):
+            points.extend([{"序号": i}, "无效", None])
+        result = self.paginate(points, max_slides=2)  # 封面 + 1 页表格
+        rows = normalize_table(result.outline.slides[0].data_points).rows
+        self.assertEqual(len(rows), per_page)
+        self.assertEqual(rows[-1], (str(per_page - 1),))
+        self.assertEqual(result.dropped_rows, per_page)
+
+
+if __name__ == "__main__":
+    unittest.main()
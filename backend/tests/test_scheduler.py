@@ -0,0 +1,188 @@
+"""
+FairScheduler 单元测试：优先级与用户间的排序、预留空位、单用户并发上限、取消
+
+用法 (在 backend 目录下):
+    python -m unittest discover tests
+"""
+import time
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.scheduler import FairScheduler, Priority
+
+
+class SchedulerTestCase(unittest.IsolatedAsyncioTestCase):
+    """作业记录开始顺序后阻塞，直到测试放行对应的事件"""
+
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.started = []
+        self.gates = {}
+
+    def tearDown(self):
+        for gate in self.gates.values():
+            gate.set()
+        self.executor.shutdown(wait=True)
+
+    def scheduler(self, slots=1, max_per_owner=0, reserved=None):
+        return FairScheduler("test", self.executor, slots, max_per_owner, reserved)
+
+    def job(self, name):
+        gate = self.gates[name] = threading.Event()
+
+        def run():
+            self.started.append(name)
+            gate.wait(5)
+            return name
+        return run
+
+    def submit(self, scheduler, owner, name, priority=Priority.NORMAL, **kwargs):
+        return asyncio.create_task(scheduler.run(owner, self.job(name), priority=priority, **kwargs))
+
+    async def until(self, condition, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("等待超时")
+            await asyncio.sleep(0.01)
+
+    async def drain(self, scheduler, tasks):
+        """依次放行正在运行的作业，直到全部完成"""
+        while not all(task.done() for task in tasks):
+            for name in list(self.started):
+                self.gates[name].set()
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class OrderingTest(SchedulerTestCase):
+
+    async def test_higher_priority_runs_first(self):
+        scheduler = self.scheduler(slots=1)
+        tasks = [self.submit(scheduler, "blocker", "blocker")]
+        await self.until(lambda: self.started == ["blocker"])
+        tasks.append(self.submit(scheduler, "a", "batch", Priority.BATCH))
+        tasks.append(self.submit(scheduler, "b", "normal", Priority.NORMAL))
+        tasks.append(self.submit(scheduler, "c", "interactive", Priority.INTERACTIVE))
+        await asyncio.sleep(0.05)
+        await self.drain(scheduler, tasks)
+        self.assertEqual(self.started, ["blocker", "interactive", "normal", "batch"])
+
+    async def test_owners_share_fairly_within_priority(self):
+        scheduler = self.scheduler(slots=1)
+        tasks = [self.submit(scheduler, "blocker", "blocker")]
+        await self.until(lambda: self.started == ["blocker"])
+        for i in range(3):
+            tasks.append(self.submit(scheduler, "a", f"a{i}"))
+        tasks.append(self.submit(scheduler, "b", "b0"))
+        await asyncio.sleep(0.05)
+        await self.drain(scheduler, tasks)
+        self.assertEqual(self.started, ["blocker", "a0", "b0", "a1", "a2"])
+
+    async def test_weight_increases_share(self):
+        scheduler = self.scheduler(slots=1)
+        tasks = [self.submit(scheduler, "blocker", "blocker")]
+        await self.until(lambda: self.started == ["blocker"])
+        for i in range(2):
+            tasks.append(self.submit(scheduler, "a", f"a{i}"))
+        for i in range(2):
+            tasks.append(self.submit(scheduler, "b", f"b{i}", weight=4.0))
+        await asyncio.sleep(0.05)
+        await self.drain(scheduler, tasks)
+        self.assertEqual(self.started, ["blocker", "b0", "b1", "a0", "a1"])
+
+
+class ReservationTest(SchedulerTestCase):
+
+    async def test_reserved_slot_not_used_by_lower_priority(self):
+        scheduler = self.scheduler(slots=2, reserved={Priority.INTERACTIVE: 1})
+        tasks = [self.submit(scheduler, "a", f"batch{i}", Priority.BATCH) for i in range(2)]
+        await self.until(lambda: len(self.started) == 1)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.started, ["batch0"])
+        self.assertEqual(scheduler.stats()["lanes"]["batch"]["queued"], 1)
+
+        tasks.append(self.submit(scheduler, "b", "interactive", Priority.INTERACTIVE))
+        await self.until(lambda: "interactive" in self.started)
+        self.assertEqual(scheduler.stats()["running"], 2)
+        await self.drain(scheduler, tasks)
+
+    async def test_reservations_leave_one_slot_for_lowest_priority(self):
+        scheduler = self.scheduler(slots=2, reserved={Priority.INTERACTIVE: 5, Priority.NORMAL: 5})
+        self.assertEqual(scheduler.reserved[Priority.INTERACTIVE], 1)
+        self.assertEqual(scheduler.reserved[Priority.NORMAL], 0)
+        tasks = [self.submit(scheduler, "a", "batch", Priority.BATCH)]
+        await self.until(lambda: self.started == ["batch"])
+        await self.drain(scheduler, tasks)
+
+
+class OwnerCapTest(SchedulerTestCase):
+
+    async def test_owner_limited_to_max_concurrent_jobs(self):
+        scheduler = self.scheduler(slots=3, max_per_owner=1)
+        tasks = [self.submit(scheduler, "a", f"a{i}") for i in range(2)]
+        tasks.append(self.submit(scheduler, "b", "b0"))
+        await self.until(lambda: len(self.started) == 2)
+        await asyncio.sleep(0.05)
+        self.assertEqual(sorted(self.started), ["a0", "b0"])
+
+        self.gates["a0"].set()
+        await self.until(lambda: "a1" in self.started)
+        await self.drain(scheduler, tasks)
+        self.assertEqual(scheduler.stats()["running"], 0)
+
+
+class CancellationTest(SchedulerTestCase):
+
+    async def test_cancelled_while_running_keeps_slot_until_thread_finishes(self):
+        scheduler = self.scheduler(slots=1)
+        running = self.submit(scheduler, "a", "running")
+        await self.until(lambda: self.started == ["running"])
+        waiting = self.submit(scheduler, "b", "waiting")
+        await asyncio.sleep(0.01)
+
+        running.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await running
+        await asyncio.sleep(0.05)
+        # 线程仍在执行，空位未释放，排队的作业不能开始
+        self.assertEqual(self.started, ["running"])
+        self.assertEqual(scheduler.stats()["running"], 1)
+
+        self.gates["running"].set()
+        await self.until(lambda: "waiting" in self.started)
+        await self.drain(scheduler, [waiting])
+        self.assertEqual(scheduler.stats()["running"], 0)
+
+    async def test_cancelled_while_queued_is_removed(self):
+        scheduler = self.scheduler(slots=1)
+        running = self.submit(scheduler, "a", "running")
+        await self.until(lambda: self.started == ["running"])
+        queued = self.submit(scheduler, "b", "queued")
+        after = self.submit(scheduler, "c", "after")
+        await asyncio.sleep(0.01)
+        self.assertEqual(scheduler.stats()["queued"], 2)
+
+        queued.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await queued
+        self.assertEqual(scheduler.stats()["queued"], 1)
+        await self.drain(scheduler, [running, after])
+        self.assertEqual(self.started, ["running", "after"])
+        stats = scheduler.stats()
+        self.assertEqual((stats["running"], stats["queued"], stats["owners"]), (0, 0, 0))
+
+    async def test_job_exception_releases_slot(self):
+        scheduler = self.scheduler(slots=1)
+
+        def fail():
+            raise ValueError("boom")
+        with self.assertRaises(ValueError):
+            await scheduler.run("a", fail)
+        self.assertEqual(scheduler.stats()["running"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+认证依赖测试：令牌缓存的过期、下载令牌绑定任务与作业归属
+
+用法 (在 backend 目录下):
+    python -m unittest discover tests
+"""
+import time
+import unittest
+from datetime import timedelta
+from typing import Optional
+from unittest import mock
+from urllib.parse import urlencode
+
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.services import security
+from app.services.auth import AuthService
+from app.services.security import (
+    TokenCache, create_download_token, download_user_id, optional_user_id, request_owner, require_user_id,
+    signed_url, token_cache,
+)
+
+
+def make_request(token: Optional[str] = None, bearer: Optional[str] = None, task_id: Optional[str] = None,
+                 client: Optional[tuple] = ("203.0.113.7", 50000)) -> Request:
+    headers = [(b"authorization", f"Bearer {bearer}".encode())] if bearer else []
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": f"/api/download/{task_id}" if task_id else "/",
+        "headers": headers,
+        "query_string": urlencode({"token": token}).encode() if token else b"",
+        "path_params": {"task_id": task_id} if task_id else {},
+        "client": client,
+    })
+
+
+class TokenCacheTest(unittest.TestCase):
+
+    def test_entry_expires_at_token_exp(self):
+        cache = TokenCache(maxsize=10, ttl=300)
+        now = time.time()
+        cache.put("token", {"sub": "u1", "exp": now + 5})
+        with mock.patch.object(security.time, "time", return_value=now + 4):
+            self.assertEqual(cache.get("token")["sub"], "u1")
+        with mock.patch.object(security.time, "time", return_value=now + 5):
+            self.assertIsNone(cache.get("token"))
+        self.assertIsNone(cache.get("token"))  # 过期条目已删除
+
+    def test_entry_expires_after_ttl(self):
+        cache = TokenCache(maxsize=10, ttl=30)
+        now = time.time()
+        cache.put("token", {"sub": "u1", "exp": now + 3600})
+        with mock.patch.object(security.time, "time", return_value=now + 31):
+            self.assertIsNone(cache.get("token"))
+
+    def test_evicts_least_recently_used(self):
+        cache = TokenCache(maxsize=2, ttl=300)
+        cache.put("a", {"sub": "a"})
+        cache.put("b", {"sub": "b"})
+        cache.get("a")
+        cache.put("c", {"sub": "c"})
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"sub": "a"})
+        self.assertEqual(cache.get("c"), {"sub": "c"})
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = TokenCache(maxsize=0, ttl=300)
+        cache.put("token", {"sub": "u1"})
+        self.assertIsNone(cache.get("token"))
+
+
+class LoginTokenTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        token_cache.clear()
+
+    def tearDown(self):
+        token_cache.clear()
+
+    async def test_valid_token(self):
+        token = AuthService.create_access_token({"sub": "u1"})
+        self.assertEqual(await require_user_id(make_request(bearer=token)), "u1")
+
+    async def test_expired_token_is_rejected(self):
+        token = AuthService.create_access_token({"sub": "u1"}, timedelta(seconds=-1))
+        with self.assertRaises(HTTPException) as ctx:
+            await require_user_id(make_request(bearer=token))
+        self.assertEqual(ctx.exception.status_code, 401)
+        self.assertIsNone(await optional_user_id(make_request(bearer=token)))
+
+    async def test_cache_entry_does_not_outlive_exp(self):
+        token = AuthService.create_access_token({"sub": "u1"}, timedelta(seconds=60))
+        self.assertEqual(await require_user_id(make_request(bearer=token)), "u1")
+        with mock.patch.object(AuthService, "decode_token", wraps=AuthService.decode_token) as decode:
+            self.assertEqual(await require_user_id(make_request(bearer=token)), "u1")
+            decode.assert_not_called()  # 缓存命中
+            # exp 之后缓存不再命中，令牌重新解码 (真实时间下解码会因过期失败)
+            with mock.patch.object(security.time, "time", return_value=time.time() + 61):
+                self.assertIsNone(token_cache.get(token))
+                decode.return_value = None
+                with self.assertRaises(HTTPException):
+                    await require_user_id(make_request(bearer=token))
+            decode.assert_called_once_with(token)
+
+    async def test_download_token_is_not_a_login_token(self):
+        token = create_download_token("t1", "u1")
+        with self.assertRaises(HTTPException):
+            await require_user_id(make_request(bearer=token))
+        self.assertIsNone(await optional_user_id(make_request(bearer=token)))
+
+
+class DownloadTokenTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_token_bound_to_task(self):
+        token = create_download_token("t1", "u1")
+        self.assertEqual(await download_user_id(make_request(token=token, task_id="t1"), None), "u1")
+        self.assertIsNone(await download_user_id(make_request(token=token, task_id="t2"), None))
+
+    async def test_expired_download_token_is_rejected(self):
+        token = AuthService.create_access_token(
+            {"sub": "u1", "task": "t1", "scope": security.DOWNLOAD_SCOPE}, timedelta(seconds=-1)
+        )
+        self.assertIsNone(await download_user_id(make_request(token=token, task_id="t1"), None))
+
+    async def test_login_token_in_query_is_rejected(self):
+        token = AuthService.create_access_token({"sub": "u1", "task": "t1"})
+        self.assertIsNone(await download_user_id(make_request(token=token, task_id="t1"), None))
+
+    async def test_authorization_header_takes_precedence(self):
+        self.assertEqual(await download_user_id(make_request(task_id="t1"), "u2"), "u2")
+
+    def test_signed_url(self):
+        self.assertEqual(signed_url("/api/download/t1", "t1", None), "/api/download/t1")
+        self.assertIsNone(signed_url(None, "t1", "u1"))
+        url = signed_url("/api/preview/t1?page=2", "t1", "u1")
+        self.assertTrue(url.startswith("/api/preview/t1?page=2&token="))
+        claims = AuthService.decode_token(url.split("token=", 1)[1])
+        self.assertEqual((claims["sub"], claims["task"], claims["scope"]), ("u1", "t1", security.DOWNLOAD_SCOPE))
+
+
+class RequestOwnerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_owner(self):
+        self.assertEqual(await request_owner(make_request(), "u1"), "u1")
+        self.assertEqual(await request_owner(make_request(), None), "ip:203.0.113.7")
+        self.assertEqual(await request_owner(make_request(client=None), None), "ip:unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+TaskStorage 单元测试：按状态统计的任务数随增删与状态变化更新
+
+用法 (在 backend 目录下):
+    python -m unittest discover tests
+"""
+import unittest
+
+from app.models import TaskStatus
+from app.services import metrics
+from app.services.task_storage import TaskStorage
+
+
+@unittest.skipIf(metrics.TASKS is None, "未安装 prometheus_client 或未启用指标")
+class TaskStorageTest(unittest.TestCase):
+
+    def count(self, status: TaskStatus) -> float:
+        return metrics.TASKS.labels(status=status.value)._value.get()
+
+    def counts(self):
+        return {status: self.count(status) for status in TaskStatus}
+
+    def assertDelta(self, before, **expected):
+        after = self.counts()
+        self.assertEqual(
+            {status.value: after[status] - before[status] for status in TaskStatus if after[status] != before[status]},
+            expected,
+        )
+
+    def test_add_change_and_remove(self):
+        storage = TaskStorage()
+        before = self.counts()
+        storage["a"] = {"status": TaskStatus.PENDING}
+        storage["b"] = {"status": TaskStatus.PENDING}
+        self.assertDelta(before, pending=2)
+
+        storage.set_status("a", TaskStatus.PROCESSING)
+        storage.set_status("a", TaskStatus.COMPLETED)
+        self.assertEqual(storage["a"]["status"], TaskStatus.COMPLETED)
+        self.assertDelta(before, pending=1, completed=1)
+
+        storage.pop("a")
+        del storage["b"]
+        storage.pop("missing", None)
+        self.assertDelta(before)
+
+    def test_reassigning_same_task_counts_once(self):
+        storage = TaskStorage()
+        before = self.counts()
+        task = {"status": "completed"}  # 从 Redis 读回的状态为字符串
+        storage["a"] = task
+        storage["a"] = task
+        storage.setdefault("a", {"status": TaskStatus.FAILED})
+        self.assertDelta(before, completed=1)
+
+        storage["a"] = {"status": TaskStatus.FAILED}
+        self.assertDelta(before, failed=1)
+        storage.pop("a")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -96,7 +96,7 @@ export default function Home() {
         if (status.status === 'completed') {
           setIsGeneratingPPT(false);
           clearInterval(interval);
-          window.location.href = getDownloadUrl(taskId);
+          window.location.href = getDownloadUrl(status);
         } else if (status.status === 'failed') {
           setIsGeneratingPPT(false);
           setError(status.message || 'PPT生成失败');
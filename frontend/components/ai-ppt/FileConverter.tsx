@@ -3,7 +3,7 @@ import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Progress } from '@/components/ui/progress';
 import { FileType, Loader2, RefreshCw } from 'lucide-react';
-import { convertFile } from '@/lib/api';
+import { convertFile, getDownloadUrl, getTaskStatus } from '@/lib/api';
 
 interface FileConverterProps {
   setError: (error: string | null) => void;
@@ -31,14 +31,13 @@ export default function FileConverter({ setError }: FileConverterProps) {
       // 轮询转换状态
       const interval = setInterval(async () => {
         try {
-          const response = await fetch(`/api/task/${result.task_id}`);
-          const status = await response.json();
+          const status = await getTaskStatus(result.task_id);
           setConvertProgress(status.progress);
 
           if (status.status === 'completed') {
             setIsConverting(false);
             clearInterval(interval);
-            window.location.href = `/api/download/${result.task_id}`;
+            window.location.href = getDownloadUrl(status);
           } else if (status.status === 'failed') {
             setIsConverting(false);
             setError(status.message || '转换失败');
@@ -3,7 +3,7 @@ import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from '@/components/ui/table';
 import { X, Download, Eye, Clock } from 'lucide-react';
-import { getHistory, HistoryItem } from '@/lib/api';
+import { convertPptToPdf, getDownloadUrl, getHistory, getTaskStatus, HistoryItem } from '@/lib/api';
 
 interface HistoryModalProps {
   isOpen: boolean;
@@ -14,6 +14,8 @@ interface HistoryModalProps {
 export default function HistoryModal({ isOpen, onClose, setError }: HistoryModalProps) {
   const [history, setHistory] = useState<HistoryItem[]>([]);
   const [isLoading, setIsLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   useEffect(() => {
     if (isOpen) {
@@ -28,6 +30,7 @@ export default function HistoryModal({ isOpen, onClose, setError }: HistoryModal
     try {
       const response = await getHistory();
       setHistory(response.items);
+      setNextCursor(response.next_cursor || null);
     } catch (error: any) {
       setError(error.message || '加载历史记录失败');
     } finally {
@@ -35,12 +38,39 @@ export default function HistoryModal({ isOpen, onClose, setError }: HistoryModal
     }
   };
 
-  const handleDownload = (taskId: string) => {
-    window.location.href = `/api/download/${taskId}`;
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    setError(null);
+
+    try {
+      const response = await getHistory(nextCursor);
+      setHistory((prev) => [...prev, ...response.items]);
+      setNextCursor(response.next_cursor || null);
+    } catch (error: any) {
+      setError(error.message || '加载历史记录失败');
+    } finally {
+      setIsLoadingMore(false);
+    }
   };
 
-  const handlePreview = (taskId: string) => {
-    window.location.href = `/api/convert/ppt-to-pdf/${taskId}`;
+  // 浏览器跳转无法携带认证头，使用任务状态中带下载令牌的链接
+  const handleDownload = async (taskId: string) => {
+    try {
+      const status = await getTaskStatus(taskId);
+      window.location.href = getDownloadUrl(status);
+    } catch (error: any) {
+      setError(error.message || '下载失败');
+    }
+  };
+
+  const handlePreview = async (taskId: string) => {
+    try {
+      const result = await convertPptToPdf(taskId);
+      window.location.href = getDownloadUrl(result);
+    } catch (error: any) {
+      setError(error.message || '生成预览失败');
+    }
   };
 
   if (!isOpen) return null;
@@ -107,6 +137,13 @@ export default function HistoryModal({ isOpen, onClose, setError }: HistoryModal
               </TableBody>
             </Table>
           )}
+          {!isLoading && nextCursor && (
+            <div className="flex justify-center pt-4">
+              <Button variant="outline" size="sm" onClick={loadMore} disabled={isLoadingMore}>
+                {isLoadingMore ? '加载中...' : '加载更多'}
+              </Button>
+            </div>
+          )}
         </div>
       </div>
     </div>
@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Eye, Loader2, X } from 'lucide-react';
+import { convertPptToPdf, getTaskStatus } from '@/lib/api';
 
 interface PptPreviewProps {
   taskId: string | null;
@@ -21,8 +22,7 @@ export default function PptPreview({ taskId, setError }: PptPreviewProps) {
 
     try {
       // 首先检查任务状态
-      const taskStatusResponse = await fetch(`/api/task/${taskId}`);
-      const taskStatus = await taskStatusResponse.json();
+      const taskStatus = await getTaskStatus(taskId);
 
       if (taskStatus.status !== 'completed') {
         setError('PPT 尚未生成完成，请稍后再试');
@@ -31,13 +31,7 @@ export default function PptPreview({ taskId, setError }: PptPreviewProps) {
       }
 
       // 尝试获取PDF预览
-      const response = await fetch(`/api/convert/ppt-to-pdf/${taskId}`);
-      
-      if (!response.ok) {
-        throw new Error('生成预览失败');
-      }
-
-      const result = await response.json();
+      const result = await convertPptToPdf(taskId);
       
       if (result.status === 'completed' && result.download_url) {
         setPreviewUrl(`${window.location.origin}${result.download_url}`);
@@ -45,8 +39,7 @@ export default function PptPreview({ taskId, setError }: PptPreviewProps) {
       } else {
         // 如果是异步转换，轮询状态
         const interval = setInterval(async () => {
-          const statusResponse = await fetch(`/api/task/${result.task_id}`);
-          const status = await statusResponse.json();
+          const status = await getTaskStatus(result.task_id);
 
           if (status.status === 'completed' && status.download_url) {
             setPreviewUrl(`${window.location.origin}${status.download_url}`);
@@ -170,9 +170,23 @@ export async function getTaskStatus(taskId: string): Promise<TaskResponse> {
 
 /**
  * 获取下载链接
+ * 登录用户任务的 download_url 带有短期下载令牌，可直接用于浏览器跳转
  */
-export function getDownloadUrl(taskId: string): string {
-  return `${API_URL}/api/download/${taskId}`;
+export function getDownloadUrl(task: TaskResponse): string {
+  return `${API_URL}${task.download_url || `/api/download/${task.task_id}`}`;
+}
+
+/**
+ * 将生成的 PPT 转换为 PDF 用于预览
+ */
+export async function convertPptToPdf(taskId: string): Promise<TaskResponse> {
+  try {
+    const response = await apiClient.get<TaskResponse>(`/api/convert/ppt-to-pdf/${taskId}`);
+    return response.data;
+  } catch (error: any) {
+    console.error('生成预览失败:', error);
+    throw new Error(error.response?.data?.detail || '生成预览失败');
+  }
 }
 
 /**
@@ -214,13 +228,14 @@ export interface HistoryItem {
   user_id: string;
   title: string;
   task_id: string;
-  file_path?: string;
+  file_key?: string;
   created_at: string;
 }
 
 export interface HistoryResponse {
   items: HistoryItem[];
   total: number;
+  next_cursor?: string | null;
 }
 
 // 认证相关的API调用
@@ -272,9 +287,11 @@ export async function getCurrentUser(): Promise<User> {
   }
 }
 
-export async function getHistory(): Promise<HistoryResponse> {
+export async function getHistory(cursor?: string, limit?: number): Promise<HistoryResponse> {
   try {
-    const response = await apiClient.get<HistoryResponse>('/api/history');
+    const response = await apiClient.get<HistoryResponse>('/api/history', {
+      params: { cursor, limit },
+    });
     return response.data;
   } catch (error: any) {
     console.error('获取历史记录失败:', error);
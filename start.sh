@@ -107,11 +107,12 @@ cd ../backend
 source venv/bin/activate
 
 # 确保使用 python -m uvicorn 方式启动，并监听 127.0.0.1
-python -m uvicorn app.main:app --reload --host 127.0.0.1 --port 8000 > ../backend.log 2>&1 &
+# 应用日志由后端写入按大小轮转的 backend.log；终端输出 (启动失败、热重载信息) 写入 backend.out.log
+LOG_FILE=../backend.log python -m uvicorn app.main:app --reload --host 127.0.0.1 --port 8000 > ../backend.out.log 2>&1 &
 BACKEND_PID=$!
 
 if [ $? -ne 0 ]; then
-    echo "❌ 后端启动失败，请查看 backend.log"
+    echo "❌ 后端启动失败，请查看 backend.out.log"
     exit 1
 fi
 
@@ -153,7 +154,7 @@ echo "📍 后端地址: http://127.0.0.1:8000 (或 http://localhost:8000)"
 echo "📍 API 文档: http://127.0.0.1:8000/docs"
 echo ""
 echo "📝 日志文件:"
-echo "   - 后端: backend.log"
+echo "   - 后端: backend.log (启动输出: backend.out.log)"
 echo "   - 前端: frontend.log"
 echo ""
 echo "⚠️  提示: 请确保已在 backend/.env 中配置 API Keys"